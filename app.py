@@ -4,7 +4,7 @@ from flask import Flask, render_template, request, jsonify, redirect, url_for, f
 import requests
 import re
 import json
-from urllib.parse import quote, urljoin
+from urllib.parse import quote, urlparse
 import html
 from datetime import timedelta, datetime
 from datetime import timedelta
@@ -14,6 +14,12 @@ import ssl
 import urllib3
 import platform  # Add platform module import
 import hashlib
+import base64
+import threading
+import gzip
+import heapq
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
 # Constants
@@ -22,14 +28,33 @@ APPLICATION_JSON = 'application/json'
 # Import auth-related modules
 from flask_login import LoginManager, login_user, logout_user, login_required, current_user
 from werkzeug.security import generate_password_hash, check_password_hash
-from models import db, User, Encryption, DashboardView, LogAnalysis
+from models import db, User, Encryption, DashboardView, LogAnalysis, Build, JenkinsConfig
 from forms import LoginForm, RegistrationForm, JenkinsConfigForm, SettingsForm # Import SettingsForm
 import requests # Import requests for Ollama API
 from flask_wtf.csrf import CSRFProtect # Import CSRFProtect
 from log_analyzer_engine import LogAnalyzerEngine # Import our local analyzer engine
+from log_scanning import StageDetector # Stage detection that needs no database
 from jenkinsapi.jenkins import Jenkins # Import Jenkins API
+from jenkins_client import JenkinsClient, credential_key # Pooled keep-alive sessions for Jenkins calls
+from circuit_breaker import CircuitOpenError, start_budget, end_budget # Fail fast when Jenkins is unhealthy
+from response_cache import TTLCache, StaleCache # In-memory caches for Jenkins API responses
+from log_store import LogStore # Incrementally synced local copies of console logs
+from build_sync import BuildSyncer, stored_builds, fetch_buildable_jobs, job_counts, fresh_sync_state, normalize_jenkins_url, job_api_path # Local build-history warehouse
+from build_collector import RecentBuildCollector # Concurrent recent-build walk across folders
+from dashboard_snapshots import SnapshotStore, SnapshotPoller, summarize_overview # Precomputed dashboard data
+from capacity import CapacityStore, CapacityPoller # Executor and build-queue samples
+from job_search import JobSearchIndexes # Server-side job search over cached job lists
+from federation import user_controllers, controller_for_url, fan_out, section_summary # Queries across all of a user's controllers
 
 JOB_API_PATH_SEPARATOR = "/job/"
+JOB_FOLDER_TREE = 'jobs[name,fullName,url,color,jobs[name]]'  # One tree level; child names only to count them
+JOB_FOLDER_PAGE_SIZE = 100
+OVERVIEW_JOB_FIELDS = 'name,fullName,url,color,lastBuild[number,timestamp,duration,result]'
+OVERVIEW_JOB_TREE = f"jobs[{OVERVIEW_JOB_FIELDS},jobs[{OVERVIEW_JOB_FIELDS},jobs[{OVERVIEW_JOB_FIELDS}]]]"  # Three folder levels, like the warehouse sync
+JOB_FOLDER_MAX_PAGE_SIZE = 500
+JOB_SEARCH_DEFAULT_LIMIT = 10
+JOB_SEARCH_MAX_LIMIT = 50
+CAPACITY_MAX_POINTS = 720  # Longer utilization series are averaged down to this many points
 
 # Configure logging
 if not os.path.exists('logs'):
@@ -41,6 +66,33 @@ app = Flask(__name__)
 app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'your-secret-key-for-development')
 app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///jenkins_monitor.db'
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+app.config['JENKINS_POOL_SIZE'] = int(os.environ.get('JENKINS_POOL_SIZE', 10))
+app.config['JENKINS_VERIFY_SSL'] = os.environ.get('JENKINS_VERIFY_SSL', 'false').lower() == 'true'  # Check Jenkins API certificates
+app.config['JENKINS_REQUEST_BUDGET'] = float(os.environ.get('JENKINS_REQUEST_BUDGET', 25))  # Seconds of upstream time per request
+app.config['JENKINS_BREAKER_FAILURE_RATE'] = float(os.environ.get('JENKINS_BREAKER_FAILURE_RATE', 0.5))
+app.config['JENKINS_BREAKER_OPEN_SECONDS'] = float(os.environ.get('JENKINS_BREAKER_OPEN_SECONDS', 30))
+app.config['JENKINS_BREAKER_SLOW_CALL_SECONDS'] = float(os.environ.get('JENKINS_BREAKER_SLOW_CALL_SECONDS', 10))
+app.config['JOB_CACHE_TTL'] = int(os.environ.get('JOB_CACHE_TTL', 60))  # Seconds
+app.config['JOB_FOLDER_CACHE_SIZE'] = int(os.environ.get('JOB_FOLDER_CACHE_SIZE', 2048))  # Folder levels kept by /api/jobs/browse
+app.config['STALE_MAX_AGE'] = int(os.environ.get('STALE_MAX_AGE', 24 * 60 * 60))  # Oldest last-good response served during an outage
+app.config['STALE_RETRY_BASE'] = float(os.environ.get('STALE_RETRY_BASE', 5))  # First revalidation delay; doubles per failure
+app.config['STALE_RETRY_MAX'] = float(os.environ.get('STALE_RETRY_MAX', 300))
+app.config['CREDENTIAL_CACHE_TTL'] = int(os.environ.get('CREDENTIAL_CACHE_TTL', 300))  # Seconds a decrypted token stays in memory
+app.config['LOG_STORE_DIR'] = os.environ.get('LOG_STORE_DIR', 'log_store')
+app.config['LOG_STORE_MAX_MB'] = int(os.environ.get('LOG_STORE_MAX_MB', 2048))
+app.config['LOG_STORE_REVALIDATE_SECONDS'] = int(os.environ.get('LOG_STORE_REVALIDATE_SECONDS', 300))  # How often stored logs re-check the reader's access
+app.config['BUILD_SYNC_INTERVAL'] = int(os.environ.get('BUILD_SYNC_INTERVAL', 300))  # Seconds between warehouse syncs
+app.config['BUILD_SYNC_MAX_HISTORY'] = int(os.environ.get('BUILD_SYNC_MAX_HISTORY', 500))  # Builds pulled on a job's first sync
+app.config['BUILD_SYNC_IN_PROCESS'] = os.environ.get('BUILD_SYNC_IN_PROCESS', 'false').lower() == 'true'
+app.config['RECENT_BUILDS_WORKERS'] = int(os.environ.get('RECENT_BUILDS_WORKERS', 8))  # Parallel Jenkins requests per collection
+app.config['SNAPSHOT_DIR'] = os.environ.get('SNAPSHOT_DIR', 'snapshots')
+app.config['SNAPSHOT_INTERVAL'] = int(os.environ.get('SNAPSHOT_INTERVAL', 60))  # Seconds between dashboard snapshots
+app.config['FEDERATION_TIMEOUT'] = float(os.environ.get('FEDERATION_TIMEOUT', 10))  # Seconds per controller in merged multi-controller views
+app.config['SNAPSHOT_POLLER_IN_PROCESS'] = os.environ.get('SNAPSHOT_POLLER_IN_PROCESS', 'false').lower() == 'true'
+app.config['CAPACITY_DIR'] = os.environ.get('CAPACITY_DIR', 'capacity')
+app.config['CAPACITY_INTERVAL'] = int(os.environ.get('CAPACITY_INTERVAL', 60))  # Seconds between executor/queue samples
+app.config['CAPACITY_RETENTION_HOURS'] = int(os.environ.get('CAPACITY_RETENTION_HOURS', 24))
+app.config['CAPACITY_POLLER_IN_PROCESS'] = os.environ.get('CAPACITY_POLLER_IN_PROCESS', 'false').lower() == 'true'
 
 # Initialize database
 db.init_app(app)
@@ -60,6 +112,22 @@ with app.app_context():
 # Initialize the local log analyzer engine as a Flask app global
 log_analyzer_engine = None
 
+# Default stage patterns only, for stage name suggestions before the engine is loaded
+default_stage_detector = StageDetector()
+
+# Local console log store shared by all log endpoints
+log_store = LogStore(
+    app.config['LOG_STORE_DIR'],
+    max_bytes=app.config['LOG_STORE_MAX_MB'] * 1024 * 1024,
+    revalidate_seconds=app.config['LOG_STORE_REVALIDATE_SECONDS']
+)
+
+# Latest dashboard snapshot per controller, written by SnapshotPoller (in-process or run_worker.py)
+snapshot_store = SnapshotStore(app.config['SNAPSHOT_DIR'])
+
+# Executor and queue samples per controller, written by CapacityPoller (in-process or run_worker.py)
+capacity_store = CapacityStore(app.config['CAPACITY_DIR'], retention=app.config['CAPACITY_RETENTION_HOURS'] * 60 * 60)
+
 # Replace before_first_request with another initialization approach
 def initialize_log_analyzer():
     global log_analyzer_engine
@@ -68,8 +136,20 @@ def initialize_log_analyzer():
 # Initialize app objects that need to be setup after app context is created
 with app.app_context():
     Encryption.initialize(app)
+    JenkinsClient.initialize(app)
     initialize_log_analyzer()
 
+@app.before_request
+def start_jenkins_budget():
+    """Give each request a total time budget shared by all of its Jenkins calls."""
+    request.environ['nexci.budget_token'] = start_budget(app.config['JENKINS_REQUEST_BUDGET'])
+
+@app.teardown_request
+def end_jenkins_budget(exc=None):
+    token = request.environ.pop('nexci.budget_token', None)
+    if token is not None:
+        end_budget(token)
+
 @login_manager.user_loader
 def load_user(user_id):
     # Ensure user_id is valid before querying
@@ -82,48 +162,68 @@ def load_user(user_id):
 with app.app_context():
     db.create_all()
 
+# Keep the build-history warehouse in sync from inside the web process if asked to;
+# multi-worker deployments should run `python build_sync.py` as a separate worker instead
+if app.config['BUILD_SYNC_IN_PROCESS']:
+    BuildSyncer(app, interval=app.config['BUILD_SYNC_INTERVAL'], max_history=app.config['BUILD_SYNC_MAX_HISTORY']).start()
+
+# Same for dashboard snapshots; run_worker.py runs the poller (and the build sync) out of process
+if app.config['SNAPSHOT_POLLER_IN_PROCESS']:
+    SnapshotPoller(app, snapshot_store, interval=app.config['SNAPSHOT_INTERVAL'],
+                   max_workers=app.config['RECENT_BUILDS_WORKERS']).start()
+
+if app.config['CAPACITY_POLLER_IN_PROCESS']:
+    CapacityPoller(app, capacity_store, interval=app.config['CAPACITY_INTERVAL']).start()
+
+def latest_snapshot(jenkins_url, auth):
+    """
+    Latest dashboard snapshot taken of a controller with the caller's credentials, or None if
+    there is none younger than 3 poll intervals.
+    """
+    if not jenkins_url:
+        return None
+    return snapshot_store.load(jenkins_url, auth, max_age=app.config['SNAPSHOT_INTERVAL'] * 3)
+
 # --- Helper Functions ---
 
+def describe_jenkins_error(e, api_url):
+    """Turn a requests exception from a Jenkins API call into (error_message, status_code)."""
+    error_message = f"Error accessing {api_url}: {e}"
+    status_code = 500
+    if isinstance(e, CircuitOpenError):
+        error_message = f"{e} ({api_url})"
+        status_code = 503
+    elif hasattr(e, 'response') and e.response is not None:
+        status_code = e.response.status_code
+        if status_code == 401:
+            error_message = f'Authentication failed for {api_url}. Check credentials.'
+        elif status_code == 403:
+             error_message = f'Forbidden access to {api_url}. Check permissions or Jenkins CSRF settings.'
+        elif status_code == 404:
+            error_message = f'Resource not found at {api_url}. Check URL/Job Path.'
+        # Include response text if available and helpful
+        try:
+             response_text = e.response.text
+             # Avoid dumping huge HTML pages, look for JSON error messages
+             if APPLICATION_JSON in e.response.headers.get('Content-Type', '').lower():
+                 error_message += f" Details: {response_text[:500]}" # Limit length
+             elif '<title>Error</title>' in response_text: # Jenkins error page
+                 error_message += " Jenkins returned an error page."
+        except Exception:
+             pass # Ignore errors trying to get more details
+
+    app.logger.error(error_message)
+    return error_message, status_code
+
 def get_jenkins_api_data(api_url, username=None, api_token=None):
     # We're no longer using session for token storage due to cryptography.fernet.InvalidToken errors
     """Helper function to make authenticated GET requests to Jenkins API."""
     try:
-        session = requests.Session()
-        if username and api_token:
-            session.auth = (username, api_token)
-
-        response = session.get(api_url, timeout=20, verify=False)
-        response.raise_for_status()  # This will raise an exception for HTTP errors
-
-        # Check if the response is JSON
-        content_type = response.headers.get('Content-Type', '')
-        if APPLICATION_JSON not in content_type.lower() and 'json' not in content_type.lower():
-            app.logger.warning(f"Unexpected content type: {content_type} for URL: {api_url}")
-
-        return response.json(), None # Return data, no error
+        auth = (username, api_token) if username and api_token else None
+        # Identical concurrent requests share one upstream call; HTTP errors raise here
+        return JenkinsClient.get_json(api_url, auth=auth, timeout=20), None # Return data, no error
     except requests.exceptions.RequestException as e:
-        error_message = f"Error accessing {api_url}: {e}"
-        status_code = 500
-        if hasattr(e, 'response') and e.response is not None:
-            status_code = e.response.status_code
-            if status_code == 401:
-                error_message = f'Authentication failed for {api_url}. Check credentials.'
-            elif status_code == 403:
-                 error_message = f'Forbidden access to {api_url}. Check permissions or Jenkins CSRF settings.'
-            elif status_code == 404:
-                error_message = f'Resource not found at {api_url}. Check URL/Job Path.'
-            # Include response text if available and helpful
-            try:
-                 response_text = e.response.text
-                 # Avoid dumping huge HTML pages, look for JSON error messages
-                 if APPLICATION_JSON in e.response.headers.get('Content-Type', '').lower():
-                     error_message += f" Details: {response_text[:500]}" # Limit length
-                 elif '<title>Error</title>' in response_text: # Jenkins error page
-                     error_message += " Jenkins returned an error page."
-            except Exception:
-                 pass # Ignore errors trying to get more details
-
-        app.logger.error(error_message)
+        error_message, status_code = describe_jenkins_error(e, api_url)
         return None, (jsonify({'error': error_message}), status_code)
     except Exception as e:
         app.logger.error(f"An unexpected error occurred accessing {api_url}: {e}")
@@ -186,10 +286,43 @@ def jenkins_config():
         current_user.jenkins_username = form.jenkins_username.data
         current_user.set_jenkins_token(form.jenkins_api_token.data)
         db.session.commit()
+        invalidate_job_list_cache(current_user.id)
         flash('Jenkins configuration updated.')
         return redirect(url_for('dashboard'))
     
-    return render_template('jenkins_config.html', title='Jenkins Configuration', form=form)
+    return render_template('jenkins_config.html', title='Jenkins Configuration', form=form,
+                           controller_form=JenkinsConfigForm(prefix='controller'))
+
+@app.route('/jenkins_config/controllers', methods=['POST'])
+@login_required
+def add_jenkins_controller():
+    """Register an additional Jenkins controller for the merged dashboard views."""
+    form = JenkinsConfigForm(prefix='controller')
+    if form.validate_on_submit():
+        config = JenkinsConfig(
+            user_id=current_user.id,
+            jenkins_url=normalize_jenkins_url(form.jenkins_url.data),
+            jenkins_username=form.jenkins_username.data
+        )
+        config.set_jenkins_token(form.jenkins_api_token.data)
+        db.session.add(config)
+        db.session.commit()
+        invalidate_job_list_cache(current_user.id)
+        flash(f'Added Jenkins controller {config.jenkins_url}.')
+    else:
+        flash('Could not add the controller; check the URL, username and token.')
+    return redirect(url_for('jenkins_config'))
+
+@app.route('/jenkins_config/controllers/<int:config_id>/delete', methods=['POST'])
+@login_required
+def delete_jenkins_controller(config_id):
+    """Remove one of the current user's additional Jenkins controllers."""
+    config = JenkinsConfig.query.filter_by(id=config_id, user_id=current_user.id).first_or_404()
+    db.session.delete(config)
+    db.session.commit()
+    invalidate_job_list_cache(current_user.id)
+    flash(f'Removed Jenkins controller {config.jenkins_url}.')
+    return redirect(url_for('jenkins_config'))
 
 # --- Main Application Routes ---
 
@@ -223,31 +356,32 @@ def dashboard():
 # --- API Routes ---
 # Update API endpoints to use current_user's Jenkins credentials
 
+def job_url_path(job_url):
+    """Path of a job relative to the Jenkins root, e.g. 'job/FolderName/job/JobName/'."""
+    url_path = ''
+    try:
+        # Find the part after /job/
+        path_start_index = job_url.index('/job/') + 1 # Point after the first /
+        url_path = job_url[path_start_index:] # Get e.g., job/FolderName/job/JobName/
+    except ValueError:
+        app.logger.warning(f"Could not parse job path from URL: {job_url}")
+
+    # Ensure url_path ends with a slash if it's not empty
+    if url_path and not url_path.endswith('/'):
+        url_path += '/'
+    return url_path
+
 def extract_and_sort_jobs(api_data):
     """Helper function to extract and flatten the potentially nested job list."""
     jobs_list = []
     
     def extract_jobs(jobs):
         for job in jobs:
-            # Extract the path relative to Jenkins root from the full URL
-            job_url = job.get('url', '')
-            url_path = ''
-            try:
-                # Find the part after /job/
-                path_start_index = job_url.index('/job/') + 1 # Point after the first /
-                url_path = job_url[path_start_index:] # Get e.g., job/FolderName/job/JobName/
-            except ValueError:
-                app.logger.warning(f"Could not parse job path from URL: {job_url}")
-            
-            # Ensure url_path ends with a slash if it's not empty
-            if url_path and not url_path.endswith('/'):
-                url_path += '/'
-
             jobs_list.append({
                 'name': job.get('name'),         # For link text
                 'fullName': job.get('fullName'), # For data-full-name and API calls
                 'url': job.get('url'),           # For data-url
-                'url_path': url_path             # Derived path, might be useful later
+                'url_path': job_url_path(job.get('url', ''))  # Derived path, might be useful later
             })
             if 'jobs' in job: # Recursively check for nested jobs
                  extract_jobs(job['jobs'])
@@ -257,6 +391,143 @@ def extract_and_sort_jobs(api_data):
     jobs_list.sort(key=lambda x: x.get('fullName', '').lower())
     return jobs_list
 
+# Flattened, sorted job lists keyed by (user id, Jenkins URL, Jenkins username)
+job_list_cache = TTLCache(ttl=app.config['JOB_CACHE_TTL'])
+
+# Search indexes over the cached job lists, same keys; updated in place when a list changes
+job_search_indexes = JobSearchIndexes()
+
+# Single folder levels keyed by (user id, Jenkins URL, Jenkins username, folder full name)
+job_folder_cache = TTLCache(ttl=app.config['JOB_CACHE_TTL'], max_entries=app.config['JOB_FOLDER_CACHE_SIZE'])
+
+# Buildable jobs each set of credentials can see, keyed by (credential digest, Jenkins URL)
+visible_jobs_cache = TTLCache(ttl=app.config['JOB_CACHE_TTL'])
+
+def is_jenkins_outage(e):
+    """True unless Jenkins answered with a 4xx, which stale data must not paper over (e.g. a revoked token)."""
+    response = getattr(e, 'response', None)
+    return response is None or not 400 <= response.status_code < 500
+
+# Last good overview / recent builds per (endpoint, Jenkins URL, credential digest), served while Jenkins is failing
+last_good_cache = StaleCache(
+    retry_on=requests.exceptions.RequestException,
+    retry_if=is_jenkins_outage,
+    base_delay=app.config['STALE_RETRY_BASE'],
+    max_delay=app.config['STALE_RETRY_MAX'],
+    max_stale=app.config['STALE_MAX_AGE']
+)
+
+def stale_fields(entry, error):
+    """Response fields marking a last-good response served in place of a failed Jenkins call."""
+    if error is None:
+        return {}
+    return {'stale': True, 'age': round(entry.age, 1), 'error': str(error)}
+
+def make_job_list_loader(jenkins_url, username, api_token):
+    """Build a cache loader that fetches the job tree from Jenkins and flattens it."""
+    api_url = f"{jenkins_url}/api/json?tree=jobs[fullName,name,url,jobs[fullName,name,url,jobs[fullName,name,url]]]"
+    auth = (username, api_token) if username and api_token else None
+
+    def loader(etag):
+        headers = {'If-None-Match': etag} if etag else None
+        response = JenkinsClient.get(api_url, auth=auth, headers=headers, timeout=20)
+        if response.status_code == 304:
+            return None, etag
+        response.raise_for_status()
+
+        api_data = response.json()
+        if not api_data or 'jobs' not in api_data:
+            raise ValueError('Could not parse job data from Jenkins response.')
+
+        jobs_list = extract_and_sort_jobs(api_data)
+        # Digest of the flattened list, used as the ETag we hand to the browser
+        digest = hashlib.md5(json.dumps(jobs_list, sort_keys=True).encode('utf-8')).hexdigest()
+        return {'jobs': jobs_list, 'digest': digest}, response.headers.get('ETag')
+
+    return loader
+
+def make_job_folder_loader(jenkins_url, username, api_token, folder):
+    """Build a cache loader that fetches one level of the job tree (the root when `folder` is empty)."""
+    folder_path = job_api_path(folder) if folder else '/'
+    api_url = f"{jenkins_url}{folder_path}api/json?tree={JOB_FOLDER_TREE}"
+    auth = (username, api_token) if username and api_token else None
+
+    def loader(etag):
+        headers = {'If-None-Match': etag} if etag else None
+        response = JenkinsClient.get(api_url, auth=auth, headers=headers, timeout=20)
+        if response.status_code == 304:
+            return None, etag
+        response.raise_for_status()
+
+        api_data = response.json()
+        if not api_data or 'jobs' not in api_data:
+            raise ValueError(f"'{folder}' is not a folder or its contents could not be parsed.")
+
+        entries = []
+        for job in api_data['jobs']:
+            # Only folders list child jobs, so the presence of 'jobs' tells them apart
+            children = job.get('jobs')
+            entries.append({
+                'name': job.get('name'),
+                'fullName': job.get('fullName'),
+                'url': job.get('url'),
+                'url_path': job_url_path(job.get('url', '')),
+                'color': job.get('color'),
+                'is_folder': children is not None,
+                'child_count': len(children) if children is not None else None
+            })
+        # Folders first, then jobs, each alphabetically
+        entries.sort(key=lambda entry: (not entry['is_folder'], (entry.get('name') or '').lower()))
+        return {'jobs': entries}, response.headers.get('ETag')
+
+    return loader
+
+def job_folder_payload(user_id, jenkins_url, username, api_token, folder='', offset=0, limit=JOB_FOLDER_PAGE_SIZE, force=False):
+    """One page of a folder's direct children as (payload, status_code), served from the folder cache."""
+    try:
+        entry = job_folder_cache.get(
+            (user_id, jenkins_url, username, folder),
+            make_job_folder_loader(jenkins_url, username, api_token, folder),
+            force=force
+        )
+    except requests.exceptions.RequestException as e:
+        error_message, status_code = describe_jenkins_error(e, jenkins_url)
+        return {'error': error_message}, status_code
+    except ValueError as e:
+        return {'error': str(e)}, 404
+
+    entries = entry.value['jobs']
+    end = offset + limit
+    return {
+        'folder': folder,
+        'jobs': entries[offset:end],
+        'total': len(entries),
+        'offset': offset,
+        'next_offset': end if end < len(entries) else None
+    }, 200
+
+def controller_folders(controllers):
+    """Root level of a merged multi-controller tree: one folder entry per controller."""
+    return {
+        'folder': '',
+        'jobs': [{
+            'name': urlparse(c.jenkins_url).netloc or c.jenkins_url,
+            'fullName': '',
+            'url': c.jenkins_url + '/',
+            'is_folder': True,
+            'child_count': None,
+            'source': c.jenkins_url
+        } for c in controllers],
+        'total': len(controllers),
+        'offset': 0,
+        'next_offset': None
+    }
+
+def invalidate_job_list_cache(user_id):
+    """Drop every cached job list and folder level belonging to a user."""
+    job_list_cache.invalidate_where(lambda key: key[0] == user_id)
+    job_folder_cache.invalidate_where(lambda key: key[0] == user_id)
+
 @app.route('/api/jobs', methods=['POST', 'GET'])
 @login_required
 @csrf.exempt
@@ -269,9 +540,15 @@ def get_jobs():
             username = current_user.jenkins_username
             try:
                 api_token = current_user.get_jenkins_token()
+                controllers = user_controllers(current_user)
             except Exception as token_err:
                 app.logger.error(f"Error getting Jenkins token: {token_err}")
                 return jsonify({'error': 'Could not retrieve Jenkins authentication token'}), 401
+
+            # Several registered controllers: one merged list, each job tagged with its source
+            if len(controllers) > 1:
+                force_refresh = request.args.get('refresh', '').lower() in ('1', 'true')
+                return jsonify(federated_jobs(current_user.id, controllers, force_refresh))
         else:
             # For backward compatibility, still accept POST with credentials
             data = request.json
@@ -282,25 +559,179 @@ def get_jobs():
         if not jenkins_url:
             return jsonify({'error': 'Jenkins URL is required'}), 400
 
-        # Jenkins API endpoint to get jobs (potentially nested)
-        api_url = f"{jenkins_url}/api/json?tree=jobs[fullName,name,url,jobs[fullName,name,url,jobs[fullName,name,url]]]"
+        # Serve the flattened job list from cache; ?refresh=true forces a reload from Jenkins
+        force_refresh = request.args.get('refresh', '').lower() in ('1', 'true')
+        cache_key = (current_user.id, jenkins_url, username)
+        try:
+            entry = job_list_cache.get(
+                cache_key,
+                make_job_list_loader(jenkins_url, username, api_token),
+                force=force_refresh
+            )
+        except requests.exceptions.RequestException as e:
+            error_message, status_code = describe_jenkins_error(e, jenkins_url)
+            return jsonify({'error': error_message}), status_code
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 500
+
+        digest = entry.value['digest']
+        if request.if_none_match.contains(digest):
+            not_modified = Response(status=304)
+            not_modified.set_etag(digest)
+            return not_modified
+
+        response = jsonify({'jobs': entry.value['jobs']})
+        response.set_etag(digest)
+        response.headers['Cache-Control'] = 'private, no-cache'
+        return response
+    
+    except Exception as e:
+        app.logger.error(f"Unexpected error in get_jobs: {str(e)}")
+        return jsonify({'error': 'An unexpected error occurred fetching jobs data', 'details': str(e)}), 500
 
-        api_data, error_response = get_jenkins_api_data(api_url, username, api_token)
+def search_job_list(user_id, jenkins_url, username, api_token, query, limit):
+    """
+    Rank the user's cached job list against `query`; returns (sort_key, job) pairs and the
+    number of jobs searched. Raises requests exceptions if the list has to be loaded and can't be.
+    """
+    cache_key = (user_id, jenkins_url, username)
+    entry = job_list_cache.get(cache_key, make_job_list_loader(jenkins_url, username, api_token))
+    index = job_search_indexes.get(cache_key, entry.value['jobs'], entry.value['digest'])
+    return index.search_ranked(query, limit), len(index)
+
+@app.route('/api/jobs/search', methods=['GET'])
+@login_required
+def search_jobs():
+    """Top matches for ?q= among all of the user's jobs (prefix, substring, then fuzzy), at most ?limit=."""
+    try:
+        if not current_user.is_jenkins_configured():
+            return jsonify({'error': 'Jenkins configuration not found'}), 400
+        try:
+            controllers = user_controllers(current_user)
+        except Exception as token_err:
+            app.logger.error(f"Error getting Jenkins token: {token_err}")
+            return jsonify({'error': 'Could not retrieve Jenkins authentication token'}), 401
 
-        if error_response:
-            return error_response
+        query = request.args.get('q', '')
+        try:
+            limit = min(max(1, int(request.args.get('limit', JOB_SEARCH_DEFAULT_LIMIT))), JOB_SEARCH_MAX_LIMIT)
+        except ValueError:
+            return jsonify({'error': 'limit must be an integer'}), 400
 
-        if not api_data or 'jobs' not in api_data:
-            return jsonify({'error': 'Could not parse job data from Jenkins response.'}), 500
+        if len(controllers) == 1:
+            controller = controllers[0]
+            try:
+                ranked, total = search_job_list(
+                    current_user.id, controller.jenkins_url, controller.username, controller.api_token, query, limit
+                )
+            except requests.exceptions.RequestException as e:
+                error_message, status_code = describe_jenkins_error(e, controller.jenkins_url)
+                return jsonify({'error': error_message}), status_code
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 500
+            return jsonify({'query': query, 'jobs': [job for _, job in ranked], 'total': total})
+
+        # Several registered controllers: search each one's index and merge the rankings
+        user_id = current_user.id
+        sections = fan_out(
+            controllers,
+            lambda c: search_job_list(user_id, c.jenkins_url, c.username, c.api_token, query, limit),
+            app.config['FEDERATION_TIMEOUT']
+        )
+        answered = [section for section in sections if section['status'] == 'ok']
+        ranked = heapq.nsmallest(
+            limit,
+            ((key, dict(job, source=section['source'])) for section in answered for key, job in section['data'][0]),
+            key=lambda pair: pair[0]
+        )
+        return jsonify({
+            'query': query,
+            'jobs': [job for _, job in ranked],
+            'total': sum(section['data'][1] for section in answered),
+            'partial': len(answered) < len(sections),
+            'controllers': section_summary(sections)
+        })
 
-        # Extract and sort jobs from the API data
-        jobs_list = extract_and_sort_jobs(api_data)
-        
-        return jsonify({'jobs': jobs_list})
-    
     except Exception as e:
-        app.logger.error(f"Unexpected error in get_jobs: {str(e)}")
-        return jsonify({'error': 'An unexpected error occurred fetching jobs data', 'details': str(e)}), 500
+        app.logger.error(f"Unexpected error in search_jobs: {str(e)}")
+        return jsonify({'error': 'An unexpected error occurred searching jobs', 'details': str(e)}), 500
+
+@app.route('/api/jobs/browse', methods=['GET'])
+@login_required
+def browse_jobs():
+    """
+    One level of the job tree at a time: the direct children of ?folder= (a folder full name,
+    the root when empty), folders first, paged with ?offset=&limit=. Folders carry their
+    child count so the client can expand them on demand. ?refresh=true reloads the level.
+    """
+    try:
+        if not current_user.is_jenkins_configured():
+            return jsonify({'error': 'Jenkins configuration not found'}), 400
+        try:
+            controllers = user_controllers(current_user)
+        except Exception as token_err:
+            app.logger.error(f"Error getting Jenkins token: {token_err}")
+            return jsonify({'error': 'Could not retrieve Jenkins authentication token'}), 401
+
+        folder = request.args.get('folder', '').strip('/')
+        source = request.args.get('source')
+        try:
+            offset = max(0, int(request.args.get('offset', 0)))
+            limit = min(max(1, int(request.args.get('limit', JOB_FOLDER_PAGE_SIZE))), JOB_FOLDER_MAX_PAGE_SIZE)
+        except ValueError:
+            return jsonify({'error': 'offset and limit must be integers'}), 400
+
+        # Several registered controllers: the root lists the controllers themselves
+        federated = len(controllers) > 1
+        if federated and not source:
+            return jsonify(controller_folders(controllers))
+
+        controller = controller_for_url(controllers, normalize_jenkins_url(source) + '/' if source else None)
+        force_refresh = request.args.get('refresh', '').lower() in ('1', 'true')
+        payload, status = job_folder_payload(
+            current_user.id, controller.jenkins_url, controller.username, controller.api_token,
+            folder, offset, limit, force_refresh
+        )
+        if federated and status == 200:
+            payload['source'] = controller.jenkins_url
+            payload['jobs'] = [dict(job, source=controller.jenkins_url) for job in payload['jobs']]
+        return jsonify(payload), status
+
+    except Exception as e:
+        app.logger.error(f"Unexpected error in browse_jobs: {str(e)}")
+        return jsonify({'error': 'An unexpected error occurred browsing jobs', 'details': str(e)}), 500
+
+def warehouse_is_current(jenkins_url):
+    """True if a full warehouse sync of this controller finished within the sync interval."""
+    return fresh_sync_state(jenkins_url, app.config['BUILD_SYNC_INTERVAL']) is not None
+
+def visible_jobs(jenkins_url, auth):
+    """Buildable jobs of a controller that `auth` can read; raises when Jenkins refuses or fails."""
+    return visible_jobs_cache.get(
+        (credential_key(auth), normalize_jenkins_url(jenkins_url)),
+        lambda etag: (fetch_buildable_jobs(jenkins_url, auth), None)
+    ).value
+
+def stored_job_builds(jenkins_url, username, api_token, job_full_name, limit=100):
+    """
+    Return up to `limit` builds of a job from the warehouse, newest first, or None when the
+    caller's own credentials can't read the job from Jenkins; callers then ask Jenkins
+    directly, which reports the error. Builds the warehouse is missing are synced first.
+    """
+    auth = (username, api_token) if username and api_token else None
+    try:
+        return stored_builds(jenkins_url, auth, job_full_name, limit, app.config['BUILD_SYNC_MAX_HISTORY'])
+    except (requests.exceptions.RequestException, ValueError) as e:
+        app.logger.info(f"Not serving stored builds of {job_full_name}: {e}")
+        return None
+
+@app.route('/api/jobs/refresh', methods=['POST'])
+@login_required
+@csrf.exempt
+def refresh_jobs():
+    """Invalidate the cached job list so the next /api/jobs call reloads it from Jenkins."""
+    invalidate_job_list_cache(current_user.id)
+    return jsonify({'status': 'success'})
 
 @app.route('/api/builds', methods=['POST', 'GET'])
 @login_required
@@ -318,6 +749,11 @@ def get_builds():
                 app.logger.error(f"Error getting Jenkins token: {token_err}")
                 return jsonify({'error': 'Could not retrieve Jenkins authentication token'}), 401
             job_full_name = request.args.get('job_full_name')
+            # Jobs from a merged multi-controller list carry the controller they came from
+            if request.args.get('source'):
+                jenkins_url, username, api_token = controller_for_url(
+                    user_controllers(current_user), normalize_jenkins_url(request.args['source']) + '/'
+                )
         else:  # POST
             data = request.json
             jenkins_url = data.get('jenkins_url', '').rstrip('/')
@@ -328,6 +764,12 @@ def get_builds():
         if not all([jenkins_url, job_full_name]):
             return jsonify({'error': 'Missing required parameters: Jenkins URL, Job Full Name'}), 400
 
+        # The signed-in user's own controller is served from the local warehouse
+        if request.method == 'GET':
+            rows = stored_job_builds(jenkins_url, username, api_token, job_full_name)
+            if rows:
+                return jsonify({'builds': [row.to_dict() for row in rows], 'source': 'warehouse'})
+
         # Split the full name into parts (e.g., "Folder/Job" -> ["Folder", "Job"])
         path_parts = job_full_name.split('/')
         # Construct the URL segment with /job/ prepended to each part (e.g., "/job/Folder/job/Job/")
@@ -356,6 +798,96 @@ def get_builds():
         app.logger.error(f"Unexpected error in get_builds: {str(e)}")
         return jsonify({'error': 'An unexpected error occurred fetching build data', 'details': str(e)}), 500
 
+# Fields requested for each build in paginated history
+BUILD_HISTORY_FIELDS = 'number,url,timestamp,result,duration'
+BUILD_HISTORY_MAX_LIMIT = 200
+
+def encode_build_cursor(offset, last_number):
+    """Encode the position after a page of builds as an opaque cursor string."""
+    raw = json.dumps({'o': offset, 'n': last_number}).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii')
+
+def decode_build_cursor(cursor):
+    """Decode a cursor into (offset, last_build_number); raises ValueError if malformed."""
+    if not cursor:
+        return 0, None
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        return int(data['o']), int(data['n'])
+    except Exception:
+        raise ValueError('Invalid cursor')
+
+@app.route('/api/builds/history', methods=['GET'])
+@login_required
+@csrf.exempt
+def get_build_history():
+    """
+    API endpoint returning one fixed-size page of a job's build history, newest first.
+
+    Uses Jenkins allBuilds{start,end} range queries so history beyond the 100 builds
+    exposed by `builds` is reachable. Pass the returned next_cursor to get the next page.
+    """
+    try:
+        jenkins_url = current_user.jenkins_url.rstrip('/') if current_user.jenkins_url else None
+        job_full_name = request.args.get('job_full_name')
+        if not all([jenkins_url, job_full_name]):
+            return jsonify({'error': 'Missing required parameters: Jenkins URL, Job Full Name'}), 400
+
+        try:
+            limit = min(max(int(request.args.get('limit', 50)), 1), BUILD_HISTORY_MAX_LIMIT)
+            offset, last_number = decode_build_cursor(request.args.get('cursor'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+        try:
+            api_token = current_user.get_jenkins_token()
+        except Exception as token_err:
+            app.logger.error(f"Error getting Jenkins token: {token_err}")
+            return jsonify({'error': 'Could not retrieve Jenkins authentication token'}), 401
+        username = current_user.jenkins_username
+        # Jobs from a merged multi-controller list carry the controller they came from
+        if request.args.get('source'):
+            jenkins_url, username, api_token = controller_for_url(
+                user_controllers(current_user), normalize_jenkins_url(request.args['source']) + '/'
+            )
+
+        job_path_segment = JOB_API_PATH_SEPARATOR + JOB_API_PATH_SEPARATOR.join(quote(part) for part in job_full_name.split('/')) + '/'
+
+        builds = []
+        exhausted = False
+        # New builds shift indexes between page requests; skip anything at or above the
+        # last build number already returned and keep reading until the page is full.
+        for _ in range(5):
+            if len(builds) >= limit:
+                break
+            requested = limit - len(builds)
+            end = offset + requested
+            api_url = f"{jenkins_url}{job_path_segment}api/json?tree=allBuilds[{BUILD_HISTORY_FIELDS}]{{{offset},{end}}}"
+            api_data, error_response = get_jenkins_api_data(api_url, username, api_token)
+            if error_response:
+                return error_response
+
+            batch = (api_data or {}).get('allBuilds', [])
+            offset += len(batch)
+            builds.extend(b for b in batch if last_number is None or int(b.get('number', 0)) < last_number)
+            if len(batch) < requested:
+                exhausted = True
+                break
+
+        # Not at the end of the job's builds: hand back a cursor even when every build scanned
+        # this time was already returned, so the client carries on from the advanced offset
+        next_cursor = None
+        if not exhausted:
+            if builds:
+                last_number = int(builds[-1].get('number', 0))
+            next_cursor = encode_build_cursor(offset, last_number)
+
+        return jsonify({'builds': builds, 'next_cursor': next_cursor})
+
+    except Exception as e:
+        app.logger.error(f"Unexpected error in get_build_history: {str(e)}")
+        return jsonify({'error': 'An unexpected error occurred fetching build history', 'details': str(e)}), 500
+
 @app.route('/api/job_kpis', methods=['POST'])
 @login_required
 def get_job_kpis():
@@ -385,28 +917,28 @@ def get_job_kpis():
                 'error': f'Error retrieving Jenkins token: {str(e)}'
             }), 500
 
-        # Construct Jenkins API URL
         jenkins_url = current_user.jenkins_url.rstrip('/')
-        api_url = f"{jenkins_url}/job/{job_name}/api/json"
-        
-        # Make request to Jenkins API
-        try:
-            response = requests.get(
-                api_url,
-                auth=(current_user.jenkins_username, jenkins_token),
-                verify=False  # Skip SSL verification for development
-            )
-            response.raise_for_status()
-        except requests.exceptions.RequestException as e:
-            return jsonify({
-                'status': 'error',
-                'error': f'Error connecting to Jenkins: {str(e)}'
-            }), 500
+        rows = stored_job_builds(jenkins_url, current_user.jenkins_username, jenkins_token, job_name)
+
+        if rows:
+            # Calculate KPIs from the warehouse (same 100-build window Jenkins' builds[] gives)
+            builds = [{'result': row.result, 'duration': row.duration} for row in rows]
+        else:
+            # Nothing stored yet; fall back to asking Jenkins directly
+            api_url = f"{jenkins_url}/job/{job_name}/api/json"
+            try:
+                job_data = JenkinsClient.get_json(
+                    api_url,
+                    auth=(current_user.jenkins_username, jenkins_token)
+                )
+            except requests.exceptions.RequestException as e:
+                return jsonify({
+                    'status': 'error',
+                    'error': f'Error connecting to Jenkins: {str(e)}'
+                }), 500
+            builds = job_data.get('builds', [])
 
-        job_data = response.json()
-        
         # Calculate KPIs
-        builds = job_data.get('builds', [])
         total_builds = len(builds)
         successful_builds = sum(1 for build in builds if build.get('result') == 'SUCCESS')
         failed_builds = sum(1 for build in builds if build.get('result') == 'FAILURE')
@@ -436,6 +968,23 @@ def get_job_kpis():
             'error': f'An unexpected error occurred: {str(e)}'
         }), 500
 
+def stream_log_text(record):
+    """Stream a stored console log as plain text in bounded chunks."""
+    response = Response(log_store.iter_bytes(record), content_type='text/plain; charset=utf-8')
+    response.headers['Content-Length'] = str(record.size)
+    return response
+
+def stream_log_json(record, field, extra=None):
+    """Stream {**extra, field: <log text>} as JSON without loading the whole log into memory."""
+    def generate():
+        # Open the object with the small fields, then emit the log as one JSON string piecewise
+        prefix = json.dumps(extra or {})[:-1]
+        yield prefix + (', ' if extra else '') + json.dumps(field) + ': "'
+        for text in log_store.iter_text(record):
+            yield json.dumps(text)[1:-1]
+        yield '"}'
+    return Response(generate(), mimetype=APPLICATION_JSON)
+
 def extract_log_error_message(response):
     """Extract a meaningful error message from Jenkins API error responses."""
     error_message = f"Jenkins API error: {response.status_code}"
@@ -475,25 +1024,21 @@ def get_log():
         app.logger.error("Missing data for log request: build_url=%s", build_url)
         return jsonify({'error': 'Missing Jenkins URL or build URL'}), 400
 
-    # Construct the URL for the console text API endpoint
-    log_api_url = urljoin(build_url, 'consoleText') 
-    app.logger.info(f"Attempting to fetch log from: {log_api_url}")
+    app.logger.info(f"Attempting to fetch log for build: {build_url}")
 
     try:
-        response = requests.get(
-            log_api_url,
+        record = log_store.sync(
+            build_url,
             # Always get a fresh token to avoid InvalidToken errors
-        auth=(current_user.jenkins_username, current_user.get_jenkins_token()),
-            timeout=30,
-            verify=False  # Disable SSL verification for Jenkins API requests
+            auth=(current_user.jenkins_username, current_user.get_jenkins_token()),
+            timeout=30
         )
-        response.raise_for_status() # Raise HTTPError for bad responses (4xx or 5xx)
 
-        log_content = response.text
-        app.logger.info(f"Successfully fetched log for build URL: {build_url} (Content length: {len(log_content)})")
-        return jsonify({'log_content': log_content})
+        app.logger.info(f"Successfully fetched log for build URL: {build_url} (Content length: {record.size})")
+        return stream_log_json(record, 'log_content')
         
     except requests.exceptions.HTTPError as http_err:
+        response = http_err.response
         app.logger.error(f"HTTP error occurred while fetching log: {http_err} - Status: {response.status_code}")
         error_message = extract_log_error_message(response)
         return jsonify({'error': error_message}), response.status_code
@@ -521,7 +1066,7 @@ def get_logs():
 
     # Construct the console log URL using the job's full path
     job_path = JOB_API_PATH_SEPARATOR + JOB_API_PATH_SEPARATOR.join(quote(part) for part in job_full_name.split('/'))
-    log_url = f"{jenkins_url}{job_path}/{build_number}/consoleText"
+    build_url = f"{jenkins_url}{job_path}/{build_number}/"
 
     # Always get a fresh token to avoid cryptography.fernet.InvalidToken errors
     jenkins_token = current_user.get_jenkins_token()
@@ -529,21 +1074,15 @@ def get_logs():
     auth = (current_user.jenkins_username, jenkins_token)
 
     try:
-        # Use a session for potential keep-alive benefits
-        session = requests.Session()
-        if auth:
-            session.auth = auth
-
-        # Make the request for console log text
-        response = session.get(log_url, timeout=60, verify=False) # Longer timeout for logs
-        response.raise_for_status() # Raise HTTPError for bad responses (4xx or 5xx)
+        # Fetch only the part of the log we don't have yet
+        record = log_store.sync(build_url, auth=auth, timeout=60) # Longer timeout for logs
 
-        # Return the raw text content with the original content type
+        # Stream the raw text content
         # Important: Do NOT set Access-Control-Allow-Origin here; Flask handles it if configured
-        return response.text
+        return stream_log_text(record)
 
     except requests.exceptions.RequestException as e:
-        error_message, status_code = format_request_error(e, log_url)
+        error_message, status_code = format_request_error(e, build_url)
         return jsonify({'error': error_message}), status_code
     except Exception as e:
         app.logger.error(f"Unexpected error fetching logs: {e}")
@@ -601,22 +1140,21 @@ def proxy_log():
         app.logger.error(f"AttributeError checking Jenkins config for user {current_user.id}: {e}")
         return jsonify({'error': 'Internal configuration error (AttributeError)'}), 500
 
-    log_url = f"{build_url.rstrip('/')}/consoleText"
-    jenkins_user = current_user.jenkins_username # Use direct attribute access like /api/builds
-    jenkins_token = current_user.get_jenkins_token() # Assuming method exists
+    # Credentials of whichever registered controller the build belongs to
+    controller = controller_for_url(user_controllers(current_user), build_url)
+    jenkins_user = controller.username
+    jenkins_token = controller.api_token
 
     try:
-        response = requests.get(
-            log_url,
+        record = log_store.sync(
+            build_url,
             auth=(jenkins_user, jenkins_token) if jenkins_user and jenkins_token else None,
-            timeout=30, # Add a timeout
-            verify=False  # Disable SSL verification for Jenkins API requests
+            timeout=30 # Add a timeout
         )
-        response.raise_for_status() # Raise HTTPError for bad responses (4xx or 5xx)
 
-        # Return the raw text content with the original content type
+        # Stream the raw text content
         # Important: Do NOT set Access-Control-Allow-Origin here; Flask handles it if configured
-        return Response(response.content, content_type=response.headers.get('Content-Type'))
+        return stream_log_text(record)
 
     except requests.exceptions.RequestException as e:
         error_message = f'Error fetching log from Jenkins: {e}'
@@ -695,38 +1233,31 @@ def get_jenkins_timeline(job_name, build_number):
             app.logger.info(f"Timeline API - No auth for public job, attempting anonymous access")
     
         try:
-            # Build the Jenkins API URL for console output
+            # Build the Jenkins URL of the build whose console output we need
             job_path = job_name.replace('/', '/job/')
-            jenkins_api_url = f"{jenkins_url}job/{job_path}/{build_number}/consoleText"
+            build_url = f"{jenkins_url}job/{job_path}/{build_number}/"
             
             # Add detailed debug logging for the URL being accessed
-            app.logger.info(f"Timeline API - Fetching timeline data from: {jenkins_api_url}")
-            
-            # Make request to Jenkins
-            app.logger.info(f"Timeline API - Sending request to Jenkins with auth: {auth is not None}")
-            response = requests.get(
-                jenkins_api_url,
-                auth=auth,
-                timeout=10,
-                verify=False  # Disable SSL verification for Jenkins API requests
-            )
-            
-            app.logger.info(f"Timeline API - Received response with status: {response.status_code}")
+            app.logger.info(f"Timeline API - Fetching timeline data for: {build_url}")
             
-            if response.status_code != 200:
-                error_msg = f"Jenkins API returned status {response.status_code}"
+            # Make request to Jenkins (or serve the stored copy of a finished build)
+            app.logger.info(f"Timeline API - Syncing log from Jenkins with auth: {auth is not None}")
+            try:
+                record = log_store.sync(build_url, auth=auth, timeout=10)
+            except requests.exceptions.HTTPError as http_err:
+                status_code = http_err.response.status_code
+                error_msg = f"Jenkins API returned status {status_code}"
                 app.logger.error(error_msg)
                 
-                if response.status_code == 404:
+                if status_code == 404:
                     return jsonify({"error": "Build log not found"}), 404
-                elif response.status_code == 401:
+                elif status_code == 401:
                     return jsonify({"error": "Authentication failed"}), 401
                 else:
-                    return jsonify({"error": error_msg}), response.status_code
+                    return jsonify({"error": error_msg}), status_code
                     
-            # Return the raw log text for client-side parsing
-            return jsonify({
-                "log_text": response.text,  # Keep consistent with client expectations
+            # Stream the raw log text for client-side parsing
+            return stream_log_json(record, "log_text", {  # Keep consistent with client expectations
                 "job_name": job_name,
                 "build_number": build_number,
                 "status": "success"  # Add status for error checking
@@ -917,16 +1448,12 @@ def suggest_stage_name():
     log_snippet = data['log_snippet']
     
     try:
-        # First try using our local analyzer
-        global log_analyzer_engine
-        if log_analyzer_engine is None:
-            log_analyzer_engine = LogAnalyzerEngine()
-            
-        # Identify stages from the log snippet
-        stages = log_analyzer_engine._identify_stages(log_snippet)
-        if stages and len(stages) > 0:
+        # First try the local stage detector, with learned patterns if the engine is loaded
+        detector = log_analyzer_engine.stage_detector if log_analyzer_engine else default_stage_detector
+        stages = detector.detect(log_snippet)
+        if stages:
             # Return the first identified stage name
-            return jsonify({"suggested_name": stages[0]})
+            return jsonify({"suggested_name": stages[0].name})
             
         # Fall back to Ollama if needed
         client, error_message = get_ollama_client()
@@ -1042,20 +1569,21 @@ def proxy_jenkins_static(resource_path):
             
         # Get authentication info
         auth = None
-        if current_user.jenkins_username and hasattr(current_user, 'get_decrypted_jenkins_token'):
-            token = current_user.get_decrypted_jenkins_token()
-            if token:
-                auth = (current_user.jenkins_username, token)
+        token = current_user.get_jenkins_token()
+        if current_user.jenkins_username and token:
+            auth = (current_user.jenkins_username, token)
                 
         # Forward the request to Jenkins
-        response = requests.get(
+        response = JenkinsClient.get(
             target_url, 
             auth=auth, 
             stream=True, 
             timeout=10,
-            verify=False,
             allow_redirects=True
         )
+        if response.status_code != 200:
+            # The body isn't used; release the streamed connection right away
+            response.close()
         
         # Handle different status codes
         if response.status_code == 200:
@@ -1075,12 +1603,13 @@ def proxy_jenkins_static(resource_path):
                 elif resource_path.endswith('.jpg') or resource_path.endswith('.jpeg'):
                     content_type = 'image/jpeg'
                 
-            # Return the proxied response
+            # Return the proxied response; the upstream connection is closed once it has been sent
             flask_response = Response(
                 response.iter_content(chunk_size=4096),
                 status=response.status_code,
                 content_type=content_type
             )
+            flask_response.call_on_close(response.close)
             
             # Forward any response headers that might be needed
             for header in ['Cache-Control', 'ETag', 'Last-Modified']:
@@ -1102,12 +1631,11 @@ def proxy_jenkins_static(resource_path):
                 # Try each alternative URL
                 for alt_url in alternative_urls:
                     try:
-                        alt_response = requests.get(
+                        alt_response = JenkinsClient.get(
                             alt_url, 
                             auth=auth, 
                             stream=True, 
                             timeout=5,
-                            verify=False,
                             allow_redirects=True
                         )
                         
@@ -1118,6 +1646,7 @@ def proxy_jenkins_static(resource_path):
                                 status=alt_response.status_code,
                                 content_type='text/css'
                             )
+                            flask_response.call_on_close(alt_response.close)
                             
                             # Forward important headers
                             for header in ['Cache-Control', 'ETag', 'Last-Modified']:
@@ -1125,6 +1654,7 @@ def proxy_jenkins_static(resource_path):
                                     flask_response.headers[header] = alt_response.headers[header]
                                     
                             return flask_response
+                        alt_response.close()
                     except Exception:
                         continue
             
@@ -1189,22 +1719,59 @@ def settings():
     return render_template('settings.html', form=form)
 
 # Add back the config handling functions that were accidentally removed
+CONFIG_PATH = 'config.json'
+CONFIG_RECHECK_SECONDS = 1.0  # How often to stat config.json for changes made by other processes
+
+# Parsed config.json shared by all requests in this process, keyed by the file's (mtime, size)
+_config_cache = {'stamp': None, 'config': None, 'checked_at': 0.0}
+_config_lock = threading.Lock()
+
+def _config_file_stamp():
+    """Return (mtime_ns, size) of config.json, or None if it doesn't exist."""
+    try:
+        stat = os.stat(CONFIG_PATH)
+        return (stat.st_mtime_ns, stat.st_size)
+    except FileNotFoundError:
+        return None
+
 def load_config():
-    """Loads configuration from config.json."""
+    """Loads configuration from config.json, re-reading it only when the file has changed."""
+    now = time.monotonic()
+    with _config_lock:
+        cached = _config_cache['config']
+        if cached is not None and now - _config_cache['checked_at'] < CONFIG_RECHECK_SECONDS:
+            return dict(cached)
+
+    stamp = _config_file_stamp()
+    with _config_lock:
+        if _config_cache['config'] is not None and _config_cache['stamp'] == stamp:
+            _config_cache['checked_at'] = now
+            return dict(_config_cache['config'])
+
     try:
-        with open('config.json', 'r') as f:
-            return json.load(f)
+        with open(CONFIG_PATH, 'r') as f:
+            config = json.load(f)
     except FileNotFoundError:
-        return {"ANTHROPIC_API_KEY": "", "OLLAMA_API_KEY": ""}
+        config = {"ANTHROPIC_API_KEY": "", "OLLAMA_API_KEY": ""}
     except json.JSONDecodeError:
         print("Error decoding config.json. Returning default config.")
-        return {"ANTHROPIC_API_KEY": "", "OLLAMA_API_KEY": ""}
+        config = {"ANTHROPIC_API_KEY": "", "OLLAMA_API_KEY": ""}
+
+    with _config_lock:
+        _config_cache.update(stamp=stamp, config=config, checked_at=now)
+    # Callers get their own copy so edits (e.g. in settings()) can't leak into the cache
+    return dict(config)
 
 def save_config(config):
-    """Saves configuration to config.json."""
+    """Saves configuration to config.json and updates the in-memory copy."""
+    tmp_path = f"{CONFIG_PATH}.{os.getpid()}.tmp"
     try:
-        with open('config.json', 'w') as f:
-            json.dump(config, f, indent=4)
+        with _config_lock:
+            # Write-then-rename so concurrent readers never see a partially written file
+            with open(tmp_path, 'w') as f:
+                json.dump(config, f, indent=4)
+            os.replace(tmp_path, CONFIG_PATH)
+            _config_cache.update(stamp=_config_file_stamp(), config=dict(config), checked_at=time.monotonic())
     except IOError as e:
         print(f"Error saving config to config.json: {e}")
 
@@ -1239,7 +1806,223 @@ def get_jenkins_url():
     return jenkins_url
 
 
+def recent_builds_payload(jenkins_url, auth):
+    """
+    Builds of the last 24 hours on a controller as (payload, status_code), newest first.
+    Served from the snapshot or warehouse when current, otherwise collected live.
+    """
+    # Serve the precomputed snapshot when the poller keeps this controller up to date
+    snapshot = latest_snapshot(jenkins_url, auth)
+    if snapshot:
+        return {
+            'builds': snapshot['recent_builds'],
+            'source': 'snapshot',
+            'snapshot_age': snapshot['age']
+        }, 200
+
+    # Serve from the warehouse when a background sync has covered this controller recently,
+    # limited to the jobs the caller's own credentials can see
+    jobs = None
+    if warehouse_is_current(jenkins_url):
+        try:
+            jobs = visible_jobs(jenkins_url, auth)
+        except (requests.exceptions.RequestException, ValueError) as e:
+            app.logger.info(f"Not serving stored recent builds for {jenkins_url}: {e}")
+    if jobs is not None:
+        visible = {job.get('fullName') for job in jobs}
+        one_day_ago = int(time.time() * 1000) - (24 * 60 * 60 * 1000)
+        rows = Build.query.filter(
+            Build.jenkins_url == normalize_jenkins_url(jenkins_url),
+            Build.timestamp >= one_day_ago
+        ).order_by(Build.timestamp.desc()).all()
+        return {
+            'builds': [{
+                'job_name': row.job_name,
+                'job_url': row.url.rstrip('/').rsplit('/', 1)[0] + '/' if row.url else '#',
+                'build_number': row.number,
+                'timestamp': row.timestamp,
+                'duration': row.duration,
+                'result': row.result
+            } for row in rows if row.job_name in visible],
+            'source': 'warehouse'
+        }, 200
+
+    # Walk folders and multibranch projects concurrently; result is newest first
+    collector = RecentBuildCollector(jenkins_url, auth=auth, max_workers=app.config['RECENT_BUILDS_WORKERS'])
+
+    def load_recent_builds():
+        one_day_ago = int(time.time() * 1000) - (24 * 60 * 60 * 1000)  # 24 hours in milliseconds
+        return collector.collect(one_day_ago)
+
+    try:
+        cache_key = ('recent_builds', normalize_jenkins_url(jenkins_url), credential_key(auth))
+        entry, error = last_good_cache.get(cache_key, load_recent_builds)
+    except requests.exceptions.RequestException as e:
+        # Nothing good to fall back on; report the outage rather than inventing builds
+        error_message, status_code = describe_jenkins_error(e, jenkins_url)
+        return {'builds': [], 'source': 'jenkins', 'error': error_message}, status_code
+
+    if error is not None:
+        app.logger.warning(f"Serving stale recent builds for {jenkins_url}: {error}")
+    return dict({'builds': entry.value, 'source': 'jenkins'}, **stale_fields(entry, error)), 200
+
+def overview_payload(jenkins_url, username, jenkins_token):
+    """Job counts and the latest builds of a controller, from the snapshot, warehouse or Jenkins."""
+    jenkins_url = jenkins_url.rstrip('/')
+
+    auth = (username, jenkins_token)
+
+    # Serve the precomputed snapshot when the poller keeps this controller up to date
+    snapshot = latest_snapshot(jenkins_url, auth)
+    if snapshot:
+        return dict(
+            snapshot['overview'],
+            status='success',
+            source='snapshot',
+            snapshot_age=snapshot['age']
+        )
+
+    # Construct the Jenkins API URL; folders are walked so counts match the snapshot and warehouse
+    api_url = f"{jenkins_url}/api/json?tree={OVERVIEW_JOB_TREE}"
+
+    # Serve counts and latest builds from the warehouse when it was synced recently,
+    # limited to the jobs the caller's own credentials can see
+    jobs = None
+    sync_state = fresh_sync_state(jenkins_url, app.config['BUILD_SYNC_INTERVAL'])
+    if sync_state:
+        try:
+            jobs = visible_jobs(jenkins_url, auth)
+        except (requests.exceptions.RequestException, ValueError) as e:
+            app.logger.info(f"Not serving the stored overview for {jenkins_url}: {e}")
+    if jobs is not None:
+        visible = {job.get('fullName') for job in jobs}
+        recent_builds = []
+        seen_jobs = set()
+        # Latest build per job, newest first, like the lastBuild-based live query
+        for row in Build.query.filter_by(jenkins_url=sync_state.jenkins_url).order_by(Build.timestamp.desc()).yield_per(200):
+            if row.job_name in seen_jobs or row.job_name not in visible:
+                continue
+            seen_jobs.add(row.job_name)
+            recent_builds.append({
+                'job_name': row.job_name,
+                'build_number': row.number,
+                'status': row.result or 'UNKNOWN',
+                'timestamp': row.timestamp or 0
+            })
+            if len(recent_builds) == 5:
+                break
+        return dict(
+            job_counts(jobs),
+            recent_builds=recent_builds,
+            status='success',
+            source='warehouse'
+        )
+
+    def load_overview():
+        jenkins_data = JenkinsClient.get_json(api_url, auth=auth, timeout=10)
+        # Process jobs data into counts and the latest builds
+        return summarize_overview(jenkins_data.get('jobs', []))
+
+    try:
+        entry, error = last_good_cache.get(('overview', jenkins_url, credential_key(auth)), load_overview)
+    except requests.exceptions.RequestException as e:
+        app.logger.error(f"Jenkins API request failed: {e}")
+        return {
+            'error': f"Jenkins is not reachable: {e}",
+            'status': 'error'
+        }
+
+    if error is not None:
+        app.logger.warning(f"Serving stale overview for {jenkins_url}: {error}")
+    return dict(entry.value, status='success', **stale_fields(entry, error))
+
+def mark_payload_errors(sections):
+    """
+    Treat answered sections whose payload reports an error (and isn't stale data) as failed;
+    a failure that used up the controller's whole time budget counts as a timeout.
+    """
+    timeout = app.config['FEDERATION_TIMEOUT']
+    for section in sections:
+        data = section.get('data')
+        if section['status'] == 'ok' and isinstance(data, dict) and data.get('error') and not data.get('stale'):
+            status = 'timeout' if section['elapsed'] >= timeout else 'error'
+            section.update(status=status, error=data['error'])
+            del section['data']
+    return sections
+
+def federated_jobs(user_id, controllers, force=False):
+    """Job lists of all controllers merged into one, each job tagged with its controller."""
+    sections = mark_payload_errors(fan_out(
+        controllers,
+        lambda c: job_list_payload(user_id, c.jenkins_url, c.username, c.api_token, force)[0],
+        app.config['FEDERATION_TIMEOUT']
+    ))
+    jobs = [
+        dict(job, source=section['source'])
+        for section in sections if section['status'] == 'ok'
+        for job in section['data']['jobs']
+    ]
+    jobs.sort(key=lambda job: ((job.get('fullName') or '').lower(), job['source']))
+    return {'jobs': jobs, 'controllers': section_summary(sections)}
+
+def federated_overview(controllers):
+    """Overview counts summed across controllers, with the 5 latest builds among all of them."""
+    sections = mark_payload_errors(fan_out(
+        controllers,
+        lambda c: run_in_app_context(overview_payload, c.jenkins_url, c.username, c.api_token),
+        app.config['FEDERATION_TIMEOUT']
+    ))
+    answered = [section for section in sections if section['status'] == 'ok']
+    if not answered:
+        return {
+            'error': 'None of the configured Jenkins controllers responded',
+            'status': 'error',
+            'controllers': section_summary(sections)
+        }
+
+    recent_builds = heapq.nlargest(
+        5,
+        (dict(build, source=section['source']) for section in answered for build in section['data']['recent_builds']),
+        key=lambda build: build.get('timestamp', 0)
+    )
+    overview = {
+        'total_jobs': sum(section['data']['total_jobs'] for section in answered),
+        'running_jobs': sum(section['data']['running_jobs'] for section in answered),
+        'failed_jobs': sum(section['data']['failed_jobs'] for section in answered),
+        'recent_builds': recent_builds,
+        'status': 'success',
+        'source': 'federated',
+        'partial': len(answered) < len(sections),
+        'controllers': section_summary(sections)
+    }
+    if any(section['data'].get('stale') for section in answered):
+        overview['stale'] = True
+        overview['age'] = max(section['data'].get('age', 0) for section in answered)
+    return overview
+
+def federated_recent_builds(controllers):
+    """Recent builds of all controllers merged newest first, each tagged with its controller."""
+    sections = mark_payload_errors(fan_out(
+        controllers,
+        lambda c: run_in_app_context(recent_builds_payload, c.jenkins_url, (c.username, c.api_token))[0],
+        app.config['FEDERATION_TIMEOUT']
+    ))
+    answered = [section for section in sections if section['status'] == 'ok']
+    # Each controller's list is already newest first
+    builds = heapq.merge(
+        *([dict(build, source=section['source']) for build in section['data']['builds']] for section in answered),
+        key=lambda build: build.get('timestamp', 0),
+        reverse=True
+    )
+    return {
+        'builds': list(builds),
+        'source': 'federated',
+        'partial': len(answered) < len(sections),
+        'controllers': section_summary(sections)
+    }
+
 @app.route('/api/jenkins/recent_builds')
+@login_required
 def get_jenkins_recent_builds():
     """Get the Jenkins recent builds data for execution time visualization"""
     try:
@@ -1277,77 +2060,22 @@ def get_jenkins_recent_builds():
                 'source': 'mock'
             })
         
+        # Users with several registered controllers get one merged, source-tagged list
+        if current_user.is_authenticated:
+            controllers = user_controllers(current_user)
+            if len(controllers) > 1:
+                return jsonify(federated_recent_builds(controllers))
+
         # For publicly accessible Jenkins, no auth needed
         # For private Jenkins, use the configured auth
         auth = None
         if request.cookies.get('jenkins_username') and request.cookies.get('jenkins_api_token'):
             auth = (request.cookies.get('jenkins_username'), request.cookies.get('jenkins_api_token'))
+        elif current_user.is_authenticated and current_user.is_jenkins_configured():
+            auth = (current_user.jenkins_username, current_user.get_jenkins_token())
         
-        try:
-            # Make a request to Jenkins API to get all jobs
-            jenkins_api_url = f"{jenkins_url}/api/json?tree=jobs[name,url,builds[number,timestamp,duration,result]]"
-            response = requests.get(jenkins_api_url, auth=auth, timeout=10, verify=False)
-            response.raise_for_status()
-            
-            jenkins_data = response.json()
-            
-            # Filter to get only jobs with builds in the last 24 hours
-            current_time = int(time.time() * 1000)  # Convert to milliseconds
-            one_day_ago = current_time - (24 * 60 * 60 * 1000)  # 24 hours in milliseconds
-            
-            recent_builds = []
-            
-            # Process all jobs
-            for job in jenkins_data.get('jobs', []):
-                job_name = job.get('name')
-                job_url = job.get('url')
-                
-                # Get builds for this job
-                for build in job.get('builds', []):
-                    # Only include builds from the last 24 hours
-                    build_timestamp = build.get('timestamp', 0)
-                    if build_timestamp >= one_day_ago:
-                        recent_builds.append({
-                            'job_name': job_name,
-                            'job_url': job_url,
-                            'build_number': build.get('number'),
-                            'timestamp': build_timestamp,
-                            'duration': build.get('duration'),
-                            'result': build.get('result')
-                        })
-            
-            # Sort by timestamp (newest first)
-            recent_builds.sort(key=lambda x: x.get('timestamp', 0), reverse=True)
-            
-            return jsonify({
-                'builds': recent_builds,
-                'source': 'jenkins'
-            })
-        except requests.exceptions.RequestException as e:
-            app.logger.error(f"Jenkins API error: {str(e)}")
-            
-            # Generate mock data as fallback
-            current_time_ms = int(time.time() * 1000)
-            hour_ms = 60 * 60 * 1000
-            
-            # Generate 5 mock builds over the last 24 hours
-            mock_builds = []
-            for i in range(5):
-                time_offset = i * (4 * hour_ms)
-                mock_builds.append({
-                    'job_name': 'sample-job',
-                    'job_url': '#',
-                    'build_number': 100 - i,
-                    'timestamp': current_time_ms - time_offset,
-                    'duration': 20000 + (i * 5000),
-                    'result': "SUCCESS" if i % 2 == 0 else "FAILURE"
-                })
-            
-            return jsonify({
-                'builds': mock_builds,
-                'source': 'mock',
-                'error': str(e)
-            })
+        payload, status_code = recent_builds_payload(jenkins_url, auth)
+        return jsonify(payload), status_code
     except Exception as e:
         app.logger.error(f"Unexpected error in get_jenkins_recent_builds: {str(e)}")
         return jsonify({"error": "An unexpected server error occurred"}), 500
@@ -1374,58 +2102,11 @@ def get_jenkins_overview():
                 'status': 'error'
             }), 200
 
-        # Construct the Jenkins API URL
-        jenkins_url = current_user.jenkins_url.rstrip('/')
-        api_url = f"{jenkins_url}/api/json?tree=jobs[name,url,color,lastBuild[number,timestamp,duration,result]]"
+        controllers = user_controllers(current_user)
+        if len(controllers) > 1:
+            return jsonify(federated_overview(controllers))
 
-        # Make request to Jenkins API
-        try:
-            response = requests.get(
-                api_url,
-                auth=(current_user.jenkins_username, jenkins_token),
-                timeout=10,
-                verify=False
-            )
-            response.raise_for_status()
-            jenkins_data = response.json()
-
-            # Process jobs data
-            jobs = jenkins_data.get('jobs', [])
-            total_jobs = len(jobs)
-            running_jobs = len([job for job in jobs if job.get('color', '').endswith('_anime')])
-            failed_jobs = len([job for job in jobs if job.get('color', '') in ['red', 'red_anime']])
-
-            # Get recent builds
-            recent_builds = []
-            for job in jobs:
-                last_build = job.get('lastBuild', {})
-                if last_build:
-                    recent_builds.append({
-                        'job_name': job.get('name', 'Unknown'),
-                        'build_number': last_build.get('number', 0),
-                        'status': last_build.get('result', 'UNKNOWN'),
-                        'timestamp': last_build.get('timestamp', 0)
-                    })
-
-            # Sort recent builds by timestamp (newest first) and limit to 5
-            recent_builds.sort(key=lambda x: x['timestamp'], reverse=True)
-            recent_builds = recent_builds[:5]
-
-            return jsonify({
-                'total_jobs': total_jobs,
-                'running_jobs': running_jobs,
-                'failed_jobs': failed_jobs,
-                'recent_builds': recent_builds,
-                'status': 'success'
-            })
-
-        except requests.exceptions.RequestException as e:
-            app.logger.error(f"Jenkins API request failed: {e}")
-            # Generate mock data as fallback
-            mock_data = generate_mock_overview_data()
-            mock_data['status'] = 'mock'
-            mock_data['error'] = str(e)
-            return jsonify(mock_data), 200
+        return jsonify(overview_payload(current_user.jenkins_url, current_user.jenkins_username, jenkins_token))
 
     except Exception as e:
         app.logger.error(f"Error in get_jenkins_overview: {e}")
@@ -1434,29 +2115,261 @@ def get_jenkins_overview():
             'status': 'error'
         }), 200
 
-def generate_mock_overview_data():
-    """Generate mock data for Jenkins overview"""
-    current_time = int(time.time() * 1000)
-    hour_ms = 60 * 60 * 1000
-    
-    # Generate mock recent builds
-    recent_builds = []
-    for i in range(5):
-        time_offset = i * (2 * hour_ms)
-        status = "SUCCESS" if i % 2 == 0 else ("FAILURE" if i % 3 == 0 else "UNSTABLE")
-        recent_builds.append({
-            'job_name': f'sample-job-{i+1}',
-            'build_number': 100 - i,
-            'status': status,
-            'timestamp': current_time - time_offset
+def capacity_controller():
+    """
+    (jenkins_url, auth) of the controller a capacity request is about: ?source= if it's one of
+    the user's, else the primary. Samples are only read back with the user's own credentials.
+    """
+    source = request.args.get('source')
+    controller = controller_for_url(user_controllers(current_user), normalize_jenkins_url(source) + '/' if source else None)
+    return controller.jenkins_url, (controller.username, controller.api_token)
+
+def downsample(points, max_points):
+    """Average consecutive points into at most `max_points` buckets; max_wait keeps the bucket's maximum."""
+    if len(points) <= max_points:
+        return points
+    size = -(-len(points) // max_points)  # Ceiling division
+    buckets = []
+    for i in range(0, len(points), size):
+        bucket = points[i:i + size]
+        busy = sum(p['busy'] for p in bucket) / len(bucket)
+        idle = sum(p['idle'] for p in bucket) / len(bucket)
+        buckets.append({
+            't': bucket[-1]['t'],
+            'busy': round(busy, 1),
+            'idle': round(idle, 1),
+            'utilization': round(busy / (busy + idle), 3) if busy + idle else None,
+            'queue_depth': round(sum(p['queue_depth'] for p in bucket) / len(bucket), 1),
+            'max_wait': max(p['max_wait'] for p in bucket)
         })
-    
-    return {
-        'total_jobs': 10,
-        'running_jobs': 2,
-        'failed_jobs': 1,
-        'recent_builds': recent_builds
-    }
+    return buckets
+
+@app.route('/api/capacity/utilization')
+@login_required
+def get_capacity_utilization():
+    """
+    Executor utilization over the last ?hours= (default 6), overall or for one ?label=,
+    with queue depth and longest wait per sample. Served from the capacity samples only.
+    """
+    try:
+        if not current_user.is_jenkins_configured():
+            return jsonify({'error': 'Jenkins configuration not found', 'status': 'not_configured'}), 400
+        try:
+            hours = min(float(request.args.get('hours', 6)), app.config['CAPACITY_RETENTION_HOURS'])
+        except ValueError:
+            return jsonify({'error': 'hours must be a number'}), 400
+        label = request.args.get('label')
+
+        jenkins_url, auth = capacity_controller()
+        samples = capacity_store.series(jenkins_url, auth, since=time.time() - hours * 60 * 60)
+        points = []
+        for sample in samples:
+            if label:
+                busy, idle = sample['labels'].get(label, (0, 0))
+            else:
+                busy, idle = sample['executors']['busy'], sample['executors']['idle']
+            points.append({
+                't': sample['t'],
+                'busy': busy,
+                'idle': idle,
+                'utilization': round(busy / (busy + idle), 3) if busy + idle else None,
+                'queue_depth': sample['queue']['depth'],
+                'max_wait': sample['queue']['max_wait']
+            })
+
+        return jsonify({
+            'status': 'success',
+            'jenkins_url': jenkins_url,
+            'label': label,
+            'interval': app.config['CAPACITY_INTERVAL'],
+            'labels': sorted(samples[-1]['labels']) if samples else [],
+            'points': downsample(points, CAPACITY_MAX_POINTS)
+        })
+
+    except Exception as e:
+        app.logger.error(f"Error in get_capacity_utilization: {e}")
+        return jsonify({'error': str(e), 'status': 'error'}), 500
+
+@app.route('/api/capacity/queue')
+@login_required
+def get_capacity_queue():
+    """
+    Current build queue (depth, wait times, longest-waiting items) and executor use per label,
+    from the latest capacity sample. Labels with no idle executor are listed as saturated.
+    """
+    try:
+        if not current_user.is_jenkins_configured():
+            return jsonify({'error': 'Jenkins configuration not found', 'status': 'not_configured'}), 400
+
+        jenkins_url, auth = capacity_controller()
+        sample = capacity_store.latest(jenkins_url, auth, max_age=app.config['CAPACITY_INTERVAL'] * 3)
+        if sample is None:
+            return jsonify({
+                'error': 'No recent capacity sample for this controller; is the capacity poller running?',
+                'status': 'no_data'
+            }), 503
+
+        labels = {
+            name: {'busy': busy, 'idle': idle, 'utilization': round(busy / (busy + idle), 3) if busy + idle else None}
+            for name, (busy, idle) in sample['labels'].items()
+        }
+        return jsonify({
+            'status': 'success',
+            'jenkins_url': jenkins_url,
+            'age': sample['age'],
+            'queue': sample['queue'],
+            'items': sample['queue_items'],
+            'executors': sample['executors'],
+            'labels': labels,
+            'saturated_labels': sorted(name for name, counts in labels.items() if counts['busy'] and not counts['idle'])
+        })
+
+    except Exception as e:
+        app.logger.error(f"Error in get_capacity_queue: {e}")
+        return jsonify({'error': str(e), 'status': 'error'}), 500
+
+def job_list_payload(user_id, jenkins_url, username, api_token, force=False):
+    """The user's flattened job list as (payload, status_code), served from the job list cache."""
+    try:
+        entry = job_list_cache.get(
+            (user_id, jenkins_url, username),
+            make_job_list_loader(jenkins_url, username, api_token),
+            force=force
+        )
+    except requests.exceptions.RequestException as e:
+        error_message, status_code = describe_jenkins_error(e, jenkins_url)
+        return {'error': error_message}, status_code
+    except ValueError as e:
+        return {'error': str(e)}, 500
+    return {'jobs': entry.value['jobs']}, 200
+
+def job_builds_payload(jenkins_url, username, api_token, job_full_name):
+    """
+    A job's builds, newest first, in the /api/builds response shape. Like /api/builds, Jenkins
+    is asked directly when the warehouse has nothing to serve; its errors propagate.
+    """
+    rows = stored_job_builds(jenkins_url, username, api_token, job_full_name)
+    if rows:
+        return {'job_full_name': job_full_name, 'builds': [row.to_dict() for row in rows], 'source': 'warehouse'}
+
+    auth = (username, api_token) if username and api_token else None
+    api_url = f"{jenkins_url.rstrip('/')}{job_api_path(job_full_name)}api/json?tree=builds[number,url,timestamp,result,duration]"
+    data = JenkinsClient.get_json(api_url, auth=auth, timeout=20)
+    builds = sorted(data.get('builds') or [], key=lambda x: int(x.get('number', 0)), reverse=True)
+    return {'job_full_name': job_full_name, 'builds': builds, 'source': 'jenkins'}
+
+def run_in_app_context(fn, *args):
+    """Run fn(*args) with its own app context, for worker threads that touch the database."""
+    with app.app_context():
+        return fn(*args)
+
+def compressed_json(payload):
+    """jsonify `payload`, gzip-compressing the body when the client accepts it."""
+    response = jsonify(payload)
+    response.vary.add('Accept-Encoding')
+    body = response.get_data()
+    if len(body) >= 1024 and 'gzip' in request.accept_encodings:
+        response.set_data(gzip.compress(body, compresslevel=6))
+        response.headers['Content-Encoding'] = 'gzip'
+    return response
+
+@app.route('/api/dashboard/bootstrap')
+@login_required
+def dashboard_bootstrap():
+    """
+    Everything the dashboard needs on load in one response: root level of the job tree, overview, recent builds
+    and the builds of the selected job (?job_full_name=, defaulting to the most recently built
+    job). Sections are gathered concurrently with one token decrypt, and each has the same
+    shape as the body of its standalone endpoint, so one failing section doesn't blank the rest.
+    """
+    try:
+        if not current_user.is_jenkins_configured():
+            return jsonify({
+                'error': 'Jenkins configuration not found',
+                'status': 'not_configured'
+            }), 200
+
+        try:
+            api_token = current_user.get_jenkins_token()
+        except Exception as e:
+            app.logger.error(f"Error getting Jenkins token: {e}")
+            return jsonify({
+                'error': 'Could not retrieve Jenkins authentication token',
+                'status': 'error'
+            }), 401
+
+        jenkins_url = current_user.jenkins_url.rstrip('/')
+        username = current_user.jenkins_username
+        user_id = current_user.id
+        controllers = user_controllers(current_user)
+        # Several registered controllers: jobs, overview and recent builds are merged views
+        federated = len(controllers) > 1
+        job_full_name = request.args.get('job_full_name')
+        job_source = request.args.get('source')
+
+        def submit(pool, fn, *args):
+            # Copy the request context so the request time budget applies in the workers
+            return pool.submit(contextvars.copy_context().run, run_in_app_context, fn, *args)
+
+        def section(future, name):
+            # A failed section is reported in place; the page falls back to its own endpoint
+            try:
+                return future.result()
+            except Exception as e:
+                app.logger.error(f"Dashboard bootstrap could not load {name}: {e}")
+                return {'error': str(e), 'status': 'error'}
+
+        def load_jobs():
+            # Only the root level; folders are expanded on demand through /api/jobs/browse
+            if federated:
+                return controller_folders(controllers)
+            return job_folder_payload(user_id, jenkins_url, username, api_token)[0]
+
+        def load_overview():
+            if federated:
+                return federated_overview(controllers)
+            return overview_payload(jenkins_url, username, api_token)
+
+        def load_recent_builds():
+            if federated:
+                return federated_recent_builds(controllers)
+            return recent_builds_payload(jenkins_url, (username, api_token))[0]
+
+        def load_job_builds(job_name, source):
+            controller = controller_for_url(controllers, f"{source}/" if source else None)
+            payload = job_builds_payload(controller.jenkins_url, controller.username, controller.api_token, job_name)
+            return dict(payload, source=controller.jenkins_url) if federated else payload
+
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            jobs_future = submit(pool, load_jobs)
+            overview_future = submit(pool, load_overview)
+            recent_future = submit(pool, load_recent_builds)
+            builds_future = None
+            if job_full_name:
+                builds_future = submit(pool, load_job_builds, job_full_name, job_source)
+
+            recent_builds = section(recent_future, 'recent builds')
+            if not job_full_name and recent_builds.get('builds'):
+                # Recent builds are newest first; preselect the job that built last
+                latest = recent_builds['builds'][0]
+                job_full_name = latest['job_name']
+                builds_future = submit(pool, load_job_builds, job_full_name, latest.get('source'))
+
+            jobs = section(jobs_future, 'jobs')
+            overview = section(overview_future, 'the overview')
+            builds = section(builds_future, 'job builds') if builds_future else {'job_full_name': None, 'builds': []}
+
+        return compressed_json({
+            'status': 'success',
+            'jobs': jobs,
+            'overview': overview,
+            'recent_builds': recent_builds,
+            'builds': builds
+        })
+
+    except Exception as e:
+        app.logger.error(f"Error in dashboard_bootstrap: {e}")
+        return jsonify({'error': str(e), 'status': 'error'}), 500
 
 @app.route('/test')
 @login_required
@@ -1472,6 +2385,7 @@ def health_check():
         return jsonify({
             'status': 'healthy',
             'database': 'connected',
+            'jenkins_circuits': JenkinsClient.circuit_states(),
             'timestamp': datetime.utcnow().isoformat()
         }), 200
     except Exception as e:
@@ -1481,6 +2395,84 @@ def health_check():
             'timestamp': datetime.utcnow().isoformat()
         }), 500
 
+# Job fields plus its latest build, so job details need a single Jenkins request
+JOB_DETAILS_TREE = ('name,url,description,color,healthReport[description,score,iconUrl],'
+                    'lastBuild[number,url,result,duration,timestamp]')
+JOB_BUNDLE_MAX_LOG_TAIL = 1024 * 1024
+
+def summarize_job_details(job_name, job_data, build_data):
+    """Shape a job's API data and one of its builds into the /api/job/<name> response."""
+    build_data = build_data or {}
+    return {
+        "jobName": job_name,
+        "buildNumber": build_data.get('number'),
+        "buildUrl": build_data.get('url'),
+        "buildStatus": build_data.get('result'),
+        "buildDuration": build_data.get('duration'),
+        "buildTimestamp": build_data.get('timestamp'),
+        "description": job_data.get('description', ''),
+        "url": job_data.get('url', ''),
+        "color": job_data.get('color', ''),
+        "healthReport": job_data.get('healthReport', [])
+    }
+
+def summarize_test_report(report):
+    """Counts and per-case details from a build's testReport API data."""
+    test_results = {
+        "total": report.get('totalCount', 0),
+        "passed": report.get('passCount', 0),
+        "failed": report.get('failCount', 0),
+        "skipped": report.get('skipCount', 0),
+        "details": []
+    }
+    
+    # Extract test details
+    for suite in report.get('suites', []):
+        for test in suite.get('cases', []):
+            test_results['details'].append({
+                "name": test.get('name', 'Unknown Test'),
+                "status": test.get('status', 'UNKNOWN'),
+                "duration": test.get('duration', 0),
+                "errorDetails": test.get('errorDetails', ''),
+                "errorStackTrace": test.get('errorStackTrace', '')
+            })
+    return test_results
+
+def build_timeline(build_data):
+    """Start, stage and completion events of a build for the job wizard timeline."""
+    # Extract timeline data
+    timeline = []
+
+    # Add build start
+    if 'timestamp' in build_data:
+        timeline.append({
+            "name": "Build Started",
+            "status": "STARTED",
+            "duration": 0,
+            "timestamp": build_data['timestamp']
+        })
+
+    # Add stages if available
+    if 'stages' in build_data:
+        for stage in build_data['stages']:
+            timeline.append({
+                "name": stage.get('name', 'Unknown Stage'),
+                "status": stage.get('status', 'UNKNOWN'),
+                "duration": stage.get('durationMillis', 0),
+                "timestamp": stage.get('startTimeMillis', 0)
+            })
+
+    # Add build end
+    if 'result' in build_data:
+        timeline.append({
+            "name": "Build Completed",
+            "status": build_data['result'],
+            "duration": 0,
+            "timestamp": build_data['timestamp'] + build_data.get('duration', 0)
+        })
+
+    return timeline
+
 @app.route('/api/job/<path:job_name>')
 @login_required
 @csrf.exempt
@@ -1499,35 +2491,15 @@ def get_job_details(job_name):
         if not jenkins_url:
             return jsonify({"error": "Jenkins URL not configured"}), 400
             
-        # Construct the API URL
-        api_url = f"{jenkins_url}/job/{job_name}/api/json"
+        # The job and its latest build in one request
+        api_url = f"{jenkins_url.rstrip('/')}{job_api_path(job_name)}api/json?tree={JOB_DETAILS_TREE}"
         
         # Get the job data
-        response = get_jenkins_api_data(api_url, username, api_token)
-        
-        # Get the latest build
-        latest_build = None
-        if 'lastBuild' in response and response['lastBuild']:
-            latest_build = response['lastBuild']['number']
-            
-        # Get build details if available
-        build_details = None
-        if latest_build:
-            build_api_url = f"{jenkins_url}/job/{job_name}/{latest_build}/api/json"
-            build_details = get_jenkins_api_data(build_api_url, username, api_token)
+        job_data, error_response = get_jenkins_api_data(api_url, username, api_token)
+        if error_response:
+            return error_response
             
-        return jsonify({
-            "jobName": job_name,
-            "buildNumber": latest_build,
-            "buildUrl": f"{jenkins_url}/job/{job_name}/{latest_build}" if latest_build else None,
-            "buildStatus": build_details.get('result') if build_details else None,
-            "buildDuration": build_details.get('duration') if build_details else None,
-            "buildTimestamp": build_details.get('timestamp') if build_details else None,
-            "description": response.get('description', ''),
-            "url": response.get('url', ''),
-            "color": response.get('color', ''),
-            "healthReport": response.get('healthReport', [])
-        })
+        return jsonify(summarize_job_details(job_name, job_data, job_data.get('lastBuild')))
     except Exception as e:
         app.logger.error(f"Error getting job details: {str(e)}")
         return jsonify({"error": str(e)}), 500
@@ -1551,33 +2523,14 @@ def get_test_results(job_name, build_number):
             return jsonify({"error": "Jenkins URL not configured"}), 400
             
         # Construct the API URL for test results
-        api_url = f"{jenkins_url}/job/{job_name}/{build_number}/testReport/api/json"
+        api_url = f"{jenkins_url.rstrip('/')}{job_api_path(job_name)}{build_number}/testReport/api/json"
         
         # Get the test data
-        response = get_jenkins_api_data(api_url, username, api_token)
-        
-        # Process test results
-        test_results = {
-            "total": response.get('totalCount', 0),
-            "passed": response.get('passCount', 0),
-            "failed": response.get('failCount', 0),
-            "skipped": response.get('skipCount', 0),
-            "details": []
-        }
-        
-        # Extract test details
-        if 'suites' in response:
-            for suite in response['suites']:
-                for test in suite.get('cases', []):
-                    test_results['details'].append({
-                        "name": test.get('name', 'Unknown Test'),
-                        "status": test.get('status', 'UNKNOWN'),
-                        "duration": test.get('duration', 0),
-                        "errorDetails": test.get('errorDetails', ''),
-                        "errorStackTrace": test.get('errorStackTrace', '')
-                    })
+        report, error_response = get_jenkins_api_data(api_url, username, api_token)
+        if error_response:
+            return error_response
         
-        return jsonify(test_results)
+        return jsonify(summarize_test_report(report))
     except Exception as e:
         app.logger.error(f"Error getting test results: {str(e)}")
         return jsonify({"error": str(e)}), 500
@@ -1600,19 +2553,15 @@ def get_build_logs(job_name, build_number):
         if not jenkins_url:
             return jsonify({"error": "Jenkins URL not configured"}), 400
             
-        # Construct the API URL for logs
-        log_url = f"{jenkins_url}/job/{job_name}/{build_number}/consoleText"
+        # Construct the URL of the build
+        build_url = f"{jenkins_url}/job/{job_name}/{build_number}/"
         
         # Get the log data
-        session = requests.Session()
-        if username and api_token:
-            session.auth = (username, api_token)
-            
-        response = session.get(log_url, timeout=30, verify=False)
-        response.raise_for_status()
+        auth = (username, api_token) if username and api_token else None
+        record = log_store.sync(build_url, auth=auth, timeout=30)
         
-        # Return the log content
-        return Response(response.text, mimetype='text/plain')
+        # Stream the log content
+        return stream_log_text(record)
     except Exception as e:
         app.logger.error(f"Error getting build logs: {str(e)}")
         return jsonify({"error": str(e)}), 500
@@ -1636,47 +2585,107 @@ def get_build_timeline(job_name, build_number):
             return jsonify({"error": "Jenkins URL not configured"}), 400
             
         # Construct the API URL for build info
-        api_url = f"{jenkins_url}/job/{job_name}/{build_number}/api/json"
+        api_url = f"{jenkins_url.rstrip('/')}{job_api_path(job_name)}{build_number}/api/json"
         
         # Get the build data
-        build_data = get_jenkins_api_data(api_url, username, api_token)
-        
-        # Extract timeline data
-        timeline = []
-        
-        # Add build start
-        if 'timestamp' in build_data:
-            timeline.append({
-                "name": "Build Started",
-                "status": "STARTED",
-                "duration": 0,
-                "timestamp": build_data['timestamp']
-            })
+        build_data, error_response = get_jenkins_api_data(api_url, username, api_token)
+        if error_response:
+            return error_response
         
-        # Add stages if available
-        if 'stages' in build_data:
-            for stage in build_data['stages']:
-                timeline.append({
-                    "name": stage.get('name', 'Unknown Stage'),
-                    "status": stage.get('status', 'UNKNOWN'),
-                    "duration": stage.get('durationMillis', 0),
-                    "timestamp": stage.get('startTimeMillis', 0)
-                })
+        return jsonify(build_timeline(build_data))
+    except Exception as e:
+        app.logger.error(f"Error getting build timeline: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/job/<path:job_name>/bundle')
+@login_required
+@csrf.exempt
+def get_job_bundle(job_name):
+    """
+    Job details, test results, timeline and optionally the console log tail of one build in a
+    single response, for the job wizard. Shows the latest build unless ?build=<n> is given;
+    ?log_tail=<bytes> adds the end of the console log. The build's Jenkins requests run in
+    parallel and each section carries its own error.
+    """
+    try:
+        # Get Jenkins configuration
+        config = load_config()
+        if not config:
+            return jsonify({"error": "Jenkins configuration not found"}), 404
+            
+        jenkins_url = config.get('jenkins_url')
+        username = config.get('username')
+        api_token = config.get('api_token')
         
-        # Add build end
-        if 'result' in build_data:
-            timeline.append({
-                "name": "Build Completed",
-                "status": build_data['result'],
-                "duration": 0,
-                "timestamp": build_data['timestamp'] + build_data.get('duration', 0)
+        if not jenkins_url:
+            return jsonify({"error": "Jenkins URL not configured"}), 400
+
+        try:
+            log_tail = min(max(int(request.args.get('log_tail', 0)), 0), JOB_BUNDLE_MAX_LOG_TAIL)
+        except ValueError:
+            return jsonify({"error": "log_tail must be a number of bytes"}), 400
+
+        job_url = f"{jenkins_url.rstrip('/')}{job_api_path(job_name)}"
+        auth = (username, api_token) if username and api_token else None
+        build_number = request.args.get('build')
+
+        def fetch(url):
+            return JenkinsClient.get_json(url, auth=auth, timeout=20)
+
+        def submit(pool, fn, *args):
+            # Copy the request context so the request time budget applies in the workers
+            return pool.submit(contextvars.copy_context().run, fn, *args)
+
+        def section(future, shape):
+            if future is None:
+                return None
+            try:
+                return shape(future.result())
+            except requests.exceptions.RequestException as e:
+                error_message, _ = describe_jenkins_error(e, job_url)
+                return {"error": error_message}
+
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            job_future = submit(pool, fetch, f"{job_url}api/json?tree={JOB_DETAILS_TREE}")
+            if build_number is None:
+                # Everything else hangs off the latest build's number, which comes with the job
+                build_number = (job_future.result().get('lastBuild') or {}).get('number')
+
+            build_future = tests_future = log_future = None
+            if build_number is not None:
+                build_url = f"{job_url}{build_number}/"
+                build_future = submit(pool, fetch, f"{build_url}api/json")
+                tests_future = submit(pool, fetch, f"{build_url}testReport/api/json")
+                if log_tail:
+                    log_future = submit(pool, log_store.fetch_tail, build_url, auth, log_tail, 30)
+
+            job_data = job_future.result()
+            build_data = section(build_future, lambda data: data)
+            tests = section(tests_future, summarize_test_report)
+            log = section(log_future, lambda tail: {
+                "text": tail.text,
+                "size": tail.size,
+                "truncated": tail.size > log_tail,
+                "complete": tail.complete
             })
-        
-        return jsonify(timeline)
+
+        build_ok = build_data is not None and 'error' not in build_data
+        return jsonify({
+            "job": summarize_job_details(job_name, job_data, build_data if build_ok else None),
+            "tests": tests,
+            "timeline": build_timeline(build_data) if build_ok else build_data,
+            "log": log
+        })
+    except requests.exceptions.RequestException as e:
+        error_message, status_code = describe_jenkins_error(e, job_name)
+        return jsonify({"error": error_message}), status_code
     except Exception as e:
-        app.logger.error(f"Error getting build timeline: {str(e)}")
+        app.logger.error(f"Error getting job bundle: {str(e)}")
         return jsonify({"error": str(e)}), 500
 
+ANALYZE_STREAM_CHUNK_SIZE = 64 * 1024  # Bytes read from Jenkins per chunk when streaming a log
+ANALYZE_FALLBACK_BYTES = 10000  # Start of the log sent to Ollama if local analysis fails
+
 @app.route('/api/analyze-from-url', methods=['POST'])
 @login_required
 @csrf.exempt
@@ -1693,25 +2702,35 @@ def analyze_from_url():
     if not jenkins_url:
         return jsonify({"error": "Jenkins URL is required"}), 400
     
+    # Start of the log, kept for the Ollama fallback since the log itself is never held whole
+    log_head = bytearray()
+    
+    def log_chunks(response):
+        for chunk in response.iter_content(chunk_size=ANALYZE_STREAM_CHUNK_SIZE):
+            if len(log_head) < ANALYZE_FALLBACK_BYTES:
+                log_head.extend(chunk[:ANALYZE_FALLBACK_BYTES - len(log_head)])
+            yield chunk
+    
     try:
-        # Fetch the log content from the Jenkins URL
-        response = requests.get(jenkins_url + '/consoleText', timeout=30)
-        if response.status_code != 200:
-            return jsonify({"error": f"Failed to fetch logs from Jenkins. Status code: {response.status_code}"}), 500
-        
-        log_content = response.text
-        
-        # Use our local log analyzer engine
-        global log_analyzer_engine
-        if log_analyzer_engine is None:
-            log_analyzer_engine = LogAnalyzerEngine()
+        # Stream the log from the Jenkins URL straight into the analyzer
+        response = JenkinsClient.get(jenkins_url + '/consoleText', stream=True, timeout=30, verify=True)
+        try:
+            if response.status_code != 200:
+                return jsonify({"error": f"Failed to fetch logs from Jenkins. Status code: {response.status_code}"}), 500
             
-        # Analyze the log
-        analysis_result = log_analyzer_engine.analyze_log(
-            log_content, 
-            job_name=job_name, 
-            build_number=build_number
-        )
+            # Use our local log analyzer engine
+            global log_analyzer_engine
+            if log_analyzer_engine is None:
+                log_analyzer_engine = LogAnalyzerEngine()
+                
+            # Analyze the log
+            analysis_result = log_analyzer_engine.analyze_stream(
+                log_chunks(response),
+                job_name=job_name, 
+                build_number=build_number
+            )
+        finally:
+            response.close()
         
         # Return the analysis result
         return jsonify({
@@ -1726,6 +2745,8 @@ def analyze_from_url():
     except Exception as e:
         # Fallback to Ollama if local analysis fails
         try:
+            log_content = log_head.decode('utf-8', errors='replace')
+            
             # Get the Ollama client for the current user
             client, error_message = get_ollama_client()
             if error_message:
@@ -0,0 +1,168 @@
+"""
+Concurrent collection of recent builds across nested folders and multibranch projects
+"""
+import contextvars
+import heapq
+import logging
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+from circuit_breaker import CircuitOpenError, BudgetExceededError
+from jenkins_client import JenkinsClient
+
+logger = logging.getLogger('app')
+
+# One level of children per request; `jobs[url]` is only there to tell folders from jobs
+FOLDER_TREE = 'jobs[name,fullName,url,color,lastBuild[number,timestamp,result],jobs[url]]'
+BUILD_FIELDS = 'number,timestamp,duration,result'
+BUILD_PAGE_SIZE = 25
+DEFAULT_MAX_WORKERS = 8
+
+
+def job_fingerprint(job):
+    """What changes when a job starts or finishes a build: its last build number and its color."""
+    return [(job.get('lastBuild') or {}).get('number'), job.get('color')]
+
+
+class RecentBuildCollector:
+    """
+    Walks a controller's folder hierarchy level by level and fetches recent builds of each job,
+    running at most `max_workers` Jenkins requests at a time.
+
+    Jobs whose lastBuild is older than the window are skipped without fetching their builds,
+    and each job's builds are paged only as far back as the window reaches. Per-job lists are
+    already newest-first, so they are merged with a heap instead of re-sorted.
+
+    Given the previous pass's fingerprints and builds, jobs whose fingerprint hasn't changed
+    reuse their previous builds instead of being fetched again, so a steady-state pass costs
+    one request per folder plus one per job that actually built.
+    """
+
+    def __init__(self, jenkins_url, auth=None, max_workers=DEFAULT_MAX_WORKERS, timeout=20):
+        self.jenkins_url = jenkins_url.rstrip('/') + '/'
+        self.auth = auth
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.jobs = []  # Every job listed by the last collect(), folders excluded
+        self.fingerprints = {}  # Full name -> fingerprint of each job the last collect() covered
+        self.fetched = 0  # Jobs whose builds the last collect() had to fetch
+
+    def collect(self, since_ms, previous_fingerprints=None, previous_builds=None):
+        """
+        Return builds with timestamp >= since_ms across all jobs, newest first.
+
+        `previous_fingerprints` maps job full names to job_fingerprint() values from an earlier
+        pass and `previous_builds` is that pass's result; unchanged jobs are served from it.
+        Failing to list the controller root raises, as do an open circuit and running out of
+        request budget anywhere, since the result would be silently incomplete; other failures
+        deeper down are logged and skipped.
+        """
+        self.jobs = []
+        self.fingerprints = {}
+        self.fetched = 0
+        reusable = self._reusable_builds(previous_fingerprints or {}, previous_builds or [])
+
+        _, root = self._list_folder(self.jenkins_url)
+        per_job = []
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            pending = self._expand(pool, root, since_ms, reusable, per_job)
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    kind, payload = self._result(future)
+                    if kind == 'folder':
+                        pending |= self._expand(pool, payload, since_ms, reusable, per_job)
+                    elif kind == 'builds' and payload:
+                        per_job.append(payload)
+
+        return list(heapq.merge(*per_job, key=lambda b: b['timestamp'], reverse=True))
+
+    @staticmethod
+    def _reusable_builds(previous_fingerprints, previous_builds):
+        """Group the previous pass's builds by job, keyed by the fingerprint they were taken at."""
+        grouped = {}
+        for build in previous_builds:
+            grouped.setdefault(build['job_name'], []).append(build)
+        return {
+            name: (fingerprint, grouped.get(name, []))
+            for name, fingerprint in previous_fingerprints.items()
+            # A build still running then may have finished without changing the fingerprint
+            if all(build.get('result') is not None for build in grouped.get(name, []))
+        }
+
+    def _expand(self, pool, listing, since_ms, reusable, per_job):
+        """Schedule sub-folder walks and build fetches for one folder listing."""
+        folders, jobs = listing
+        self.jobs.extend(jobs)
+        futures = {self._submit(pool, self._list_folder, folder_url) for folder_url in folders}
+        for job in jobs:
+            name = job.get('fullName') or job.get('name')
+            last_build = job.get('lastBuild') or {}
+            if last_build.get('timestamp', 0) < since_ms:
+                self.fingerprints[name] = job_fingerprint(job)
+                continue
+            previous = reusable.get(name)
+            if previous and previous[0] == job_fingerprint(job):
+                # Nothing started or finished since the previous pass; only drop what left the window
+                builds = [build for build in previous[1] if build['timestamp'] >= since_ms]
+                if builds:
+                    per_job.append(builds)
+                self.fingerprints[name] = previous[0]
+                continue
+            self.fetched += 1
+            futures.add(self._submit(pool, self._job_builds, job, since_ms))
+        return futures
+
+    def _submit(self, pool, fn, *args):
+        # Each task gets its own copy of the caller's context so the request time budget applies
+        return pool.submit(contextvars.copy_context().run, fn, *args)
+
+    def _result(self, future):
+        try:
+            return future.result()
+        except (CircuitOpenError, BudgetExceededError):
+            raise
+        except Exception as e:
+            # One unreadable folder or job shouldn't hide everything else
+            logger.warning(f"Recent build collection skipped an item: {e}")
+            return None, None
+
+    def _list_folder(self, folder_url):
+        data = JenkinsClient.get_json(f"{folder_url}api/json?tree={FOLDER_TREE}", auth=self.auth, timeout=self.timeout)
+        folders, jobs = [], []
+        for child in data.get('jobs') or []:
+            if 'jobs' in child:
+                folders.append(child['url'])
+            else:
+                jobs.append(child)
+        return 'folder', (folders, jobs)
+
+    def _fetch_job_builds(self, job, since_ms):
+        job_url = job['url']
+        builds = []
+        start = 0
+        while True:
+            end = start + BUILD_PAGE_SIZE
+            api_url = f"{job_url}api/json?tree=builds[{BUILD_FIELDS}]{{{start},{end}}}"
+            batch = JenkinsClient.get_json(api_url, auth=self.auth, timeout=self.timeout).get('builds') or []
+            for build in batch:
+                timestamp = build.get('timestamp', 0)
+                if timestamp < since_ms:
+                    return 'builds', builds
+                builds.append({
+                    'job_name': job.get('fullName') or job.get('name'),
+                    'job_url': job_url,
+                    'build_number': build.get('number'),
+                    'timestamp': timestamp,
+                    'duration': build.get('duration'),
+                    'result': build.get('result')
+                })
+            if len(batch) < BUILD_PAGE_SIZE:
+                break
+            start = end
+        return 'builds', builds
+
+    def _job_builds(self, job, since_ms):
+        kind, builds = self._fetch_job_builds(job, since_ms)
+        # Only jobs fetched successfully may be reused by the next pass
+        self.fingerprints[job.get('fullName') or job.get('name')] = job_fingerprint(job)
+        return kind, builds
@@ -0,0 +1,309 @@
+"""
+Incremental sync of Jenkins build history into the local Build table.
+
+Run standalone as a worker next to the web server:
+
+    python build_sync.py
+
+or enable the in-process syncer with BUILD_SYNC_IN_PROCESS=true (single-worker setups only).
+"""
+import logging
+import threading
+from datetime import datetime, timedelta
+from urllib.parse import quote
+
+import requests
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+
+from circuit_breaker import CircuitOpenError
+from jenkins_client import JenkinsClient, credential_key
+from models import db, Build, BuildSyncState, JenkinsConfig, User
+
+logger = logging.getLogger('app')
+
+BUILD_FIELDS = 'number,url,timestamp,duration,result,builtOn'
+JOB_FIELDS = 'fullName,url,color,lastBuild[number]'
+JOB_TREE_QUERY = f"tree=jobs[{JOB_FIELDS},jobs[{JOB_FIELDS},jobs[{JOB_FIELDS}]]]"
+
+INITIAL_PAGE_SIZE = 100  # First sync of a job pulls history in large ranges
+INCREMENTAL_PAGE_SIZE = 25  # Later syncs usually only need a handful of new builds
+DEFAULT_MAX_HISTORY = 500
+UPSERT_CHUNK = 500  # Stay well below SQLite's bound-parameter limit
+
+
+def normalize_jenkins_url(jenkins_url):
+    return jenkins_url.rstrip('/')
+
+
+def job_api_path(job_full_name):
+    """Turn a job full name like 'Folder/Job' into its URL path '/job/Folder/job/Job/'."""
+    return '/job/' + '/job/'.join(quote(part) for part in job_full_name.split('/')) + '/'
+
+
+def iter_buildable_jobs(jobs):
+    """Flatten a Jenkins job tree, yielding only jobs that have builds (not folders)."""
+    for job in jobs or []:
+        if 'jobs' in job:
+            yield from iter_buildable_jobs(job['jobs'])
+        else:
+            yield job
+
+
+def fetch_buildable_jobs(jenkins_url, auth):
+    """Jobs with builds on a controller, as far as the given credentials can see them."""
+    data = JenkinsClient.get_json(f"{normalize_jenkins_url(jenkins_url)}/api/json?{JOB_TREE_QUERY}", auth=auth, timeout=30)
+    return list(iter_buildable_jobs(data.get('jobs')))
+
+
+def job_counts(jobs):
+    """Total, running and failed counts of a list of buildable jobs."""
+    return {
+        'total_jobs': len(jobs),
+        'running_jobs': sum(1 for job in jobs if (job.get('color') or '').endswith('_anime')),
+        'failed_jobs': sum(1 for job in jobs if job.get('color') in ('red', 'red_anime'))
+    }
+
+
+def high_water_mark(jenkins_url, job_name):
+    """
+    Return the highest build number below which everything is stored and finished.
+    Builds still running at the last sync are re-fetched so their result gets filled in.
+    """
+    scope = (Build.jenkins_url == jenkins_url, Build.job_name == job_name)
+    latest = db.session.query(func.max(Build.number)).filter(*scope).scalar()
+    oldest_running = db.session.query(func.min(Build.number)).filter(*scope, Build.result.is_(None)).scalar()
+    if oldest_running is not None:
+        return oldest_running - 1
+    return latest or 0
+
+
+def sync_job_builds(jenkins_url, auth, job_name, max_history=DEFAULT_MAX_HISTORY):
+    """Pull builds of one job newer than its high-water mark; returns the number stored."""
+    jenkins_url = normalize_jenkins_url(jenkins_url)
+    hwm = high_water_mark(jenkins_url, job_name)
+    page_size = INCREMENTAL_PAGE_SIZE if hwm else INITIAL_PAGE_SIZE
+    base_url = f"{jenkins_url}{job_api_path(job_name)}api/json?tree=allBuilds[{BUILD_FIELDS}]"
+
+    fetched = []
+    start = 0
+    while True:
+        end = start + page_size
+        data = JenkinsClient.get_json(f"{base_url}{{{start},{end}}}", auth=auth, timeout=30)
+        batch = data.get('allBuilds') or []
+        newer = [b for b in batch if int(b.get('number', 0)) > hwm]
+        fetched.extend(newer)
+        # allBuilds is newest first, so the first build at or below the mark ends the scan
+        if len(newer) < len(batch) or len(batch) < page_size:
+            break
+        if not hwm and len(fetched) >= max_history:
+            break
+        start = end
+
+    if not hwm:
+        fetched = fetched[:max_history]
+    for i in range(0, len(fetched), UPSERT_CHUNK):
+        _upsert_builds(jenkins_url, job_name, fetched[i:i + UPSERT_CHUNK])
+    return len(fetched)
+
+
+def _upsert_builds(jenkins_url, job_name, builds, attempts=3):
+    """
+    Insert or update a batch of builds. A concurrent sync of the same job may insert some of
+    them first; the batch is then rolled back and redone, updating the rows it stored.
+    """
+    for attempt in range(attempts):
+        try:
+            _merge_builds(jenkins_url, job_name, builds)
+            db.session.commit()
+            return
+        except IntegrityError:
+            db.session.rollback()
+            if attempt == attempts - 1:
+                raise
+
+
+def _merge_builds(jenkins_url, job_name, builds):
+    numbers = [int(b['number']) for b in builds]
+    existing = {
+        row.number: row for row in Build.query.filter(
+            Build.jenkins_url == jenkins_url,
+            Build.job_name == job_name,
+            Build.number.in_(numbers)
+        ).all()
+    }
+    for data in builds:
+        number = int(data['number'])
+        row = existing.get(number)
+        if row is None:
+            row = Build(jenkins_url=jenkins_url, job_name=job_name, number=number)
+            db.session.add(row)
+        row.url = data.get('url')
+        row.timestamp = data.get('timestamp')
+        row.duration = data.get('duration')
+        row.result = data.get('result')
+        row.node = data.get('builtOn') or ''
+
+
+def stored_builds(jenkins_url, auth, job_name, limit=100, max_history=DEFAULT_MAX_HISTORY):
+    """
+    Up to `limit` stored builds of a job, newest first, for whoever holds `auth`.
+
+    Stored rows are shared by every user of the controller, so the caller's own credentials
+    first have to read the job from Jenkins; if they can't, that error propagates and nothing
+    stored is returned. The same request shows whether Jenkins has builds the warehouse is
+    missing, which are then synced with the caller's credentials.
+    """
+    jenkins_url = normalize_jenkins_url(jenkins_url)
+    job = JenkinsClient.get_json(
+        f"{jenkins_url}{job_api_path(job_name)}api/json?tree=lastBuild[number]", auth=auth, timeout=10
+    )
+    last_number = (job.get('lastBuild') or {}).get('number')
+    if last_number and high_water_mark(jenkins_url, job_name) < last_number:
+        try:
+            sync_job_builds(jenkins_url, auth, job_name, max_history)
+        except (requests.exceptions.RequestException, ValueError, IntegrityError) as e:
+            db.session.rollback()
+            logger.warning(f"On-demand build sync failed for {job_name}, using stored history: {e}")
+
+    return Build.query.filter_by(
+        jenkins_url=jenkins_url,
+        job_name=job_name
+    ).order_by(Build.number.desc()).limit(limit).all()
+
+
+def sync_controller(jenkins_url, auth, max_history=DEFAULT_MAX_HISTORY):
+    """
+    Sync every job on a controller whose last build isn't stored yet (or is still running),
+    and record job/running/failed counts. Returns the number of builds stored.
+    """
+    jenkins_url = normalize_jenkins_url(jenkins_url)
+    jobs = fetch_buildable_jobs(jenkins_url, auth)
+
+    latest_stored = dict(
+        db.session.query(Build.job_name, func.max(Build.number))
+        .filter(Build.jenkins_url == jenkins_url)
+        .group_by(Build.job_name).all()
+    )
+    running_stored = {
+        name for (name,) in db.session.query(Build.job_name)
+        .filter(Build.jenkins_url == jenkins_url, Build.result.is_(None)).distinct()
+    }
+
+    stored = 0
+    for job in jobs:
+        name = job.get('fullName')
+        last_number = (job.get('lastBuild') or {}).get('number')
+        if not name or not last_number:
+            continue
+        if latest_stored.get(name) == last_number and name not in running_stored:
+            continue
+        try:
+            stored += sync_job_builds(jenkins_url, auth, name, max_history)
+        except CircuitOpenError:
+            raise  # Controller is down; abandon this pass instead of failing job by job
+        except (requests.exceptions.RequestException, ValueError, IntegrityError) as e:
+            db.session.rollback()
+            logger.warning(f"Build sync skipped {name} on {jenkins_url}: {e}")
+
+    state = BuildSyncState.query.filter_by(jenkins_url=jenkins_url).first()
+    if state is None:
+        state = BuildSyncState(jenkins_url=jenkins_url)
+        db.session.add(state)
+    counts = job_counts(jobs)
+    state.total_jobs = counts['total_jobs']
+    state.running_jobs = counts['running_jobs']
+    state.failed_jobs = counts['failed_jobs']
+    state.last_synced_at = datetime.utcnow()
+    db.session.commit()
+    return stored
+
+
+def _configured_logins():
+    """
+    (jenkins_url, auth) for every stored Jenkins login: each user's primary configuration first,
+    then every additional controller registered as a JenkinsConfig row. Needs an app context.
+    """
+    for user in User.query.filter(User.jenkins_url.isnot(None)).all():
+        if user.is_jenkins_configured():
+            yield normalize_jenkins_url(user.jenkins_url), (user.jenkins_username, user.get_jenkins_token())
+    for config in JenkinsConfig.query.filter(JenkinsConfig.jenkins_api_token_encrypted.isnot(None)).all():
+        yield normalize_jenkins_url(config.jenkins_url), (config.jenkins_username, config.get_jenkins_token())
+
+
+def configured_controllers():
+    """
+    Distinct (jenkins_url, auth) pairs from configured users and their additional controllers;
+    each controller is paired with the first credentials configured for it. Needs an app context.
+    """
+    seen = {}
+    for url, auth in _configured_logins():
+        seen.setdefault(url, auth)
+    return list(seen.items())
+
+
+def configured_credentials():
+    """
+    Distinct (jenkins_url, auth) pairs, one per set of credentials configured for a controller,
+    for data that must only be served to the credentials it was fetched with. Needs an app context.
+    """
+    seen = {}
+    for url, auth in _configured_logins():
+        seen.setdefault((url, credential_key(auth)), (url, auth))
+    return list(seen.values())
+
+
+def fresh_sync_state(jenkins_url, max_age_seconds):
+    """Return the controller's BuildSyncState if its last full sync is recent enough, else None."""
+    state = BuildSyncState.query.filter_by(jenkins_url=normalize_jenkins_url(jenkins_url)).first()
+    if state and state.last_synced_at and datetime.utcnow() - state.last_synced_at <= timedelta(seconds=max_age_seconds):
+        return state
+    return None
+
+
+class BuildSyncer:
+    """
+    Periodically syncs every configured controller, additional ones included. Each controller is
+    synced once per pass with the first credentials configured for it. Stored history is only handed to
+    a user after their own credentials have been accepted by Jenkins (see stored_builds).
+    """
+
+    def __init__(self, app, interval=300, max_history=DEFAULT_MAX_HISTORY):
+        self.app = app
+        self.interval = interval
+        self.max_history = max_history
+        self._stop = threading.Event()
+        self._thread = None
+
+    def run_once(self):
+        with self.app.app_context():
+            for jenkins_url, auth in configured_controllers():
+                try:
+                    stored = sync_controller(jenkins_url, auth, self.max_history)
+                    logger.info(f"Build sync stored {stored} builds from {jenkins_url}")
+                except Exception as e:
+                    db.session.rollback()
+                    logger.error(f"Build sync failed for {jenkins_url}: {e}")
+
+    def run_forever(self):
+        while not self._stop.is_set():
+            self.run_once()
+            self._stop.wait(self.interval)
+
+    def start(self):
+        """Run the sync loop on a daemon thread."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self.run_forever, name='build-sync', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+
+if __name__ == '__main__':
+    from app import app
+    BuildSyncer(
+        app,
+        interval=app.config['BUILD_SYNC_INTERVAL'],
+        max_history=app.config['BUILD_SYNC_MAX_HISTORY']
+    ).run_forever()
@@ -0,0 +1,237 @@
+"""
+Executor and build-queue capacity samples per Jenkins controller, polled on an interval
+"""
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+
+from build_sync import configured_credentials, normalize_jenkins_url
+from jenkins_client import JenkinsClient, credential_key
+from models import db
+
+logger = logging.getLogger('app')
+
+COMPUTER_TREE = 'computer[displayName,offline,assignedLabels[name],executors[idle],oneOffExecutors[idle]]'
+QUEUE_TREE = 'items[id,inQueueSince,why,buildable,blocked,stuck,task[name,url]]'
+QUEUE_ITEMS_KEPT = 20  # Longest-waiting queue items kept with the latest sample
+DEFAULT_RETENTION = 24 * 60 * 60
+
+
+def summarize_computers(computers):
+    """Executor counts overall and per label (busy, idle) from a /computer/api/json listing."""
+    busy = idle = offline_nodes = 0
+    labels = {}
+    for computer in computers:
+        if computer.get('offline'):
+            offline_nodes += 1
+            continue
+        # One-off executors run flyweight tasks (e.g. pipeline parents) and only count while busy
+        node_busy = sum(1 for e in computer.get('executors') or [] if not e.get('idle', True))
+        node_busy += sum(1 for e in computer.get('oneOffExecutors') or [] if not e.get('idle', True))
+        node_idle = sum(1 for e in computer.get('executors') or [] if e.get('idle', True))
+        busy += node_busy
+        idle += node_idle
+
+        name = computer.get('displayName')
+        for label in computer.get('assignedLabels') or []:
+            # Every node carries its own name as a label; only shared labels are worth a series
+            if label.get('name') and label['name'] != name:
+                counts = labels.setdefault(label['name'], [0, 0])
+                counts[0] += node_busy
+                counts[1] += node_idle
+
+    return {'busy': busy, 'idle': idle, 'offline_nodes': offline_nodes}, labels
+
+
+def summarize_queue(items, now_ms):
+    """Queue depth and wait times (seconds) from a /queue/api/json listing, plus the longest waiters."""
+    waits = sorted(
+        (((now_ms - item.get('inQueueSince', now_ms)) / 1000, item) for item in items),
+        key=lambda pair: pair[0],
+        reverse=True
+    )
+    summary = {
+        'depth': len(items),
+        'buildable': sum(1 for item in items if item.get('buildable')),
+        'blocked': sum(1 for item in items if item.get('blocked')),
+        'stuck': sum(1 for item in items if item.get('stuck')),
+        'max_wait': round(waits[0][0], 1) if waits else 0,
+        'avg_wait': round(sum(wait for wait, _ in waits) / len(waits), 1) if waits else 0
+    }
+    longest = [{
+        'id': item.get('id'),
+        'job_name': (item.get('task') or {}).get('name'),
+        'job_url': (item.get('task') or {}).get('url'),
+        'wait': round(wait, 1),
+        'why': item.get('why'),
+        'stuck': bool(item.get('stuck'))
+    } for wait, item in waits[:QUEUE_ITEMS_KEPT]]
+    return summary, longest
+
+
+def take_capacity_sample(jenkins_url, auth):
+    """Query a controller's nodes and queue once and build a compact capacity sample."""
+    jenkins_url = normalize_jenkins_url(jenkins_url)
+    computers = JenkinsClient.get_json(f"{jenkins_url}/computer/api/json?tree={COMPUTER_TREE}", auth=auth, timeout=20)
+    queue = JenkinsClient.get_json(f"{jenkins_url}/queue/api/json?tree={QUEUE_TREE}", auth=auth, timeout=20)
+
+    now = time.time()
+    executors, labels = summarize_computers(computers.get('computer') or [])
+    queue_summary, queue_items = summarize_queue(queue.get('items') or [], int(now * 1000))
+    return {
+        't': round(now, 1),
+        'executors': executors,
+        'labels': labels,
+        'queue': queue_summary,
+        'queue_items': queue_items
+    }
+
+
+class CapacityStore:
+    """
+    Capacity samples per controller and set of credentials, appended as JSON lines so a separate
+    worker process can write them and every web worker can read them. Jenkins only lists the
+    nodes and queue items the credentials may see, so a series is only read back with the
+    credentials it was sampled with. Samples older than `retention` seconds are
+    dropped when the file is compacted, which an append does at most once per tenth of the
+    retention so appends don't read the series back; only the latest sample keeps its queue
+    items.
+    """
+
+    def __init__(self, root, retention=DEFAULT_RETENTION):
+        self.root = root
+        self.retention = retention
+        self._cache = {}
+        self._next_compaction = {}  # Series path -> time its next compaction is due
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+
+    def _path(self, jenkins_url, auth):
+        key = f"{credential_key(auth)}|{normalize_jenkins_url(jenkins_url)}"
+        name = hashlib.sha1(key.encode('utf-8')).hexdigest()
+        return os.path.join(self.root, name + '.jsonl')
+
+    def _latest_path(self, jenkins_url, auth):
+        return self._path(jenkins_url, auth)[:-len('.jsonl')] + '.latest.json'
+
+    def append(self, jenkins_url, auth, sample):
+        latest_path = self._latest_path(jenkins_url, auth)
+        tmp_path = f"{latest_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(sample, f)
+        os.replace(tmp_path, latest_path)
+
+        path = self._path(jenkins_url, auth)
+        compact = {key: value for key, value in sample.items() if key != 'queue_items'}
+        with open(path, 'a') as f:
+            f.write(json.dumps(compact, separators=(',', ':')) + '\n')
+
+        now = time.time()
+        with self._lock:
+            due = now >= self._next_compaction.get(path, 0)
+            if due:
+                self._next_compaction[path] = now + self.retention / 10
+        if due:
+            self._compact(jenkins_url, auth)
+
+    def _compact(self, jenkins_url, auth):
+        """Rewrite the series without expired samples, if it has any."""
+        samples = self.series(jenkins_url, auth)
+        cutoff = time.time() - self.retention
+        if not samples or samples[0]['t'] >= cutoff:
+            return
+        path = self._path(jenkins_url, auth)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as f:
+            for sample in samples:
+                if sample['t'] >= cutoff:
+                    f.write(json.dumps(sample, separators=(',', ':')) + '\n')
+        os.replace(tmp_path, path)
+
+    def series(self, jenkins_url, auth, since=None):
+        """
+        Samples of a controller taken with `auth`, oldest first, optionally only those taken
+        at or after `since`.
+        """
+        path = self._path(jenkins_url, auth)
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except FileNotFoundError:
+            return []
+
+        with self._lock:
+            cached = self._cache.get(path)
+        if cached and cached[0] == mtime:
+            samples = cached[1]
+        else:
+            samples = []
+            with open(path, 'r') as f:
+                for line in f:
+                    try:
+                        samples.append(json.loads(line))
+                    except json.JSONDecodeError:
+                        continue  # A line cut short by a crash mid-append
+            with self._lock:
+                self._cache[path] = (mtime, samples)
+
+        if since is None:
+            return samples
+        return [sample for sample in samples if sample['t'] >= since]
+
+    def latest(self, jenkins_url, auth, max_age=None):
+        """
+        Latest full sample taken with `auth` (with queue items and an 'age' in seconds), or
+        None if missing/too old.
+        """
+        try:
+            with open(self._latest_path(jenkins_url, auth), 'r') as f:
+                sample = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+        age = time.time() - sample.get('t', 0)
+        if max_age is not None and age > max_age:
+            return None
+        return dict(sample, age=round(age, 1))
+
+
+class CapacityPoller:
+    """
+    Samples executors and the build queue of every configured controller on a fixed cadence,
+    once per set of credentials configured for it.
+    """
+
+    def __init__(self, app, store, interval=60):
+        self.app = app
+        self.store = store
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+
+    def run_once(self):
+        with self.app.app_context():
+            controllers = configured_credentials()
+            db.session.remove()  # Don't hold a DB connection while talking to Jenkins
+        for jenkins_url, auth in controllers:
+            try:
+                self.store.append(jenkins_url, auth, take_capacity_sample(jenkins_url, auth))
+            except Exception as e:
+                logger.error(f"Capacity sample failed for {jenkins_url}: {e}")
+
+    def run_forever(self):
+        while not self._stop.is_set():
+            started = time.monotonic()
+            self.run_once()
+            # Fixed cadence: a slow pass shortens the following wait
+            self._stop.wait(max(0, self.interval - (time.monotonic() - started)))
+
+    def start(self):
+        """Run the poller on a daemon thread."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self.run_forever, name='capacity-monitor', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
@@ -0,0 +1,116 @@
+"""
+Per-host circuit breaker and per-request time budget for Jenkins upstream calls
+"""
+import contextvars
+import threading
+import time
+from collections import deque
+
+import requests
+
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """Raised instead of calling a Jenkins host whose circuit is open."""
+
+
+class BudgetExceededError(requests.exceptions.Timeout):
+    """Raised when the current request has no time left for another upstream call."""
+
+
+class CircuitBreaker:
+    """
+    Tracks the outcome of recent calls to one host.
+
+    The circuit opens when at least `min_calls` of the last `window` calls were recorded
+    and the share of failures (errors, 5xx responses or calls slower than `slow_call_seconds`)
+    reaches `failure_rate`. While open, calls fail immediately. After `open_seconds` a single
+    probe call is let through (half-open); its outcome closes or re-opens the circuit.
+
+    `before_call` hands each call a token to pass back to `record`. Every trip starts a new
+    generation, so calls that were still running when the circuit opened can't resolve the
+    probe or count towards the next period.
+    """
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_rate=0.5, min_calls=5, window=20, open_seconds=30, slow_call_seconds=10):
+        self.failure_rate = failure_rate
+        self.min_calls = min_calls
+        self.open_seconds = open_seconds
+        self.slow_call_seconds = slow_call_seconds
+        self._outcomes = deque(maxlen=window)
+        self._state = self.CLOSED
+        self._opened_at = 0
+        self._generation = 0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.open_seconds:
+                return self.HALF_OPEN
+            return self._state
+
+    def before_call(self):
+        """
+        Raise CircuitOpenError unless a call may go through right now; otherwise return the
+        call's (generation, is_probe) token for `record`.
+        """
+        with self._lock:
+            if self._state == self.CLOSED:
+                return self._generation, False
+            if self._state == self.OPEN and time.monotonic() - self._opened_at < self.open_seconds:
+                raise CircuitOpenError('Jenkins is unavailable (circuit open); failing fast.')
+            if self._probe_in_flight:
+                raise CircuitOpenError('Jenkins is unavailable (circuit half-open, probe in progress).')
+            self._state = self.HALF_OPEN
+            self._probe_in_flight = True
+            return self._generation, True
+
+    def record(self, success, elapsed, token):
+        """Record the outcome of a call that `before_call` allowed, with the token it returned."""
+        ok = success and elapsed < self.slow_call_seconds
+        generation, probe = token
+        with self._lock:
+            if generation != self._generation:
+                return  # Started before the circuit last opened; says nothing about the host now
+            if probe:
+                self._probe_in_flight = False
+                if ok:
+                    self._state = self.CLOSED
+                    self._outcomes.clear()
+                else:
+                    self._trip()
+                return
+
+            self._outcomes.append(ok)
+            failures = self._outcomes.count(False)
+            if len(self._outcomes) >= self.min_calls and failures / len(self._outcomes) >= self.failure_rate:
+                self._trip()
+
+    def _trip(self):
+        self._state = self.OPEN
+        self._opened_at = time.monotonic()
+        self._generation += 1
+        self._outcomes.clear()
+
+_deadline = contextvars.ContextVar('jenkins_request_deadline', default=None)
+
+
+def start_budget(seconds):
+    """Give the current request `seconds` of total upstream time; returns a token for end_budget."""
+    return _deadline.set(time.monotonic() + seconds if seconds else None)
+
+
+def end_budget(token):
+    _deadline.reset(token)
+
+
+def remaining_budget():
+    """Seconds left in the current request's budget, or None when no budget is set."""
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
@@ -0,0 +1,165 @@
+"""
+Precomputed dashboard snapshots (overview counts and recent builds) per Jenkins controller
+"""
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+
+from build_collector import RecentBuildCollector
+from build_sync import configured_credentials, iter_buildable_jobs, job_counts, normalize_jenkins_url
+from jenkins_client import credential_key
+from models import db
+
+logger = logging.getLogger('app')
+
+RECENT_WINDOW_MS = 24 * 60 * 60 * 1000
+
+
+def summarize_overview(jobs):
+    """
+    Reduce a job tree to the overview counts and the 5 most recent builds. Folders are
+    descended into and only jobs with builds are counted, the same as the warehouse does.
+    """
+    jobs = list(iter_buildable_jobs(jobs))
+
+    recent_builds = []
+    for job in jobs:
+        last_build = job.get('lastBuild') or {}
+        if last_build:
+            recent_builds.append({
+                'job_name': job.get('fullName') or job.get('name', 'Unknown'),
+                'build_number': last_build.get('number', 0),
+                'status': last_build.get('result', 'UNKNOWN'),
+                'timestamp': last_build.get('timestamp', 0)
+            })
+
+    # Sort recent builds by timestamp (newest first) and limit to 5
+    recent_builds.sort(key=lambda x: x['timestamp'], reverse=True)
+
+    return dict(job_counts(jobs), recent_builds=recent_builds[:5])
+
+
+class SnapshotStore:
+    """
+    Latest snapshot per controller and set of credentials, kept as JSON files so a separate
+    worker process can produce them and every web worker can read them. A snapshot is only
+    found again with the credentials it was taken with. Reads are served from memory until
+    the file's mtime changes.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self._cache = {}
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+
+    def _path(self, jenkins_url, auth):
+        key = f"{credential_key(auth)}|{normalize_jenkins_url(jenkins_url)}"
+        name = hashlib.sha1(key.encode('utf-8')).hexdigest()
+        return os.path.join(self.root, name + '.json')
+
+    def save(self, jenkins_url, auth, snapshot):
+        path = self._path(jenkins_url, auth)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(snapshot, f)
+        os.replace(tmp_path, path)
+        with self._lock:
+            self._cache[path] = (os.stat(path).st_mtime_ns, snapshot)
+
+    def load(self, jenkins_url, auth, max_age=None):
+        """Return the latest snapshot taken with `auth` (with an 'age' in seconds), or None if missing/too old."""
+        path = self._path(jenkins_url, auth)
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+        with self._lock:
+            cached = self._cache.get(path)
+        if cached and cached[0] == mtime:
+            snapshot = cached[1]
+        else:
+            try:
+                with open(path, 'r') as f:
+                    snapshot = json.load(f)
+            except (OSError, json.JSONDecodeError):
+                return None
+            with self._lock:
+                self._cache[path] = (mtime, snapshot)
+
+        age = time.time() - snapshot.get('taken_at', 0)
+        if max_age is not None and age > max_age:
+            return None
+        return dict(snapshot, age=round(age, 1))
+
+
+def take_snapshot(jenkins_url, auth, max_workers=8, previous=None):
+    """
+    Query a controller once and build its dashboard snapshot.
+
+    With the `previous` snapshot, only jobs whose fingerprint (last build number and color)
+    changed since then have their builds fetched; the rest carry over. The overview is
+    derived from the same folder walk.
+    """
+    jenkins_url = normalize_jenkins_url(jenkins_url)
+    since = int(time.time() * 1000) - RECENT_WINDOW_MS
+    collector = RecentBuildCollector(jenkins_url, auth=auth, max_workers=max_workers)
+    recent_builds = collector.collect(
+        since,
+        previous_fingerprints=(previous or {}).get('fingerprints'),
+        previous_builds=(previous or {}).get('recent_builds')
+    )
+
+    return {
+        'jenkins_url': jenkins_url,
+        'taken_at': time.time(),
+        'overview': summarize_overview(collector.jobs),
+        'recent_builds': recent_builds,
+        'fingerprints': collector.fingerprints,
+        'changed_jobs': collector.fetched
+    }
+
+
+class SnapshotPoller:
+    """Refreshes the snapshot of every configured controller, per set of credentials, on a fixed cadence."""
+
+    def __init__(self, app, store, interval=60, max_workers=8):
+        self.app = app
+        self.store = store
+        self.interval = interval
+        self.max_workers = max_workers
+        self._stop = threading.Event()
+        self._thread = None
+
+    def run_once(self):
+        with self.app.app_context():
+            controllers = configured_credentials()
+            db.session.remove()  # Don't hold a DB connection while talking to Jenkins
+        for jenkins_url, auth in controllers:
+            try:
+                previous = self.store.load(jenkins_url, auth)
+                snapshot = take_snapshot(jenkins_url, auth, self.max_workers, previous)
+                self.store.save(jenkins_url, auth, snapshot)
+                logger.debug(f"Dashboard snapshot of {jenkins_url}: {snapshot['changed_jobs']} changed jobs fetched")
+            except Exception as e:
+                logger.error(f"Dashboard snapshot failed for {jenkins_url}: {e}")
+
+    def run_forever(self):
+        while not self._stop.is_set():
+            started = time.monotonic()
+            self.run_once()
+            # Fixed cadence: a slow pass shortens the following wait
+            self._stop.wait(max(0, self.interval - (time.monotonic() - started)))
+
+    def start(self):
+        """Run the poller on a daemon thread."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self.run_forever, name='dashboard-snapshots', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
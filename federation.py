@@ -0,0 +1,105 @@
+"""
+Concurrent fan-out of dashboard queries across every Jenkins controller a user has registered
+"""
+import contextvars
+import logging
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from build_sync import normalize_jenkins_url
+from circuit_breaker import BudgetExceededError, start_budget, end_budget, remaining_budget
+
+logger = logging.getLogger('app')
+
+Controller = namedtuple('Controller', ['jenkins_url', 'username', 'api_token'])
+
+DEFAULT_TIMEOUT = 10  # Seconds one controller may take before its section is reported as timed out
+
+
+def user_controllers(user):
+    """
+    Every controller a user can query: the primary one from their Jenkins configuration first,
+    then each additional JenkinsConfig row. Duplicate URLs are dropped.
+    """
+    candidates = []
+    if user.is_jenkins_configured():
+        candidates.append((user.jenkins_url, user.jenkins_username, user.get_jenkins_token))
+    for config in user.jenkins_configs:
+        if config.jenkins_api_token_encrypted:
+            candidates.append((config.jenkins_url, config.jenkins_username, config.get_jenkins_token))
+
+    controllers = []
+    seen = set()
+    for jenkins_url, username, get_token in candidates:
+        url = normalize_jenkins_url(jenkins_url)
+        if url in seen:
+            continue
+        seen.add(url)
+        controllers.append(Controller(url, username, get_token()))
+    return controllers
+
+
+def controller_for_url(controllers, url):
+    """The controller serving `url` (a build or job URL), or the primary controller if none matches."""
+    for controller in controllers:
+        if url and url.startswith(controller.jenkins_url + '/'):
+            return controller
+    return controllers[0] if controllers else None
+
+
+def _run_with_budget(fn, controller, timeout):
+    # A controller's own budget, never longer than what is left of the request's
+    remaining = remaining_budget()
+    token = start_budget(min(timeout, remaining) if remaining is not None else timeout)
+    started = time.monotonic()
+    try:
+        return fn(controller), time.monotonic() - started
+    finally:
+        end_budget(token)
+
+
+def fan_out(controllers, fn, timeout=DEFAULT_TIMEOUT):
+    """
+    Call fn(controller) for every controller concurrently, each under its own time budget.
+
+    Returns one section per controller, in the given order:
+    {'source': url, 'status': 'ok', 'data': ..., 'elapsed': seconds} or
+    {'source': url, 'status': 'error'|'timeout', 'error': ...}.
+    A slow or failing controller only affects its own section; the call returns once every
+    controller has answered or `timeout` has passed.
+    """
+    if not controllers:
+        return []
+
+    pool = ThreadPoolExecutor(max_workers=len(controllers), thread_name_prefix='federation')
+    futures = [
+        pool.submit(contextvars.copy_context().run, _run_with_budget, fn, controller, timeout)
+        for controller in controllers
+    ]
+    # Small grace period so a call that hits its budget can report that itself
+    wait(futures, timeout=timeout + 1)
+    # Don't hold the response for stragglers; their budget stops them shortly
+    pool.shutdown(wait=False, cancel_futures=True)
+
+    sections = []
+    for controller, future in zip(controllers, futures):
+        section = {'source': controller.jenkins_url}
+        if not future.done():
+            section.update(status='timeout', error=f"No response within {timeout}s")
+        else:
+            try:
+                data, elapsed = future.result()
+                section.update(status='ok', data=data, elapsed=round(elapsed, 2))
+            except BudgetExceededError as e:
+                section.update(status='timeout', error=str(e))
+            except Exception as e:
+                logger.warning(f"Federated query failed for {controller.jenkins_url}: {e}")
+                section.update(status='error', error=str(e))
+        sections.append(section)
+    return sections
+
+
+def section_summary(sections):
+    """Per-controller status list (without data) to return next to a merged view."""
+    return [{key: value for key, value in section.items() if key != 'data'} for section in sections]
@@ -0,0 +1,163 @@
+"""
+Shared HTTP client for Jenkins API calls with pooled keep-alive connections
+"""
+import hashlib
+import logging
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from circuit_breaker import CircuitBreaker, BudgetExceededError, remaining_budget
+from single_flight import SingleFlight
+
+DEFAULT_POOL_SIZE = 10
+DEFAULT_TIMEOUT = 20  # Seconds, for callers that don't pass their own
+DEFAULT_VERIFY_SSL = False  # Jenkins instances commonly use self-signed certs
+
+logger = logging.getLogger('app')
+
+
+def credential_key(auth):
+    """
+    Identify (username, token) credentials without keeping the raw token, for keys of
+    anything fetched with them that must only be handed back to the same credentials.
+    """
+    if not auth:
+        return ''
+    username, token = auth
+    return f"{username}:{hashlib.sha256((token or '').encode('utf-8')).hexdigest()}"
+
+
+class JenkinsClient:
+    """
+    Keeps one requests.Session per (Jenkins host, username) so repeated API calls
+    reuse TCP/TLS connections instead of opening a new one for every request.
+
+    Every call goes through the host's circuit breaker and is capped by whatever is left
+    of the current request's time budget (see circuit_breaker.start_budget). TLS certificates
+    are checked per call: callers pass `verify=`, or get the JENKINS_VERIFY_SSL setting.
+    """
+    _sessions = {}
+    _breakers = {}
+    _lock = threading.Lock()
+    _pool_size = DEFAULT_POOL_SIZE
+    _verify_ssl = DEFAULT_VERIFY_SSL
+    _breaker_settings = {}
+    _flights = SingleFlight()
+
+    @classmethod
+    def initialize(cls, app):
+        """Reads pool, certificate check and circuit breaker settings from the Flask app configuration."""
+        cls._pool_size = int(app.config.get('JENKINS_POOL_SIZE') or DEFAULT_POOL_SIZE)
+        cls._verify_ssl = app.config.get('JENKINS_VERIFY_SSL', DEFAULT_VERIFY_SSL)
+        cls._breaker_settings = {
+            'failure_rate': app.config.get('JENKINS_BREAKER_FAILURE_RATE', 0.5),
+            'open_seconds': app.config.get('JENKINS_BREAKER_OPEN_SECONDS', 30),
+            'slow_call_seconds': app.config.get('JENKINS_BREAKER_SLOW_CALL_SECONDS', 10)
+        }
+
+    @staticmethod
+    def _base_url(url):
+        """Reduce any Jenkins URL (job, build, static resource) to scheme://host[:port]."""
+        parts = urlsplit(url)
+        return f"{parts.scheme}://{parts.netloc}".lower()
+
+    @classmethod
+    def session_for(cls, url, username=None):
+        """Return the pooled session for the Jenkins host serving `url`."""
+        key = (cls._base_url(url), username or '')
+        session = cls._sessions.get(key)
+        if session is not None:
+            return session
+
+        with cls._lock:
+            session = cls._sessions.get(key)
+            if session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=cls._pool_size)
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                cls._sessions[key] = session
+        return session
+
+    @classmethod
+    def breaker_for(cls, url):
+        """Return the circuit breaker for the Jenkins host serving `url`."""
+        key = cls._base_url(url)
+        breaker = cls._breakers.get(key)
+        if breaker is None:
+            with cls._lock:
+                breaker = cls._breakers.setdefault(key, CircuitBreaker(**cls._breaker_settings))
+        return breaker
+
+    @classmethod
+    def circuit_states(cls):
+        """Map of Jenkins host -> circuit state, for health reporting."""
+        with cls._lock:
+            breakers = dict(cls._breakers)
+        return {host: breaker.state for host, breaker in breakers.items()}
+
+    @classmethod
+    def get(cls, url, auth=None, verify=None, **kwargs):
+        """
+        GET `url` through the pooled session; `auth` is a (username, token) tuple or None.
+        `verify` is passed to requests, defaulting to the JENKINS_VERIFY_SSL setting.
+        """
+        timeout = kwargs.pop('timeout', None) or DEFAULT_TIMEOUT
+        if verify is None:
+            verify = cls._verify_ssl
+        remaining = remaining_budget()
+        if remaining is not None:
+            if remaining <= 0:
+                raise BudgetExceededError(f'Request time budget exhausted before calling {url}')
+            timeout = min(timeout, remaining)
+
+        breaker = cls.breaker_for(url)
+        token = breaker.before_call()
+
+        username = auth[0] if auth else None
+        start = time.monotonic()
+        success = False
+        try:
+            response = cls.session_for(url, username).get(url, auth=auth, timeout=timeout, verify=verify, **kwargs)
+            # 4xx answers (missing job, bad credentials) say nothing about the host's health
+            success = response.status_code < 500
+            return response
+        finally:
+            # Record every outcome, or a half-open probe that raised would never finish
+            breaker.record(success, time.monotonic() - start, token)
+
+    @classmethod
+    def get_json(cls, url, auth=None, timeout=20, verify=None):
+        """
+        GET `url` and return the parsed JSON body. Concurrent calls for the same URL,
+        credentials and `verify` share one upstream request, so callers must treat the result
+        as read-only. Raises requests exceptions for transport/HTTP errors and ValueError for
+        invalid JSON.
+        """
+        if verify is None:
+            verify = cls._verify_ssl
+
+        def fetch():
+            response = cls.get(url, auth=auth, timeout=timeout, verify=verify)
+            response.raise_for_status()
+
+            content_type = response.headers.get('Content-Type', '')
+            if 'json' not in content_type.lower():
+                logger.warning(f"Unexpected content type: {content_type} for URL: {url}")
+
+            return response.json()
+
+        return cls._flights.do((url, credential_key(auth), verify), fetch)
+
+    @classmethod
+    def close_all(cls):
+        """Close every pooled session (used on shutdown or when credentials change)."""
+        with cls._lock:
+            sessions = list(cls._sessions.values())
+            cls._sessions.clear()
+        for session in sessions:
+            session.close()
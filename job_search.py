@@ -0,0 +1,204 @@
+"""
+In-memory job search index over flattened job lists, with prefix, substring and fuzzy matching
+"""
+import bisect
+import heapq
+import math
+import re
+import threading
+from collections import Counter
+
+TOKEN_SPLIT = re.compile(r'[^0-9a-z]+')
+FUZZY_MIN_OVERLAP = 0.5  # Share of the query's trigrams a fuzzy match must contain
+
+# Match tiers, best first
+EXACT, NAME_PREFIX, FULL_NAME_PREFIX, WORD_PREFIX, SUBSTRING, FUZZY = range(6)
+
+
+def trigrams(text):
+    """Distinct 3-character substrings of `text`."""
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class JobSearchIndex:
+    """
+    Search index over one job list (the output of extract_and_sort_jobs).
+
+    Prefix matches come from sorted lists searched with bisect (job name, full name and
+    every word of the full name); substring and fuzzy matches come from a trigram index.
+    Results are ranked by match tier, then alphabetically by the text that matched, so
+    each prefix tier only walks as many entries as fit on a page.
+
+    `update(jobs, version)` only touches jobs that were added, removed or changed since the
+    previous version, so refreshing a mostly unchanged 20k-job list stays cheap.
+    """
+
+    def __init__(self):
+        self.version = None
+        self._jobs = {}  # id -> job dict
+        self._ids = {}  # fullName -> id
+        self._lower = {}  # id -> lower-case full name
+        self._full_names = []  # Sorted (lower full name, id)
+        self._names = []  # Sorted (lower job name, id)
+        self._words = []  # Sorted (word, id)
+        self._grams = {}  # trigram -> set of ids
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._jobs)
+
+    def update(self, jobs, version=None):
+        """Bring the index in line with `jobs`; a no-op if `version` is what it already holds."""
+        with self._lock:
+            if version is not None and version == self.version:
+                return
+            incoming = {job['fullName']: job for job in jobs if job.get('fullName')}
+            for full_name in [name for name in self._ids if name not in incoming]:
+                self._remove(self._ids[full_name])
+            added = False
+            for full_name, job in incoming.items():
+                current = self._ids.get(full_name)
+                if current is not None:
+                    if self._jobs[current] == job:
+                        continue
+                    self._remove(current)
+                self._add(job)
+                added = True
+            if added:
+                # Appended unsorted by _add; one sort is far cheaper than an insort per job
+                self._full_names.sort()
+                self._names.sort()
+                self._words.sort()
+            self.version = version
+
+    def _entries(self, job):
+        full_name = job['fullName'].lower()
+        name = (job.get('name') or full_name.rsplit('/', 1)[-1]).lower()
+        words = {word for word in TOKEN_SPLIT.split(full_name) if word}
+        return full_name, name, words
+
+    def _add(self, job):
+        job_id = self._next_id
+        self._next_id += 1
+        self._jobs[job_id] = job
+        self._ids[job['fullName']] = job_id
+
+        full_name, name, words = self._entries(job)
+        self._lower[job_id] = full_name
+        self._full_names.append((full_name, job_id))
+        self._names.append((name, job_id))
+        self._words.extend((word, job_id) for word in words)
+        for gram in trigrams(full_name):
+            self._grams.setdefault(gram, set()).add(job_id)
+
+    def _remove(self, job_id):
+        job = self._jobs.pop(job_id)
+        del self._ids[job['fullName']]
+        del self._lower[job_id]
+
+        full_name, name, words = self._entries(job)
+        self._discard(self._full_names, (full_name, job_id))
+        self._discard(self._names, (name, job_id))
+        for word in words:
+            self._discard(self._words, (word, job_id))
+        for gram in trigrams(full_name):
+            postings = self._grams.get(gram)
+            if postings is not None:
+                postings.discard(job_id)
+                if not postings:
+                    del self._grams[gram]
+
+    @staticmethod
+    def _discard(sorted_list, item):
+        i = bisect.bisect_left(sorted_list, item)
+        if i < len(sorted_list) and sorted_list[i] == item:
+            del sorted_list[i]
+
+    @staticmethod
+    def _prefixed(sorted_list, prefix, limit):
+        """The first `limit` (text, id) entries of a sorted list that start with `prefix`."""
+        i = bisect.bisect_left(sorted_list, (prefix,))
+        end = min(len(sorted_list), i + limit)
+        matches = []
+        while i < end and sorted_list[i][0].startswith(prefix):
+            matches.append(sorted_list[i])
+            i += 1
+        return matches
+
+    def search_ranked(self, query, limit=10):
+        """Return up to `limit` (sort_key, job) pairs, best first; sort keys compare across indexes."""
+        query = query.strip().lower()
+        with self._lock:
+            if not query:
+                return [((EXACT, 0, text, text), self._jobs[job_id]) for text, job_id in self._full_names[:limit]]
+
+            ranks = {}  # id -> (tier, -overlap, matched text, full name)
+
+            def offer(job_id, tier, text, overlap=0):
+                rank = (tier, -overlap, text, self._lower[job_id])
+                if job_id not in ranks or rank < ranks[job_id]:
+                    ranks[job_id] = rank
+
+            # Tiers are searched best first; a later tier is only needed while the page isn't full.
+            # An exact match always sorts first in its prefix list, so it is never cut off.
+            for text, job_id in self._prefixed(self._names, query, limit):
+                offer(job_id, EXACT if text == query else NAME_PREFIX, text)
+            if len(ranks) < limit:
+                for text, job_id in self._prefixed(self._full_names, query, limit):
+                    offer(job_id, EXACT if text == query else FULL_NAME_PREFIX, text)
+            if len(ranks) < limit:
+                for text, job_id in self._prefixed(self._words, query, limit):
+                    offer(job_id, WORD_PREFIX, text)
+
+            query_grams = trigrams(query)
+            if len(ranks) < limit and query_grams:
+                postings = sorted((self._grams.get(gram, ()) for gram in query_grams), key=len)
+                candidates = set(postings[0]).intersection(*postings[1:]) if postings[0] else set()
+                for job_id in candidates:
+                    if query in self._lower[job_id]:
+                        offer(job_id, SUBSTRING, self._lower[job_id])
+
+            if len(ranks) < limit and len(query_grams) > 1:
+                hits = Counter()
+                for gram in query_grams:
+                    hits.update(self._grams.get(gram, ()))
+                needed = math.ceil(len(query_grams) * FUZZY_MIN_OVERLAP)
+                for job_id, count in hits.items():
+                    if count >= needed:
+                        offer(job_id, FUZZY, self._lower[job_id], count)
+
+            best = heapq.nsmallest(limit, ranks, key=ranks.__getitem__)
+            return [(ranks[job_id], self._jobs[job_id]) for job_id in best]
+
+    def search(self, query, limit=10):
+        """Return up to `limit` best matching jobs for `query`."""
+        return [job for _, job in self.search_ranked(query, limit)]
+
+
+class JobSearchIndexes:
+    """One JobSearchIndex per key (e.g. user, controller and Jenkins username), created on first use."""
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self._indexes = {}
+        self._lock = threading.Lock()
+
+    def get(self, key, jobs, version):
+        """Return the index for `key`, updated to `jobs` if `version` changed since the last call."""
+        with self._lock:
+            index = self._indexes.pop(key, None)
+            if index is None:
+                index = JobSearchIndex()
+                if len(self._indexes) >= self.max_entries:
+                    # Dicts keep insertion order and used keys are re-inserted, so the first is least recent
+                    del self._indexes[next(iter(self._indexes))]
+            self._indexes[key] = index
+        index.update(jobs, version)
+        return index
+
+    def invalidate_where(self, predicate):
+        """Drop every index whose key satisfies `predicate(key)`."""
+        with self._lock:
+            for key in [k for k in self._indexes if predicate(k)]:
+                del self._indexes[key]
@@ -1,14 +1,15 @@
 """
 Local Log Analyzer Engine that progressively improves through training
 """
-import re
 import json
 import hashlib
 from sqlalchemy import desc
 import nltk
 import datetime
 from models import db, LogAnalysis
-from collections import Counter, defaultdict
+from collections import Counter, defaultdict, deque
+from log_scanning import (DEFAULT_STAGE_PATTERNS, PatternSet, ResultScanner, StageDetector, count_words,
+                          detect_build_result, iter_line_windows, stage_labels)
 
 # Download required NLTK data
 try:
@@ -24,14 +25,45 @@ except LookupError:
 from nltk.tokenize import word_tokenize
 from nltk.corpus import stopwords
 
+# Common error patterns, checked after the learned ones
+COMMON_ERRORS = [
+    (r'Exception in thread ".*"', 'Java Exception'),
+    (r'Traceback \(most recent call last\)', 'Python Exception'),
+    (r'npm ERR!', 'NPM Error'),
+    (r'SyntaxError', 'Syntax Error'),
+    (r'NameError', 'Name Error'),
+    (r'ImportError', 'Import Error'),
+    (r'error: ', 'General Error'),
+    (r'FAILED', 'Test or Build Failure'),
+    (r'Error:', 'General Error Message'),
+    (r'Warning:', 'Warning Message'),
+    (r'Cannot find module', 'Module Not Found'),
+    (r'Out of memory', 'Memory Error'),
+    (r'Permission denied', 'Permission Issue'),
+    (r'No such file or directory', 'Missing File or Directory'),
+    (r'Failed to connect', 'Connection Issue')
+]
+
+# Keyword tokenizers: 'nltk' (word_tokenize), 'regex' (log_scanning.count_words, much faster),
+# or 'auto' to use NLTK only for logs up to NLTK_TOKENIZER_MAX_CHARS
+KEYWORD_TOKENIZERS = ('auto', 'regex', 'nltk')
+NLTK_TOKENIZER_MAX_CHARS = 64 * 1024
+
+# With keyword sampling, logs longer than the threshold only have their last
+# KEYWORD_SAMPLE_CHARS tokenized; failures and their context cluster at the end of a log
+KEYWORD_SAMPLE_THRESHOLD = 16 * 1024 * 1024
+KEYWORD_SAMPLE_CHARS = 4 * 1024 * 1024
+
 class LogAnalyzerEngine:
     """
     Local log analyzer that learns from historical analyses
     """
     def __init__(self):
         self.error_patterns = self._load_error_patterns()
+        self.error_pattern_set = self._build_error_pattern_set()
         self.stop_words = set(stopwords.words('english'))
         self.known_stage_patterns = self._load_stage_patterns()
+        self.stage_detector = StageDetector(self.known_stage_patterns)
         
     def _load_error_patterns(self):
         """Load known error patterns from database"""
@@ -54,19 +86,18 @@ class LogAnalyzerEngine:
                 
         return patterns
     
+    def _build_error_pattern_set(self):
+        """Learned patterns first, then common ones not already learned, matched in one PatternSet"""
+        descriptions = dict(self.error_patterns)
+        for pattern, description in COMMON_ERRORS:
+            descriptions.setdefault(pattern, description)
+        self.error_descriptions = descriptions
+        return PatternSet((pattern, pattern) for pattern in descriptions)
+
     def _load_stage_patterns(self):
         """Load patterns for identifying build stages"""
         # Start with common patterns
-        patterns = {
-            r'git\s+clone|checkout': 'Source Code Checkout',
-            r'npm\s+install|yarn\s+install': 'JavaScript Dependencies Installation',
-            r'pip\s+install|requirements.txt': 'Python Dependencies Installation',
-            r'mvn\s+|gradle\s+|ant\s+': 'Build Tool Execution',
-            r'test|testing|junit|pytest': 'Running Tests',
-            r'docker\s+build|docker-compose': 'Docker Build',
-            r'deploy|deployment': 'Deployment',
-            r'publish|uploading': 'Publishing Artifacts'
-        }
+        patterns = dict(DEFAULT_STAGE_PATTERNS)
         
         # Add patterns from highly-rated analyses
         analyses = LogAnalysis.query.filter(
@@ -93,103 +124,61 @@ class LogAnalyzerEngine:
     
     def _extract_build_result(self, log_content):
         """Try to determine the build result from the log"""
-        # Common result patterns
-        result_patterns = {
-            r'BUILD\s+SUCCESS': 'SUCCESS',
-            r'BUILD\s+FAILURE': 'FAILURE',
-            r'FAILED': 'FAILURE',
-            r'ERROR': 'FAILURE',
-            r'UNSTABLE': 'UNSTABLE',
-            r'Finished: SUCCESS': 'SUCCESS',
-            r'Finished: FAILURE': 'FAILURE',
-            r'Finished: UNSTABLE': 'UNSTABLE',
-            r'Tests .* PASSED': 'SUCCESS',
-            r'Tests .* FAILED': 'FAILURE'
-        }
-        
-        for pattern, result in result_patterns.items():
-            if re.search(pattern, log_content, re.IGNORECASE):
-                # Return the last matched result pattern found in the log
-                # (assuming that's the final build status)
-                return result
-                
-        return 'UNKNOWN'
+        # Jenkins ends every finished build with "Finished: <RESULT>", so look at the tail first
+        return detect_build_result(log_content)
     
     def _extract_error_patterns(self, log_content):
         """Extract error patterns from log content"""
-        found_errors = []
-        
-        # Check for known error patterns
-        for pattern, description in self.error_patterns.items():
-            if re.search(pattern, log_content, re.IGNORECASE):
-                found_errors.append({
-                    'pattern': pattern,
-                    'description': description
-                })
-        
-        # Detect common error patterns
-        common_errors = [
-            (r'Exception in thread ".*"', 'Java Exception'),
-            (r'Traceback \(most recent call last\)', 'Python Exception'),
-            (r'npm ERR!', 'NPM Error'),
-            (r'SyntaxError', 'Syntax Error'),
-            (r'NameError', 'Name Error'),
-            (r'ImportError', 'Import Error'),
-            (r'error: ', 'General Error'),
-            (r'FAILED', 'Test or Build Failure'),
-            (r'Error:', 'General Error Message'),
-            (r'Warning:', 'Warning Message'),
-            (r'Cannot find module', 'Module Not Found'),
-            (r'Out of memory', 'Memory Error'),
-            (r'Permission denied', 'Permission Issue'),
-            (r'No such file or directory', 'Missing File or Directory'),
-            (r'Failed to connect', 'Connection Issue')
-        ]
-        
-        for pattern, description in common_errors:
-            if re.search(pattern, log_content, re.IGNORECASE):
-                # Only add if not already found
-                if not any(e['pattern'] == pattern for e in found_errors):
-                    found_errors.append({
-                        'pattern': pattern,
-                        'description': description
-                    })
-        
-        return found_errors
+        # One lower-cased copy of the log serves the literal prefilter of every pattern
+        return [{
+            'pattern': pattern,
+            'description': self.error_descriptions[pattern]
+        } for pattern in self.error_pattern_set.matching(log_content)]
     
     def _identify_stages(self, log_content):
         """Identify build stages from log content"""
-        stages = []
-        lines = log_content.split('\n')
-        line_count = len(lines)
-        
-        # Look for stage markers in Jenkins logs
-        stage_markers = re.finditer(r'=+\s*\[([^\]]+)\]\s*=+', log_content)
-        for match in stage_markers:
-            stage_name = match.group(1).strip()
-            if stage_name:
-                stages.append(stage_name)
-        
-        # If no explicit stages found, infer from content using patterns
-        if not stages:
-            for pattern, name in self.known_stage_patterns.items():
-                for i, line in enumerate(lines):
-                    if re.search(pattern, line, re.IGNORECASE):
-                        # Approximate stage position in the log
-                        position = float(i) / line_count if line_count > 0 else 0
-                        stages.append(f"{name} (pos: {position:.2f})")
-                        break  # Found one instance of this stage
-        
-        return stages
+        # Explicit stage markers, or stages inferred from known patterns if there are none
+        return self.stage_detector.labels(log_content)
     
-    def _extract_important_keywords(self, log_content):
+    def _extract_important_keywords(self, log_content, tokenizer='auto', sample=False):
         """Extract important keywords that might indicate interesting events"""
+        tokenizer = self._resolve_tokenizer(tokenizer, len(log_content))
+        if sample and len(log_content) > KEYWORD_SAMPLE_THRESHOLD:
+            log_content = self._keyword_sample(log_content)
+        word_counts = Counter()
+        self._count_keywords(log_content.lower(), word_counts, tokenizer)
+        return self._top_keywords(word_counts)
+    
+    @staticmethod
+    def _resolve_tokenizer(tokenizer, size):
+        if tokenizer not in KEYWORD_TOKENIZERS:
+            raise ValueError(f"Unknown tokenizer: {tokenizer}")
+        if tokenizer == 'auto':
+            return 'nltk' if size <= NLTK_TOKENIZER_MAX_CHARS else 'regex'
+        return tokenizer
+    
+    @staticmethod
+    def _keyword_sample(text):
+        """The last KEYWORD_SAMPLE_CHARS of `text`, starting at a line boundary"""
+        start = len(text) - KEYWORD_SAMPLE_CHARS
+        newline = text.find('\n', start)
+        return text[newline + 1 if newline != -1 else start:]
+    
+    def _count_keywords(self, lowered_text, word_counts, tokenizer='nltk'):
+        """Add the word frequencies of a lower-cased piece of log to `word_counts`"""
+        if tokenizer == 'regex':
+            count_words(lowered_text, word_counts)
+            return
         # Tokenize and clean
-        words = word_tokenize(log_content.lower())
-        words = [w for w in words if w.isalnum() and w not in self.stop_words]
-        
-        # Count word frequencies
-        word_counts = Counter(words)
+        words = word_tokenize(lowered_text)
+        word_counts.update(w for w in words if w.isalnum() and w not in self.stop_words)
+    
+    def _top_keywords(self, word_counts):
+        # The regex tokenizer leaves stop words in; dropping them once here is cheaper
+        word_counts = Counter({
+            word: count for word, count in word_counts.items()
+            if word.isalnum() and word not in self.stop_words
+        })
         
         # Get most common words excluding very common ones
         very_common = {'build', 'error', 'warning', 'info', 'debug', 'jenkins', 'stage'}
@@ -236,6 +225,8 @@ class LogAnalyzerEngine:
             analysis.append("The build failed. Review the error analysis for potential causes.")
         elif build_result == 'UNSTABLE':
             analysis.append("The build is unstable. Tests may be failing or there are warnings.")
+        elif build_result == 'ABORTED':
+            analysis.append("The build was aborted before it completed.")
         else:
             analysis.append("The build status couldn't be determined from the log.")
         
@@ -249,10 +240,25 @@ class LogAnalyzerEngine:
         ).order_by(desc(LogAnalysis.feedback_rating)).first()
         
         return similar
+    
+    def _reuse_similar_analysis(self, log_hash):
+        """The stored result for this log if it has a highly-rated analysis, else None"""
+        similar = self._check_similar_analyses(log_hash)
+        if similar and similar.feedback_rating and similar.feedback_rating >= 4:
+            # If we have a highly-rated analysis for this log, reuse it
+            return {
+                "analysis": similar.analysis,
+                "build_result": similar.build_result,
+                "error_patterns": json.loads(similar.error_patterns) if similar.error_patterns else [],
+                "stages": [], # We don't store stages in the DB
+                "log_hash": log_hash
+            }
+        return None
         
-    def analyze_log(self, log_content, job_name=None, build_number=None):
+    def analyze_log(self, log_content, job_name=None, build_number=None, tokenizer='auto', sample_keywords=False):
         """
-        Analyze a Jenkins log and generate insights
+        Analyze a Jenkins log and generate insights. `tokenizer` picks the keyword tokenizer
+        (see KEYWORD_TOKENIZERS); `sample_keywords` only counts keywords in the tail of large logs.
         """
         # Handle empty log
         if not log_content:
@@ -268,16 +274,9 @@ class LogAnalyzerEngine:
         log_hash = self._compute_log_hash(log_content)
         
         # Check if we've already analyzed a similar log
-        similar = self._check_similar_analyses(log_hash)
-        if similar and similar.feedback_rating and similar.feedback_rating >= 4:
-            # If we have a highly-rated analysis for this log, reuse it
-            return {
-                "analysis": similar.analysis,
-                "build_result": similar.build_result,
-                "error_patterns": json.loads(similar.error_patterns) if similar.error_patterns else [],
-                "stages": [], # We don't store stages in the DB
-                "log_hash": log_hash
-            }
+        reused = self._reuse_similar_analysis(log_hash)
+        if reused:
+            return reused
         
         # Extract build result
         build_result = self._extract_build_result(log_content)
@@ -289,8 +288,81 @@ class LogAnalyzerEngine:
         stages = self._identify_stages(log_content)
         
         # Extract keywords
-        keywords = self._extract_important_keywords(log_content)
+        keywords = self._extract_important_keywords(log_content, tokenizer, sample_keywords)
         
+        return self._finish_analysis(
+            log_content, log_hash, build_result, error_patterns, stages, keywords, job_name, build_number
+        )
+    
+    def analyze_stream(self, chunks, job_name=None, build_number=None, tokenizer='auto', sample_keywords=False):
+        """
+        Analyze a log given as an iterable of str or UTF-8 bytes chunks (e.g. a streamed
+        Jenkins response) in one pass, holding only about one window of lines at a time.
+        Returns the same result as analyze_log would for the whole log; multi-line error or
+        stage patterns are only matched within a window.
+        """
+        hasher = hashlib.sha256()
+        result_scanner = ResultScanner()
+        stage_scan = self.stage_detector.scan()
+        found_errors = set()
+        word_counts = Counter()
+        keyword_tail = deque()  # Lower-cased windows covering the keyword sample
+        keyword_tail_size = 0
+        head = ''
+        line_count = 0
+        size = 0
+        
+        for window, offset, line in iter_line_windows(chunks):
+            hasher.update(window.encode('utf-8'))
+            if len(head) < 1000:
+                head += window[:1000 - len(head)]
+            line_count = line + window.count('\n')
+            size = offset + len(window)
+            if offset == 0:
+                # The first window is the whole log unless it is larger than any NLTK input
+                tokenizer = self._resolve_tokenizer(tokenizer, len(window))
+            
+            # One lower-cased copy per window, shared by every case-insensitive scan
+            lowered = window.lower()
+            result_scanner.feed(window)
+            found_errors.update(self.error_pattern_set.matching(window, lowered, skip=found_errors))
+            stage_scan.feed(window, offset, line, lowered)
+            
+            if sample_keywords:
+                keyword_tail.append(lowered)
+                keyword_tail_size += len(lowered)
+                while keyword_tail_size - len(keyword_tail[0]) >= KEYWORD_SAMPLE_CHARS:
+                    keyword_tail_size -= len(keyword_tail.popleft())
+                if offset >= KEYWORD_SAMPLE_THRESHOLD:
+                    continue  # Past the threshold, only the tail will be counted
+            self._count_keywords(lowered, word_counts, tokenizer)
+        
+        if sample_keywords and size > KEYWORD_SAMPLE_THRESHOLD:
+            word_counts = Counter()
+            self._count_keywords(self._keyword_sample(''.join(keyword_tail)), word_counts, tokenizer)
+        
+        if not head:
+            return self.analyze_log('')
+        
+        log_hash = hasher.hexdigest()
+        reused = self._reuse_similar_analysis(log_hash)
+        if reused:
+            return reused
+        
+        error_patterns = [{
+            'pattern': pattern,
+            'description': description
+        } for pattern, description in self.error_descriptions.items() if pattern in found_errors]
+        
+        return self._finish_analysis(
+            head, log_hash, result_scanner.result(), error_patterns,
+            stage_labels(stage_scan.stages(), line_count), self._top_keywords(word_counts),
+            job_name, build_number
+        )
+    
+    def _finish_analysis(self, log_content, log_hash, build_result, error_patterns, stages, keywords,
+                         job_name, build_number):
+        """Write up and store the analysis; only the start of `log_content` is stored"""
         # Generate analysis
         analysis = self._generate_analysis(
             log_content, error_patterns, stages, keywords, build_result
@@ -0,0 +1,513 @@
+"""
+Fast scanners for console logs, shared by LogAnalyzerEngine and the API endpoints
+"""
+import codecs
+import re
+from collections import namedtuple
+
+# Escapes and classes that can match a line break; patterns using them may span lines.
+# Numeric escapes (\x0a, \012, ...) and backreferences can stand for a line break too.
+MULTILINE_TOKENS = ('\\s', '\\n', '\\r', '\\W', '\\D', '[^', '(?s', '\\x', '\\u', '\\U', '\\N') + tuple(
+    f"\\{digit}" for digit in range(10)
+)
+HEX_ESCAPE_DIGITS = {'x': 2, 'u': 4, 'U': 8}
+OCTAL_DIGITS = frozenset('01234567')
+
+
+def escape_length(pattern, i):
+    """
+    Length of the escape sequence at the backslash `pattern[i]`: hex (\\x41, \\u0041,
+    \\U00000041), named (\\N{...}) and octal (\\0, \\101) escapes, backreferences (\\1, \\12),
+    or a backslash and one character.
+    """
+    escaped = pattern[i + 1:i + 2]
+    if escaped in HEX_ESCAPE_DIGITS:
+        return 2 + HEX_ESCAPE_DIGITS[escaped]
+    if escaped == 'N' and pattern[i + 2:i + 3] == '{':
+        closing = pattern.find('}', i)
+        return closing + 1 - i if closing != -1 else len(pattern) - i
+    if escaped.isdigit():
+        digits = pattern[i + 1:i + 4]
+        if escaped == '0' or (len(digits) == 3 and OCTAL_DIGITS.issuperset(digits)):
+            # Octal: \0 and up to two more octal digits, or exactly three octal digits
+            length = 2
+            while length < 4 and pattern[i + length:i + length + 1] in OCTAL_DIGITS:
+                length += 1
+            return length
+        # A backreference takes one or two digits
+        return 3 if pattern[i + 2:i + 3].isdigit() else 2
+    return 2
+
+
+def required_literal(pattern):
+    """
+    Longest run of plain characters that every match of the regex `pattern` must contain,
+    or '' if none is certain (e.g. a top-level alternation). Groups, classes and optional
+    characters end a run; characters inside groups are never counted.
+    """
+    runs, run = [], []
+    depth = 0
+    i = 0
+    while i < len(pattern):
+        c = pattern[i]
+        literal = None
+        if c == '\\':
+            escaped = pattern[i + 1:i + 2]
+            if escaped and not escaped.isalnum():
+                literal = escaped  # Escaped punctuation such as \( or \.
+            i += escape_length(pattern, i)  # Other escapes end the run
+        elif c == '[':
+            # Skip the whole character class, including a leading ] or ^]
+            i += 1
+            if pattern[i:i + 1] == '^':
+                i += 1
+            if pattern[i:i + 1] == ']':
+                i += 1
+            while i < len(pattern) and pattern[i] != ']':
+                i += 2 if pattern[i] == '\\' else 1
+            i += 1
+        elif c in '*?{':
+            # The preceding character may be absent
+            if run:
+                run.pop()
+            if c == '{':
+                closing = pattern.find('}', i)
+                i = closing + 1 if closing != -1 else len(pattern)
+            else:
+                i += 1
+        elif c == '|' and depth == 0:
+            return ''
+        else:
+            if c == '(':
+                depth += 1
+            elif c == ')':
+                depth = max(0, depth - 1)
+            elif c not in '.^$+|':
+                literal = c
+            i += 1
+
+        if literal is not None and depth == 0:
+            run.append(literal)
+        elif c != '+' or not run:
+            # Anything else ends the run; x+ keeps x but what follows needn't be adjacent
+            if run:
+                runs.append(''.join(run))
+            run = []
+        else:
+            runs.append(''.join(run))
+            run = []
+    if run:
+        runs.append(''.join(run))
+    return max(runs, key=len, default='')
+
+
+def literal_alternation(literals):
+    """
+    One regex matching any of `literals`, preferring the longest at a position. Literals are
+    nested by their shared prefixes, so the engine tests each character once per position
+    rather than once per literal.
+    """
+    trie = {}
+    for literal in literals:
+        node = trie
+        for c in literal:
+            node = node.setdefault(c, {})
+        node[''] = None  # A literal ends here
+
+    def build(node):
+        branches = [re.escape(c) + build(child) for c, child in node.items() if c]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        return f"(?:{body})?" if '' in node else body
+
+    return build(trie)
+
+
+def split_alternatives(pattern):
+    """Split a regex on its top-level | into branches (a single branch if it has none)."""
+    branches = []
+    depth = 0
+    start = i = 0
+    while i < len(pattern):
+        c = pattern[i]
+        if c == '\\':
+            i += escape_length(pattern, i)
+            continue
+        if c == '[':
+            # Skip the character class; a ] right after [ or [^ is part of it
+            i += 1
+            if pattern[i:i + 1] == '^':
+                i += 1
+            if pattern[i:i + 1] == ']':
+                i += 1
+            while i < len(pattern) and pattern[i] != ']':
+                i += 2 if pattern[i] == '\\' else 1
+        elif c == '(':
+            depth += 1
+        elif c == ')':
+            depth = max(0, depth - 1)
+        elif c == '|' and depth == 0:
+            branches.append(pattern[start:i])
+            start = i + 1
+        i += 1
+    branches.append(pattern[start:])
+    return branches
+
+
+class PatternSet:
+    """
+    A set of regexes matched against one text, reporting which of them match anywhere.
+
+    Each pattern's required literals, one per top-level branch, are located together in one
+    scan of a lower-cased copy of the text, using a single alternation of every literal. Only
+    patterns with a literal present then run their compiled regex, starting from the line of
+    the earliest literal. Patterns with a branch that has no usable literal are always run.
+    Invalid patterns are skipped.
+    """
+
+    def __init__(self, patterns, flags=re.IGNORECASE):
+        """`patterns` is an iterable of (pattern_id, regex) pairs; ids are reported in this order."""
+        self.ignore_case = bool(flags & re.IGNORECASE)
+        self.invalid = []
+        self._entries = []
+        for pattern_id, pattern in patterns:
+            try:
+                compiled = re.compile(pattern, flags)
+            except (re.error, TypeError):
+                self.invalid.append(pattern_id)
+                continue
+            literals = [required_literal(branch) for branch in split_alternatives(pattern)]
+            if not all(literals):
+                literals = []  # Some branch can match without any known literal
+            if self.ignore_case:
+                literals = [literal.lower() for literal in literals]
+            spans_lines = any(token in pattern for token in MULTILINE_TOKENS)
+            self._entries.append((pattern_id, compiled, literals, spans_lines))
+
+        # The longest literal wins at a position; the literals that are prefixes of it occur there too
+        all_literals = sorted({literal for entry in self._entries for literal in entry[2]})
+        self._literal_scan = re.compile(literal_alternation(all_literals)) if all_literals else None
+        self._prefixes = {
+            literal: [other for other in all_literals if other != literal and literal.startswith(other)]
+            for literal in all_literals
+        }
+
+    def __len__(self):
+        return len(self._entries)
+
+    def matching(self, text, lowered=None, skip=()):
+        """Return the ids of all patterns that match somewhere in `text`."""
+        return [pattern_id for pattern_id, _ in self.first_matches(text, lowered, skip)]
+
+    def first_matches(self, text, lowered=None, skip=()):
+        """
+        Return (id, match) of every pattern that matches `text`, with its leftmost match.
+        Patterns whose id is in `skip` (e.g. already found in an earlier window) aren't run.
+        """
+        entries = [entry for entry in self._entries if entry[0] not in skip] if skip else self._entries
+        if self.ignore_case and lowered is None and any(entry[2] for entry in entries):
+            lowered = text.lower()
+        haystack = lowered if self.ignore_case else text
+        # Offsets only carry over if lower-casing kept every character's position
+        aligned = haystack is not None and len(haystack) == len(text)
+
+        needed = {literal for entry in entries for literal in entry[2]}
+        first_seen = self._literal_positions(haystack, needed) if needed else {}
+
+        found = []
+        for pattern_id, compiled, literals, spans_lines in entries:
+            start = 0
+            if literals:
+                positions = [first_seen[literal] for literal in literals if literal in first_seen]
+                if not positions:
+                    continue
+                if aligned and not spans_lines:
+                    # Every match lies on a line holding a literal, so none starts earlier
+                    start = text.rfind('\n', 0, min(positions)) + 1
+            match = compiled.search(text, start)
+            if match:
+                found.append((pattern_id, match))
+        return found
+
+    def _literal_positions(self, haystack, needed):
+        """First position of each literal in `haystack`, in one scan that stops once all `needed` are seen."""
+        positions = {}
+        missing = len(needed)
+        search = self._literal_scan.search
+        match = search(haystack)
+        while match:
+            position = match.start()
+            literal = match.group()
+            for seen in (literal, *self._prefixes[literal]):
+                if seen not in positions:
+                    positions[seen] = position
+                    if seen in needed:
+                        missing -= 1
+            if not missing:
+                break
+            # Resume one character on, so literals overlapping this one are found as well
+            match = search(haystack, position + 1)
+        return positions
+
+
+# Results Jenkins writes on the last console line, "Finished: <RESULT>"
+JENKINS_RESULTS = ('SUCCESS', 'UNSTABLE', 'FAILURE', 'NOT_BUILT', 'ABORTED')
+FINISHED_PREFIX = 'Finished: '
+FINISHED_LINE = re.compile(r'Finished: ([A-Z_]+)[ \t]*\r?$', re.MULTILINE)
+TAIL_CHUNK_SIZE = 8 * 1024
+TAIL_MAX_CHARS = 64 * 1024  # Nothing follows the Finished line, so the tail needn't be long
+
+# Fallback markers, matched case-sensitively: tools print them in upper case, while a
+# case-insensitive "error" would match every "0 errors" summary line
+RESULT_MARKERS = re.compile(
+    r'BUILD\s+(?:SUCCESS|FAILURE)'
+    r'|Tests .* (?:PASSED|FAILED)'
+    r'|Finished: (?:SUCCESS|UNSTABLE|FAILURE|NOT_BUILT|ABORTED)'
+    r'|FAILED|ERROR|UNSTABLE'
+)  # No capturing groups: they stop re from skipping ahead to the markers' first letters
+
+
+def terminal_result(text, chunk_size=TAIL_CHUNK_SIZE, max_chars=TAIL_MAX_CHARS):
+    """
+    Result from the last "Finished: <RESULT>" line, reading backwards from the end of `text`
+    in chunks of `chunk_size` characters, or None if the last `max_chars` don't contain one.
+    """
+    chunk_size = max(chunk_size, 2 * len(FINISHED_PREFIX))  # Each chunk must reach past its overlap
+    end = len(text)
+    floor = max(0, end - max_chars)
+    while end > floor:
+        start = max(floor, end - chunk_size)
+        position = text.rfind(FINISHED_PREFIX, start, end)
+        while position != -1:
+            if position == 0 or text[position - 1] == '\n':
+                match = FINISHED_LINE.match(text, position)
+                if match and match.group(1) in JENKINS_RESULTS:
+                    return match.group(1)
+            position = text.rfind(FINISHED_PREFIX, start, position)
+        if start == floor:
+            break
+        # Overlap so a marker cut by the chunk boundary is found whole in the next chunk
+        end = start + len(FINISHED_PREFIX) - 1
+    return None
+
+
+class ResultScanner:
+    """
+    Build result of a log fed in consecutive pieces: the terminal Finished line if the last
+    TAIL_MAX_CHARS contain one, else the build-tool markers seen along the way.
+    """
+
+    def __init__(self):
+        self.summary = None
+        self.failed = self.unstable = False
+        self.tail = ''
+
+    def feed(self, text):
+        self.scan_markers(text)
+        if len(text) >= TAIL_MAX_CHARS:
+            self.tail = text[-TAIL_MAX_CHARS:]
+        else:
+            self.tail = (self.tail + text)[-TAIL_MAX_CHARS:]
+
+    def scan_markers(self, text):
+        """
+        The last explicit summary (BUILD SUCCESS, Tests ... FAILED, a Finished line) wins;
+        otherwise any FAILED or ERROR means FAILURE, and UNSTABLE means UNSTABLE.
+        """
+        for match in RESULT_MARKERS.finditer(text):
+            marker = match.group()
+            if marker.startswith(('BUILD', 'Tests')):
+                self.summary = 'SUCCESS' if marker.endswith(('SUCCESS', 'PASSED')) else 'FAILURE'
+            elif marker.startswith(FINISHED_PREFIX):
+                self.summary = marker[len(FINISHED_PREFIX):]
+            elif marker == 'UNSTABLE':
+                self.unstable = True
+            else:
+                self.failed = True
+
+    def marker_result(self):
+        if self.summary:
+            return self.summary
+        if self.failed:
+            return 'FAILURE'
+        if self.unstable:
+            return 'UNSTABLE'
+        return 'UNKNOWN'
+
+    def result(self):
+        return terminal_result(self.tail) or self.marker_result()
+
+
+def scan_build_result(text):
+    """Result from build-tool markers in one pass over `text`, or 'UNKNOWN' (see ResultScanner)."""
+    scanner = ResultScanner()
+    scanner.scan_markers(text)
+    return scanner.marker_result()
+
+
+def detect_build_result(text):
+    """Build result of a console log: Jenkins' terminal Finished line if present, else a marker scan."""
+    return terminal_result(text) or scan_build_result(text)
+
+
+# Stage patterns inferred from log content when there are no explicit stage markers
+DEFAULT_STAGE_PATTERNS = {
+    r'git\s+clone|checkout': 'Source Code Checkout',
+    r'npm\s+install|yarn\s+install': 'JavaScript Dependencies Installation',
+    r'pip\s+install|requirements.txt': 'Python Dependencies Installation',
+    r'mvn\s+|gradle\s+|ant\s+': 'Build Tool Execution',
+    r'test|testing|junit|pytest': 'Running Tests',
+    r'docker\s+build|docker-compose': 'Docker Build',
+    r'deploy|deployment': 'Deployment',
+    r'publish|uploading': 'Publishing Artifacts'
+}
+
+# "[Pipeline] { (Name)" opens a pipeline stage block; "=== [Name] ===" is a freestyle banner
+PIPELINE_STAGE_PREFIX = '[Pipeline] { ('
+STAGE_MARKERS = re.compile(
+    r'\[Pipeline\] \{ \(.+\)[ \t]*\r?$'
+    r'|=+[ \t]*\[[^\]\n]+\][ \t]*=+',
+    re.MULTILINE
+)  # No capturing groups, see RESULT_MARKERS
+
+Stage = namedtuple('Stage', ['name', 'line', 'offset', 'explicit'])
+
+
+def stage_labels(stages, line_count):
+    """Stage names for display; inferred ones carry their relative position in the log."""
+    return [
+        stage.name if stage.explicit else f"{stage.name} (pos: {(stage.line - 1) / line_count:.2f})"
+        for stage in stages
+    ]
+
+
+class StageDetector:
+    """
+    Finds build stages in a console log with their first line (1-based) and character offset.
+
+    Explicit stage markers are read in one walk over the log. Only if there are none, stages
+    are inferred from `patterns` (regex -> stage name), matched case-insensitively through a
+    PatternSet. Needs no database, so it can be used without a LogAnalyzerEngine.
+    """
+
+    def __init__(self, patterns=None):
+        self.patterns = dict(DEFAULT_STAGE_PATTERNS if patterns is None else patterns)
+        # MULTILINE keeps ^ and $ anchored to lines, as when patterns were matched line by line
+        self.pattern_set = PatternSet(((pattern, pattern) for pattern in self.patterns), re.IGNORECASE | re.MULTILINE)
+
+    def scan(self):
+        """A StageScan to feed a log to in consecutive windows."""
+        return StageScan(self)
+
+    def detect(self, text):
+        """Stages in order of first appearance; each stage name is reported once."""
+        scan = self.scan()
+        scan.feed(text)
+        return scan.stages()
+
+    def labels(self, text):
+        return stage_labels(self.detect(text), text.count('\n') + 1)
+
+
+class StageScan:
+    """Stage detection state for one log, fed in windows that end at line boundaries."""
+
+    def __init__(self, detector):
+        self.detector = detector
+        self.explicit = {}  # name -> (offset, line)
+        self.inferred = {}
+        self._done_patterns = set()  # Patterns whose stage was already found in an earlier window
+
+    def feed(self, text, offset=0, line=1, lowered=None):
+        """Scan the window `text`, which starts at character `offset` on line `line` of the log."""
+        found = {}
+        for match in STAGE_MARKERS.finditer(text):
+            marker = match.group().strip()
+            if marker.startswith(PIPELINE_STAGE_PREFIX):
+                name = marker[len(PIPELINE_STAGE_PREFIX):-1].strip()
+            else:
+                name = marker[marker.index('[') + 1:marker.index(']')].strip()
+            if name and name not in self.explicit:
+                found.setdefault(name, match.start())
+        if found:
+            self._record(self.explicit, found, text, offset, line)
+        if self.explicit:
+            return  # Inferred stages are only reported for logs without markers
+
+        patterns = self.detector.patterns
+        for pattern, match in self.detector.pattern_set.first_matches(text, lowered, self._done_patterns):
+            name = patterns[pattern]
+            if name not in self.inferred and (name not in found or match.start() < found[name]):
+                found[name] = match.start()
+        if found:
+            self._record(self.inferred, found, text, offset, line)
+            names = set(found)
+            self._done_patterns.update(pattern for pattern, name in patterns.items() if name in names)
+
+    @staticmethod
+    def _record(stages, found, text, offset, line):
+        # Count newlines once, walking the window's offsets in ascending order
+        last = 0
+        for name, position in sorted(found.items(), key=lambda item: item[1]):
+            line += text.count('\n', last, position)
+            last = position
+            stages[name] = (offset + position, line)
+
+    def stages(self):
+        """Stages in order of first appearance."""
+        explicit = bool(self.explicit)
+        found = self.explicit if explicit else self.inferred
+        return [
+            Stage(name, line, offset, explicit)
+            for name, (offset, line) in sorted(found.items(), key=lambda item: item[1][0])
+        ]
+
+
+STREAM_WINDOW_CHARS = 1024 * 1024
+
+
+def iter_line_windows(chunks, window_chars=STREAM_WINDOW_CHARS):
+    """
+    Regroup str or UTF-8 bytes chunks into windows of whole lines of about `window_chars`
+    characters; yields (window, offset, line) with the window's first character offset and
+    1-based line number. A single line longer than a window is split.
+    """
+    decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+    pending = []
+    pending_size = 0
+    offset, line = 0, 1
+    for chunk in chunks:
+        text = decoder.decode(chunk) if isinstance(chunk, bytes) else chunk
+        pending.append(text)
+        pending_size += len(text)
+        if pending_size < window_chars:
+            continue
+
+        buffer = ''.join(pending)
+        cut = buffer.rfind('\n') + 1 or len(buffer)
+        window = buffer[:cut]
+        yield window, offset, line
+        offset += len(window)
+        line += window.count('\n')
+        pending = [buffer[cut:]]
+        pending_size = len(pending[0])
+
+    buffer = ''.join(pending) + decoder.decode(b'', final=True)
+    if buffer:
+        yield buffer, offset, line
+
+
+# Words roughly as NLTK's word tokenizer splits them: whitespace, brackets, quotes, "--" and
+# most punctuation separate tokens, while dots, colons and commas inside a token don't
+# (foo.bar, 12:30:45, 1,000), so such tokens are never counted as alphanumeric words
+KEYWORD_CHAR = r'[^\s()\[\]{}<>"\'`;?!@#$%&*.:,-]'
+KEYWORD_TOKEN = re.compile(
+    rf'(?:{KEYWORD_CHAR}+|\.(?={KEYWORD_CHAR})|:(?=\d)|,(?=\d)|(?<!-)-(?!-))+'
+)
+
+
+def count_words(lowered_text, word_counts):
+    """Add the alphanumeric tokens of `lowered_text` to the Counter `word_counts`."""
+    # findall, filter and Counter.update all iterate in C; stop words are dropped when ranking
+    word_counts.update(filter(str.isalnum, KEYWORD_TOKEN.findall(lowered_text)))
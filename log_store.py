@@ -0,0 +1,274 @@
+"""
+Local store for Jenkins console logs, filled incrementally via logText/progressiveText
+"""
+import codecs
+import hashlib
+import json
+import os
+import threading
+import time
+
+import requests
+
+from jenkins_client import JenkinsClient, credential_key
+
+CHUNK_SIZE = 64 * 1024
+DEFAULT_REVALIDATE_SECONDS = 300
+
+
+class LogRecord:
+    """Location and state of a stored console log."""
+    __slots__ = ('path', 'size', 'complete')
+
+    def __init__(self, path, size, complete):
+        self.path = path
+        self.size = size
+        self.complete = complete
+
+
+class LogTail:
+    """The end of a console log, fetched without storing the log."""
+    __slots__ = ('text', 'size', 'complete')
+
+    def __init__(self, text, size, complete):
+        self.text = text
+        self.size = size
+        self.complete = complete
+
+
+def decode_tail(data, cut):
+    """Decode the end of a log; if it was `cut` from a longer log, drop the partial first line."""
+    if cut:
+        # Drop the partial first line (and any split UTF-8 sequence with it)
+        newline = data.find(b'\n')
+        data = data[newline + 1:] if newline != -1 else data
+    return data.decode('utf-8', errors='replace')
+
+
+def keep_tail(chunks, max_bytes):
+    """Read `chunks` to the end holding only the last `max_bytes`; returns (tail, total bytes read)."""
+    tail = bytearray()
+    total = 0
+    for chunk in chunks:
+        total += len(chunk)
+        tail += chunk
+        if len(tail) > 2 * max_bytes:
+            del tail[:-max_bytes]
+    return bytes(tail[-max_bytes:]) if max_bytes else b'', total
+
+
+class LogStore:
+    """
+    Keeps console logs on local disk. Running builds are topped up with only the bytes
+    Jenkins has produced since the last fetch; completed builds are served from disk
+    without contacting Jenkins.
+
+    Logs are keyed by build URL and a digest of the credentials (username and token) that
+    fetched them, so a stored log is only served to those exact credentials. A completed log
+    is served from disk without a download, but at most every `revalidate_seconds` the
+    credentials are checked against the build's API: once Jenkins answers 401, 403 or 404
+    (token revoked, permission removed, build deleted) the log is no longer served. While
+    Jenkins can't be reached, the last check stands.
+    """
+
+    def __init__(self, root, max_bytes=None, revalidate_seconds=DEFAULT_REVALIDATE_SECONDS):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.revalidate_seconds = revalidate_seconds
+        self._locks = {}
+        self._locks_lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+
+    @staticmethod
+    def normalize_build_url(build_url):
+        return build_url.rstrip('/') + '/'
+
+    def _key(self, build_url, auth):
+        raw = f"{credential_key(auth)}|{self.normalize_build_url(build_url)}"
+        return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+    def _paths(self, key):
+        base = os.path.join(self.root, key)
+        return base + '.log', base + '.json'
+
+    def _lock_for(self, key):
+        with self._locks_lock:
+            return self._locks.setdefault(key, threading.Lock())
+
+    def _read_meta(self, meta_path):
+        try:
+            with open(meta_path, 'r') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def _write_meta(self, meta_path, meta):
+        # Write-then-rename so other workers never see a half-written file
+        tmp_path = f"{meta_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, meta_path)
+
+    def sync(self, build_url, auth=None, timeout=30):
+        """
+        Bring the stored copy of a build's console log up to date and return its LogRecord.
+        Raises requests exceptions if Jenkins cannot be reached or rejects the request.
+        """
+        key = self._key(build_url, auth)
+        log_path, meta_path = self._paths(key)
+
+        with self._lock_for(key):
+            meta = self._read_meta(meta_path)
+            if meta and meta.get('complete') and os.path.exists(log_path):
+                if time.time() - meta.get('verified_at', meta['fetched_at']) >= self.revalidate_seconds:
+                    if self._revalidate(build_url, auth, timeout):
+                        self._write_meta(meta_path, dict(meta, verified_at=time.time()))
+                os.utime(log_path)  # Mark as recently used for pruning
+                return LogRecord(log_path, meta['size'], True)
+
+            offset = meta['size'] if meta and os.path.exists(log_path) else 0
+            size, complete = self._fetch_from(build_url, auth, offset, log_path, timeout)
+            if size < offset:
+                # Log shrank (build was replaced), start over from the beginning
+                size, complete = self._fetch_from(build_url, auth, 0, log_path, timeout)
+
+            self._write_meta(meta_path, {
+                'build_url': self.normalize_build_url(build_url),
+                'size': size,
+                'complete': complete,
+                'fetched_at': time.time()
+            })
+
+        if complete and size > offset:
+            self.prune()
+        return LogRecord(log_path, size, complete)
+
+    def _revalidate(self, build_url, auth, timeout):
+        """
+        Check that `auth` can still read the build; returns False if Jenkins couldn't be
+        reached (the stored log keeps being served) and raises HTTPError if Jenkins refuses.
+        """
+        url = self.normalize_build_url(build_url) + 'api/json'
+        try:
+            response = JenkinsClient.get(url, auth=auth, params={'tree': 'number'}, timeout=min(timeout, 10))
+        except requests.exceptions.RequestException:
+            return False
+        try:
+            if response.status_code in (401, 403, 404):
+                response.raise_for_status()
+            return response.ok
+        finally:
+            response.close()
+
+    def fetch_tail(self, build_url, auth=None, max_bytes=CHUNK_SIZE, timeout=30):
+        """
+        Return a LogTail with at most the last `max_bytes` of a build's console log, starting at
+        a line boundary. A copy already stored for these credentials is topped up and read from
+        disk. Otherwise nothing is stored: the log's size is taken from the X-Text-Size header of
+        a progressiveText request that is dropped unread, and only the tail is requested with
+        `start=`. If Jenkins doesn't send the size up front, the log is streamed through a
+        buffer that keeps just the tail.
+        """
+        log_path, meta_path = self._paths(self._key(build_url, auth))
+        if os.path.exists(meta_path) and os.path.exists(log_path):
+            record = self.sync(build_url, auth, timeout)
+            return LogTail(self.read_tail(record, max_bytes), record.size, record.complete)
+
+        url = self.normalize_build_url(build_url) + 'logText/progressiveText'
+        start = 0
+        while True:
+            response = JenkinsClient.get(url, auth=auth, params={'start': start}, stream=True, timeout=timeout)
+            try:
+                response.raise_for_status()
+                text_size = int(response.headers.get('X-Text-Size', -1))
+                complete = response.headers.get('X-More-Data', '').lower() != 'true'
+                if start or text_size < 0 or text_size <= max_bytes:
+                    data, read = keep_tail(response.iter_content(chunk_size=CHUNK_SIZE), max_bytes)
+                    size = max(text_size, start + read)
+                    return LogTail(decode_tail(data, size > len(data)), size, complete)
+            finally:
+                response.close()
+            # Ask again for the tail only; the log can only have grown since
+            start = text_size - max_bytes
+
+    def _fetch_from(self, build_url, auth, offset, log_path, timeout):
+        """Append the log bytes from `offset` onwards; return (new_size, complete)."""
+        url = self.normalize_build_url(build_url) + 'logText/progressiveText'
+        response = JenkinsClient.get(url, auth=auth, params={'start': offset}, stream=True, timeout=timeout)
+        try:
+            response.raise_for_status()
+            text_size = int(response.headers.get('X-Text-Size', -1))
+            complete = response.headers.get('X-More-Data', '').lower() != 'true'
+            if 0 <= text_size < offset:
+                return text_size, complete
+
+            mode = 'r+b' if offset and os.path.exists(log_path) else 'wb'
+            with open(log_path, mode) as f:
+                f.seek(offset)
+                for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                    f.write(chunk)
+                f.truncate()
+                size = f.tell()
+            return size, complete
+        finally:
+            response.close()
+
+    def iter_bytes(self, record, chunk_size=CHUNK_SIZE):
+        """Yield the stored log in fixed-size byte chunks, never holding more than one in memory."""
+        remaining = record.size
+        with open(record.path, 'rb') as f:
+            while remaining > 0:
+                chunk = f.read(min(chunk_size, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                yield chunk
+
+    def iter_text(self, record, chunk_size=CHUNK_SIZE):
+        """Like iter_bytes, but decoded; multi-byte characters split across chunks stay intact."""
+        decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        for chunk in self.iter_bytes(record, chunk_size):
+            text = decoder.decode(chunk)
+            if text:
+                yield text
+        tail = decoder.decode(b'', final=True)
+        if tail:
+            yield tail
+
+    def read_text(self, record):
+        """Return the whole stored log as text."""
+        with open(record.path, 'rb') as f:
+            return f.read(record.size).decode('utf-8', errors='replace')
+
+    def read_tail(self, record, max_bytes):
+        """Return at most the last `max_bytes` of the stored log as text, starting at a line boundary."""
+        start = max(0, record.size - max_bytes)
+        with open(record.path, 'rb') as f:
+            f.seek(start)
+            data = f.read(record.size - start)
+        return decode_tail(data, start > 0)
+
+    def prune(self):
+        """Delete least recently used logs until the store fits in `max_bytes`."""
+        if not self.max_bytes:
+            return
+        try:
+            logs = []
+            for name in os.listdir(self.root):
+                if name.endswith('.log'):
+                    stat = os.stat(os.path.join(self.root, name))
+                    logs.append((stat.st_mtime, stat.st_size, name[:-len('.log')]))
+        except OSError:
+            return
+
+        total = sum(size for _, size, _ in logs)
+        for _, size, key in sorted(logs):
+            if total <= self.max_bytes:
+                break
+            with self._lock_for(key):
+                for path in self._paths(key):
+                    try:
+                        os.remove(path)
+                    except OSError:
+                        pass
+            total -= size
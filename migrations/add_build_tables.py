@@ -0,0 +1,73 @@
+"""
+Migration script to add the Build and BuildSyncState tables (build-history warehouse)
+"""
+import sqlite3
+import os
+import sys
+
+# Add parent directory to path to import app
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def run_migration():
+    """Run the migration to add the build warehouse tables"""
+    # Get the database path from the main application
+    from app import app
+
+    # Get database path from app configuration
+    with app.app_context():
+        db_path = app.config['SQLALCHEMY_DATABASE_URI'].replace('sqlite:///', '')
+
+    print(f"Running migration on database: {db_path}")
+
+    # Connect to SQLite database
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+
+    # Check if table already exists
+    cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='build'")
+    if cursor.fetchone():
+        print("Build table already exists, skipping migration.")
+        conn.close()
+        return
+
+    # Create build table
+    cursor.execute('''
+    CREATE TABLE build (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        jenkins_url VARCHAR(256) NOT NULL,
+        job_name VARCHAR(255) NOT NULL,
+        number INTEGER NOT NULL,
+        url VARCHAR(512),
+        timestamp BIGINT,
+        duration BIGINT,
+        result VARCHAR(32),
+        node VARCHAR(255),
+        synced_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        CONSTRAINT uq_build_job_number UNIQUE (jenkins_url, job_name, number)
+    )
+    ''')
+
+    # Indexes for time-window queries
+    cursor.execute('CREATE INDEX ix_build_timestamp ON build(timestamp)')
+    cursor.execute('CREATE INDEX idx_build_controller_time ON build(jenkins_url, timestamp)')
+
+    # Create build_sync_state table
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS build_sync_state (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        jenkins_url VARCHAR(256) NOT NULL UNIQUE,
+        last_synced_at TIMESTAMP,
+        total_jobs INTEGER DEFAULT 0,
+        running_jobs INTEGER DEFAULT 0,
+        failed_jobs INTEGER DEFAULT 0
+    )
+    ''')
+
+    # Commit changes and close connection
+    conn.commit()
+    conn.close()
+
+    print("Successfully created Build and BuildSyncState tables")
+
+if __name__ == "__main__":
+    run_migration()
@@ -5,6 +5,9 @@ from cryptography.fernet import Fernet, InvalidToken
 import os
 import base64
 import hashlib
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime
 
 db = SQLAlchemy()
@@ -32,6 +35,8 @@ class Encryption:
         cls._key = base64.urlsafe_b64encode(hashed_key) # URL-safe base64 encoded
         
         cls._cipher = Fernet(cls._key)
+        CredentialCache.ttl = app.config.get('CREDENTIAL_CACHE_TTL', CredentialCache.ttl)
+        CredentialCache.clear()  # Entries decrypted under a previous key are no longer valid
     
     @classmethod
     def encrypt(cls, data):
@@ -45,6 +50,65 @@ class Encryption:
             raise ValueError("Encryption not initialized")
         return cls._cipher.decrypt(encrypted_data.encode()).decode()
 
+# Decrypted secrets kept per process so hot paths don't re-run Fernet on every request
+class CredentialCache:
+    """
+    Bounded LRU cache of decrypted secrets with a TTL.
+
+    Keys are (owner kind, owner id, ciphertext): a new ciphertext can never return a stale
+    plaintext, and owners drop their entries explicitly when a secret is replaced.
+    """
+    ttl = 300  # Seconds
+    max_entries = 512
+    _entries = OrderedDict()
+    _lock = threading.Lock()
+
+    @classmethod
+    def get(cls, key):
+        with cls._lock:
+            item = cls._entries.get(key)
+            if item is None:
+                return None
+            value, expires_at = item
+            if expires_at < time.monotonic():
+                del cls._entries[key]
+                return None
+            cls._entries.move_to_end(key)
+            return value
+
+    @classmethod
+    def put(cls, key, value):
+        with cls._lock:
+            cls._entries[key] = (value, time.monotonic() + cls.ttl)
+            cls._entries.move_to_end(key)
+            while len(cls._entries) > cls.max_entries:
+                cls._entries.popitem(last=False)
+
+    @classmethod
+    def invalidate(cls, owner_kind, owner_id):
+        """Drop every cached secret belonging to one owner."""
+        with cls._lock:
+            for key in [k for k in cls._entries if k[0] == owner_kind and k[1] == owner_id]:
+                del cls._entries[key]
+
+    @classmethod
+    def clear(cls):
+        with cls._lock:
+            cls._entries.clear()
+
+    @classmethod
+    def decrypt(cls, owner_kind, owner_id, encrypted_data):
+        """Return the plaintext for `encrypted_data`, decrypting only on a cache miss."""
+        if owner_id is None:
+            # Unsaved rows have no stable identity yet; don't cache for them
+            return Encryption.decrypt(encrypted_data)
+        key = (owner_kind, owner_id, encrypted_data)
+        value = cls.get(key)
+        if value is None:
+            value = Encryption.decrypt(encrypted_data)
+            cls.put(key, value)
+        return value
+
 class User(db.Model, UserMixin):
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(64), unique=True, nullable=False)
@@ -72,6 +136,7 @@ class User(db.Model, UserMixin):
         return check_password_hash(self.password_hash, password)
     
     def set_jenkins_token(self, token):
+        CredentialCache.invalidate('user_jenkins_token', self.id)
         if token:
             self.jenkins_api_token_encrypted = Encryption.encrypt(token)
         else:
@@ -79,7 +144,7 @@ class User(db.Model, UserMixin):
     
     def get_jenkins_token(self):
         if self.jenkins_api_token_encrypted:
-            return Encryption.decrypt(self.jenkins_api_token_encrypted)
+            return CredentialCache.decrypt('user_jenkins_token', self.id, self.jenkins_api_token_encrypted)
         return None
     
     def set_anthropic_api_key(self, api_key):
@@ -180,7 +245,7 @@ class LogAnalysis(db.Model):
         return f'<LogAnalysis {self.job_name}:{self.build_number}>'
 
 class JenkinsConfig(db.Model):
-    """Model for storing Jenkins configuration information."""
+    """Model for storing Jenkins configuration information (controllers beyond the user's primary one)."""
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     jenkins_url = db.Column(db.String(256), nullable=False)
@@ -189,21 +254,71 @@ class JenkinsConfig(db.Model):
     created_at = db.Column(db.DateTime, server_default=db.func.now())
     updated_at = db.Column(db.DateTime, server_default=db.func.now(), onupdate=db.func.now())
     
-    # Relationship with User model
-    user = db.relationship('User', backref=db.backref('jenkins_config', uselist=False))
+    # Relationship with User model; each row is one additional controller the user can query
+    user = db.relationship('User', backref=db.backref('jenkins_configs', lazy=True, cascade='all, delete-orphan'))
     
     def set_jenkins_token(self, token):
         """Encrypt and store the Jenkins API token."""
+        CredentialCache.invalidate('jenkins_config_token', self.id)
         if token:
             self.jenkins_api_token_encrypted = Encryption.encrypt(token)
         else:
             self.jenkins_api_token_encrypted = None
     
     def get_jenkins_token(self):
-        """Decrypt and return the Jenkins API token."""
+        """Decrypt and return the Jenkins API token (cached per process)."""
         if self.jenkins_api_token_encrypted:
-            return Encryption.decrypt(self.jenkins_api_token_encrypted)
+            return CredentialCache.decrypt('jenkins_config_token', self.id, self.jenkins_api_token_encrypted)
         return None
     
     def __repr__(self):
         return f'<JenkinsConfig {self.jenkins_url}>'
+
+class Build(db.Model):
+    """Local copy of Jenkins build history, filled incrementally by build_sync."""
+    id = db.Column(db.Integer, primary_key=True)
+    # Controller the build belongs to (normalized, no trailing slash)
+    jenkins_url = db.Column(db.String(256), nullable=False)
+    # Job full name, e.g. "Folder/Job"
+    job_name = db.Column(db.String(255), nullable=False)
+    number = db.Column(db.Integer, nullable=False)
+    url = db.Column(db.String(512))
+    # Jenkins reports both in milliseconds
+    timestamp = db.Column(db.BigInteger, index=True)
+    duration = db.Column(db.BigInteger)
+    # NULL while the build is still running
+    result = db.Column(db.String(32))
+    # Agent the build ran on ("builtOn"); empty for the built-in node
+    node = db.Column(db.String(255))
+    synced_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        db.UniqueConstraint('jenkins_url', 'job_name', 'number', name='uq_build_job_number'),
+        db.Index('idx_build_controller_time', 'jenkins_url', 'timestamp'),
+    )
+
+    def to_dict(self):
+        return {
+            'job_name': self.job_name,
+            'number': self.number,
+            'url': self.url,
+            'timestamp': self.timestamp,
+            'duration': self.duration,
+            'result': self.result,
+            'node': self.node
+        }
+
+    def __repr__(self):
+        return f'<Build {self.job_name}#{self.number}>'
+
+class BuildSyncState(db.Model):
+    """Per-controller summary recorded by the last build_sync pass."""
+    id = db.Column(db.Integer, primary_key=True)
+    jenkins_url = db.Column(db.String(256), unique=True, nullable=False)
+    last_synced_at = db.Column(db.DateTime)
+    total_jobs = db.Column(db.Integer, default=0)
+    running_jobs = db.Column(db.Integer, default=0)
+    failed_jobs = db.Column(db.Integer, default=0)
+
+    def __repr__(self):
+        return f'<BuildSyncState {self.jenkins_url}>'
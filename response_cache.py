@@ -0,0 +1,217 @@
+"""
+In-memory TTL cache for Jenkins API responses with ETag revalidation and background refresh
+"""
+import random
+import threading
+import time
+
+from single_flight import SingleFlight
+
+
+class CacheEntry:
+    """A cached value together with the upstream ETag and the time it was fetched."""
+    __slots__ = ('value', 'etag', 'fetched_at')
+
+    def __init__(self, value, etag=None, fetched_at=None):
+        self.value = value
+        self.etag = etag
+        self.fetched_at = fetched_at if fetched_at is not None else time.time()
+
+    @property
+    def age(self):
+        return time.time() - self.fetched_at
+
+
+class TTLCache:
+    """
+    Thread-safe TTL cache.
+
+    Entries younger than `refresh_after` seconds are served as-is. Entries between
+    `refresh_after` and `ttl` are served immediately while a background thread refreshes
+    them. Expired or missing entries are loaded synchronously.
+
+    A loader is called as `loader(etag)` and returns `(value, etag)`; returning a value of
+    None means "not modified" and keeps the previously cached value. Concurrent loads of the
+    same key are coalesced into a single loader call.
+    """
+
+    def __init__(self, ttl=60, refresh_ratio=0.8, max_entries=256):
+        self.ttl = ttl
+        self.refresh_after = ttl * refresh_ratio
+        self.max_entries = max_entries
+        self._entries = {}
+        self._refreshing = set()
+        self._lock = threading.Lock()
+        self._flights = SingleFlight()
+
+    def peek(self, key):
+        """Return the cached entry for `key` regardless of age, or None."""
+        with self._lock:
+            return self._entries.get(key)
+
+    def get(self, key, loader, force=False):
+        """Return a CacheEntry for `key`, loading or refreshing it as needed."""
+        entry = None if force else self.peek(key)
+
+        if entry is not None and entry.age < self.ttl:
+            if entry.age >= self.refresh_after:
+                self._refresh_in_background(key, loader, entry.etag)
+            return entry
+
+        previous = self.peek(key)
+        return self._load(key, loader, previous.etag if previous and not force else None)
+
+    def _load(self, key, loader, etag):
+        return self._flights.do(key, lambda: self._load_now(key, loader, etag))
+
+    def _load_now(self, key, loader, etag):
+        value, new_etag = loader(etag)
+        with self._lock:
+            previous = self._entries.get(key)
+            if value is None and previous is not None:
+                # Upstream answered 304 Not Modified; keep the value, reset its age
+                entry = CacheEntry(previous.value, new_etag or previous.etag)
+            else:
+                entry = CacheEntry(value, new_etag)
+            self._store(key, entry)
+        return entry
+
+    def _store(self, key, entry):
+        if key not in self._entries and len(self._entries) >= self.max_entries:
+            oldest_key = min(self._entries, key=lambda k: self._entries[k].fetched_at)
+            del self._entries[oldest_key]
+        self._entries[key] = entry
+
+    def _refresh_in_background(self, key, loader, etag):
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def refresh():
+            try:
+                self._load(key, loader, etag)
+            except Exception:
+                # Keep serving the current entry; the next expiry retries synchronously
+                pass
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        threading.Thread(target=refresh, daemon=True).start()
+
+    def invalidate(self, key):
+        """Drop a single entry."""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def invalidate_where(self, predicate):
+        """Drop every entry whose key satisfies `predicate(key)`."""
+        with self._lock:
+            for key in [k for k in self._entries if predicate(k)]:
+                del self._entries[key]
+
+
+class StaleCache:
+    """
+    Last good response per key, served while upstream is failing (stale-while-revalidate).
+
+    `get(key, loader)` calls `loader()` and remembers its result. When the loader raises one of
+    `retry_on` and a previous result no older than `max_stale` exists, that result is served
+    instead and a single background thread revalidates the key with jittered exponential
+    backoff. Until it succeeds, further requests for the key are answered from the stale value
+    without calling upstream at all. With nothing to fall back on, the exception propagates.
+
+    `retry_if(error)`, when given, narrows `retry_on`: errors it rejects (an upstream refusing
+    the caller rather than failing) propagate and drop the key's last good value.
+    """
+
+    def __init__(self, retry_on=(Exception,), retry_if=None, base_delay=5, max_delay=300, max_stale=24 * 60 * 60, max_entries=256):
+        self.retry_on = retry_on
+        self.retry_if = retry_if
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_stale = max_stale
+        self.max_entries = max_entries
+        self._entries = {}
+        self._failing = {}  # key -> last error, while a revalidation is pending
+        self._lock = threading.Lock()
+        self._flights = SingleFlight()
+
+    def get(self, key, loader):
+        """
+        Return `(entry, error)`. `error` is None for a fresh result; otherwise it is the
+        upstream failure that `entry` (the last good CacheEntry) is standing in for.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            error = self._failing.get(key)
+        if error is not None and self._usable(entry):
+            return entry, error
+
+        try:
+            value = self._flights.do(key, loader)
+        except self.retry_on as e:
+            if not self._retryable(e):
+                self._forget(key)
+                raise
+            if not self._usable(entry):
+                raise
+            self._start_revalidation(key, loader, e)
+            return entry, e
+        return self._remember(key, value), None
+
+    def _retryable(self, error):
+        return self.retry_if is None or self.retry_if(error)
+
+    def _usable(self, entry):
+        return entry is not None and entry.age <= self.max_stale
+
+    def _forget(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+            self._failing.pop(key, None)
+
+    def _remember(self, key, value):
+        entry = CacheEntry(value)
+        with self._lock:
+            if key not in self._entries and len(self._entries) >= self.max_entries:
+                oldest_key = min(self._entries, key=lambda k: self._entries[k].fetched_at)
+                del self._entries[oldest_key]
+            self._entries[key] = entry
+            self._failing.pop(key, None)
+        return entry
+
+    def _start_revalidation(self, key, loader, error):
+        with self._lock:
+            if key in self._failing:
+                self._failing[key] = error
+                return
+            self._failing[key] = error
+        threading.Thread(target=self._revalidate, args=(key, loader), daemon=True).start()
+
+    def _revalidate(self, key, loader):
+        attempt = 0
+        while True:
+            # Jitter keeps workers that saw the same outage from retrying in lockstep
+            delay = min(self.max_delay, self.base_delay * (2 ** attempt))
+            time.sleep(random.uniform(delay / 2, delay))
+            try:
+                value = self._flights.do(key, loader)
+            except Exception as e:
+                attempt += 1
+                if isinstance(e, self.retry_on) and not self._retryable(e):
+                    # Upstream now refuses the credentials; stop vouching for the old value
+                    self._forget(key)
+                    return
+                with self._lock:
+                    entry = self._entries.get(key)
+                    if self._usable(entry):
+                        self._failing[key] = e
+                        continue
+                    # Too old to serve anyway; let the next request try upstream itself
+                    self._failing.pop(key, None)
+                return
+            self._remember(key, value)
+            return
+
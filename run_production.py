@@ -57,9 +57,11 @@ def run_production_server():
             waitress.serve(app, host="0.0.0.0", port=5001)
     else:
         # On Unix-like systems, use gunicorn
+        # Threaded workers let concurrent identical Jenkins requests share one upstream call
         subprocess.call([
             sys.executable, "-m", "gunicorn", 
             "--bind", "0.0.0.0:5001", 
+            "--threads", os.environ.get("GUNICORN_THREADS", "4"),
             "wsgi:app"
         ])
 
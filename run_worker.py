@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+import os
+
+def run_background_worker():
+    """Run the dashboard snapshot poller, capacity monitor and build-history sync outside the web workers"""
+
+    # The worker owns the pollers; make sure the imported app doesn't start its own copies
+    os.environ["SNAPSHOT_POLLER_IN_PROCESS"] = "false"
+    os.environ["BUILD_SYNC_IN_PROCESS"] = "false"
+    os.environ["CAPACITY_POLLER_IN_PROCESS"] = "false"
+
+    from app import app, snapshot_store, capacity_store
+    from build_sync import BuildSyncer
+    from capacity import CapacityPoller
+    from dashboard_snapshots import SnapshotPoller
+
+    print(f"Starting build sync every {app.config['BUILD_SYNC_INTERVAL']}s...")
+    BuildSyncer(
+        app,
+        interval=app.config['BUILD_SYNC_INTERVAL'],
+        max_history=app.config['BUILD_SYNC_MAX_HISTORY']
+    ).start()
+
+    print(f"Starting capacity samples every {app.config['CAPACITY_INTERVAL']}s...")
+    CapacityPoller(app, capacity_store, interval=app.config['CAPACITY_INTERVAL']).start()
+
+    print(f"Starting dashboard snapshots every {app.config['SNAPSHOT_INTERVAL']}s...")
+    SnapshotPoller(
+        app,
+        snapshot_store,
+        interval=app.config['SNAPSHOT_INTERVAL'],
+        max_workers=app.config['RECENT_BUILDS_WORKERS']
+    ).run_forever()
+
+if __name__ == "__main__":
+    run_background_worker()
@@ -0,0 +1,56 @@
+"""
+Request coalescing: concurrent callers asking for the same key share one upstream call
+"""
+import threading
+
+from circuit_breaker import BudgetExceededError, remaining_budget
+
+
+class _Call:
+    __slots__ = ('done', 'result', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    The first caller for a key runs the function; callers arriving while it is still
+    in flight wait for it and receive the same result (or the same exception).
+    Nothing is remembered once the call finishes, so this is not a cache.
+
+    A waiter gives up with BudgetExceededError once its own request time budget runs out,
+    even though the shared call carries on for the others.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+
+        if not leader:
+            if not call.done.wait(remaining_budget()):
+                raise BudgetExceededError('Request time budget exhausted waiting for a shared upstream call')
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
@@ -10,17 +10,36 @@ if (typeof window.durationTrendChartInstance === 'undefined') {
 // Use window.executionTimeChartInstance instead of a local variable to avoid conflicts
 // with executionTimeAnalyzer.js which also manages this chart
 
+// Build history loaded so far for the charts, extended page by page on demand
+window.buildHistoryState = { jobFullName: null, builds: [], nextCursor: null };
+
+// Fetch one page of a job's build history (newest first); pass nextCursor back for older builds
+async function fetchBuildHistoryPage(jobFullName, cursor = null, limit = 100) {
+    const params = new URLSearchParams({ job_full_name: jobFullName, limit: limit });
+    if (cursor) {
+        params.set('cursor', cursor);
+    }
+    const source = getSelectedJobSource();
+    if (source) {
+        params.set('source', source);
+    }
+    const response = await fetch(`/api/builds/history?${params.toString()}`);
+    if (!response.ok) {
+        throw new Error(`HTTP error ${response.status}`);
+    }
+    const data = await response.json();
+    return { builds: data.builds || [], nextCursor: data.next_cursor || null };
+}
+
 // Fetch build insights (used by charts)
 async function fetchBuildInsightsData(jobFullName) {
     console.log("[DEBUG] Fetching build insights for charts...");
     try {
-        const response = await fetch(`/api/builds?job_full_name=${encodeURIComponent(jobFullName)}`);
-        if (!response.ok) {
-            throw new Error(`HTTP error ${response.status}`);
-        }
-        const data = await response.json();
-        console.log("[DEBUG] Build insights data received:", data);
-        return data.builds || []; // Return builds array or empty array
+        const page = await fetchBuildHistoryPage(jobFullName);
+        console.log("[DEBUG] Build insights data received:", page);
+        window.buildHistoryState = { jobFullName: jobFullName, builds: page.builds, nextCursor: page.nextCursor };
+        updateLoadOlderBuildsButton();
+        return page.builds; // Return builds array or empty array
     } catch (error) {
         console.error('Error fetching build insights:', error);
         showError(`Failed to load build chart data: ${error.message}`, 'build-charts'); // Assuming an error element with id 'build-charts-error'
@@ -28,6 +47,33 @@ async function fetchBuildInsightsData(jobFullName) {
     }
 }
 
+// Show the "load older builds" button only while there is more history to fetch
+function updateLoadOlderBuildsButton() {
+    const button = getElement('load-older-builds-btn');
+    if (button) {
+        button.style.display = window.buildHistoryState.nextCursor ? 'inline-block' : 'none';
+    }
+}
+
+// Fetch the next page of older builds and redraw the trend charts with the extended history
+async function loadOlderBuilds() {
+    const state = window.buildHistoryState;
+    if (!state.jobFullName || !state.nextCursor) {
+        return;
+    }
+    try {
+        const page = await fetchBuildHistoryPage(state.jobFullName, state.nextCursor);
+        state.builds = state.builds.concat(page.builds);
+        state.nextCursor = page.nextCursor;
+        updateLoadOlderBuildsButton();
+        renderSuccessRateChart(state.builds);
+        renderDurationTrendChart(state.builds);
+    } catch (error) {
+        console.error('Error loading older builds:', error);
+        showError(`Failed to load older builds: ${error.message}`, 'build-charts');
+    }
+}
+
 // Renders all build-related charts
 async function renderBuildCharts(jobFullName) {
     const builds = await fetchBuildInsightsData(jobFullName);
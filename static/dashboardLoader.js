@@ -22,19 +22,23 @@ function initializeApp() {
 }
 
 // Function to load/refresh dashboard data
-function loadDashboard() {
+async function loadDashboard() {
     console.log('>>> loadDashboard called via dashboardLoader.js');
+
+    // One request for jobs, overview, recent builds and the latest job's builds;
+    // null means each handler fetches its own endpoint as before
+    const bootstrap = await loadDashboardBootstrap(true);
     
     // First load the overview data
     if (typeof fetchAndDisplayOverview === 'function') {
         console.log('Fetching overview data...');
-        fetchAndDisplayOverview();
+        fetchAndDisplayOverview(bootstrap ? bootstrap.overview : null);
     }
     
     // Call fetchJobs from jobListHandler.js (ensure it's loaded first)
     if (typeof fetchJobs === 'function') {
         console.log('Fetching jobs and auto-selecting latest...');
-        fetchJobs();
+        fetchJobs(bootstrap);
     } else {
         console.error('ERROR: fetchJobs function not found. Is jobListHandler.js loaded?');
         showError('Initialization Error: Cannot load job list.', 'job-list');
@@ -69,7 +73,7 @@ function setupEventListeners() {
     // Refresh button
     const refreshDashboardBtn = getElement('refresh-dashboard');
     if (refreshDashboardBtn) {
-        refreshDashboardBtn.addEventListener('click', loadDashboard);
+        refreshDashboardBtn.addEventListener('click', () => loadDashboard());
     }
 
     // We don't need job list delegation anymore since we're using a dropdown
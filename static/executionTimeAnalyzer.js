@@ -64,20 +64,28 @@ async function loadExecutionTimeChart() {
         let data = null;
         let errorMessage = null;
         
-        // Try main recent builds API first
-        try {
-            const response = await fetch('/api/jenkins/recent_builds');
+        // Reuse the recent builds from a fresh dashboard bootstrap; reloads fetch their own
+        data = await takeBootstrapRecentBuilds();
+        if (data) {
+            console.log('[ExecutionTimeAnalyzer] Got data from dashboard bootstrap');
+        }
+
+        // Otherwise try main recent builds API first
+        if (!data) {
+            try {
+                const response = await fetch('/api/jenkins/recent_builds');
             
-            if (response.ok) {
-                data = await response.json();
-                console.log('[ExecutionTimeAnalyzer] Got data from recent_builds API');
-            } else {
-                errorMessage = `HTTP error! status: ${response.status}`;
-                console.warn('[ExecutionTimeAnalyzer] Recent builds API error:', errorMessage);
+                if (response.ok) {
+                    data = await response.json();
+                    console.log('[ExecutionTimeAnalyzer] Got data from recent_builds API');
+                } else {
+                    errorMessage = `HTTP error! status: ${response.status}`;
+                    console.warn('[ExecutionTimeAnalyzer] Recent builds API error:', errorMessage);
+                }
+            } catch (e) {
+                console.warn('[ExecutionTimeAnalyzer] Error fetching from recent_builds:', e);
+                errorMessage = e.message;
             }
-        } catch (e) {
-            console.warn('[ExecutionTimeAnalyzer] Error fetching from recent_builds:', e);
-            errorMessage = e.message;
         }
         
         // If the first API failed, try the current job data as fallback
@@ -116,17 +116,26 @@ async function fetchLatestBuildInfo(jobFullName) {
     let success = false; // Track if we successfully get build info
 
     try {
-        // API call expects job_full_name
-        const response = await fetch(`/api/builds?job_full_name=${encodeURIComponent(jobFullName)}`);
-        if (!response.ok) {
-            let errorMsg = `Error fetching builds: ${response.status}`;
-            try {
-                 const errData = await response.json();
-                 errorMsg += `: ${errData.error || 'Unknown API error'}`;
-            } catch(e){/* ignore */}
-            throw new Error(errorMsg);
+        // The job preselected on load already has its builds in the bootstrap payload
+        let data = takeBootstrapBuilds(jobFullName);
+        if (!data) {
+            // API call expects job_full_name (plus the controller for merged job lists)
+            const params = new URLSearchParams({ job_full_name: jobFullName });
+            const source = getSelectedJobSource();
+            if (source) {
+                params.set('source', source);
+            }
+            const response = await fetch(`/api/builds?${params.toString()}`);
+            if (!response.ok) {
+                let errorMsg = `Error fetching builds: ${response.status}`;
+                try {
+                     const errData = await response.json();
+                     errorMsg += `: ${errData.error || 'Unknown API error'}`;
+                } catch(e){/* ignore */}
+                throw new Error(errorMsg);
+            }
+            data = await response.json();
         }
-        const data = await response.json();
 
         if (data.builds && data.builds.length > 0) {
              // Store the URL for the absolute latest build (index 0)
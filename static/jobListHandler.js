@@ -4,18 +4,36 @@
 let jobDropdownInitialized = false;
 let jobsFetchInProgress = false;
 
-// Fetch the list of jobs from the API
-async function fetchJobs() {
-  // Prevent multiple concurrent fetches
-  if (jobsFetchInProgress) {
-    console.log("Job fetch already in progress, skipping duplicate call");
-    return;
+// The dropdown shows one folder level at a time; folders are expanded on demand
+let currentJobFolder = '';      // Full name of the folder shown ('' is the root)
+let currentJobSource = null;    // Controller the folder belongs to (merged multi-controller trees only)
+let currentJobPage = null;      // Last /api/jobs/browse page, for "Load more"
+
+// Fetch one page of a folder's direct children from /api/jobs/browse
+async function fetchJobFolder(folder = '', source = null, offset = 0, refresh = false) {
+  const params = new URLSearchParams({ folder: folder, offset: offset });
+  if (source) {
+    params.set('source', source);
   }
-  
-  jobsFetchInProgress = true;
-  console.log("Fetching jobs...");
-  
-  // No longer need job-loading-indicator since we removed it from the template
+  if (refresh) {
+    params.set('refresh', 'true');
+  }
+
+  const response = await fetch(`/api/jobs/browse?${params}`);
+  if (!response.ok) {
+    // Try to get more specific error message from the response body
+    let errorMsg = `HTTP Error: ${response.status}`;
+    try {
+      const errorData = await response.json();
+      errorMsg += `: ${errorData.error || 'Unknown API error'}`;
+    } catch (e) { /* Ignore if response is not JSON */ }
+    throw new Error(errorMsg);
+  }
+  return response.json();
+}
+
+// Put the dropdown into its loading state; returns false if the dropdown is missing
+function showJobDropdownLoading() {
   const jobListError = getElement("job-list-error");
   const jobDropdown = getElement("job-dropdown");
   
@@ -24,70 +42,77 @@ async function fetchJobs() {
     jobListError.style.display = "none";
   }
   
-  // Add loading state to dropdown
-  if (jobDropdown) {
-    jobDropdown.disabled = true;
-    const loadingOption = document.createElement('option');
-    loadingOption.textContent = 'Loading jobs...';
-    loadingOption.disabled = true; // Make sure this option can't be selected
-    loadingOption.value = ''; // Set empty value to prevent selection
-    
-    // Keep track of current selection
-    const currentSelection = jobDropdown.value;
-    
-    // Clear dropdown except for the placeholder
-    while (jobDropdown.options.length > 1) {
-      jobDropdown.remove(1);
-    }
-    // Add the loading indicator
-    jobDropdown.appendChild(loadingOption);
-  } else {
+  if (!jobDropdown) {
     console.error("Job dropdown element not found");
+    return false;
+  }
+
+  jobDropdown.disabled = true;
+  const loadingOption = document.createElement('option');
+  loadingOption.textContent = 'Loading jobs...';
+  loadingOption.disabled = true; // Make sure this option can't be selected
+  loadingOption.value = ''; // Set empty value to prevent selection
+  
+  // Clear dropdown except for the placeholder
+  while (jobDropdown.options.length > 1) {
+    jobDropdown.remove(1);
+  }
+  jobDropdown.querySelectorAll('optgroup').forEach(group => group.remove());
+  // Add the loading indicator
+  jobDropdown.appendChild(loadingOption);
+  return true;
+}
+
+// Fetch the root level of the job tree from the API, or take it from a dashboard bootstrap payload
+async function fetchJobs(bootstrap = null) {
+  // Prevent multiple concurrent fetches
+  if (jobsFetchInProgress) {
+    console.log("Job fetch already in progress, skipping duplicate call");
+    return;
+  }
+  
+  jobsFetchInProgress = true;
+  console.log("Fetching jobs...");
+  
+  if (!showJobDropdownLoading()) {
     jobsFetchInProgress = false;
     return; // Exit early if we can't find it
   }
 
   try {
-    // Fetch both jobs and recent builds (for latest job)
-    const [jobsResponse, recentBuildsResponse] = await Promise.all([
-      fetch("/api/jobs"),
-      fetch("/api/jenkins/recent_builds")
-    ]);
-
-    if (!jobsResponse.ok) {
-      // Try to get more specific error message from the response body
-      let errorMsg = `HTTP Error: ${jobsResponse.status}`; 
-      try {
-        const errorData = await jobsResponse.json();
-        errorMsg += `: ${errorData.error || 'Unknown API error'}`;
-      } catch (e) { /* Ignore if response is not JSON */ }
-      throw new Error(errorMsg);
+    let page;
+    let recentBuildsData = null;
+
+    if (bootstrap) {
+      if (bootstrap.jobs.error) {
+        throw new Error(bootstrap.jobs.error);
+      }
+      page = bootstrap.jobs;
+      recentBuildsData = bootstrap.recent_builds;
+    } else {
+      // Fetch both the root level and recent builds (for latest job)
+      const [rootPage, recentBuildsResponse] = await Promise.all([
+        fetchJobFolder(),
+        fetch("/api/jenkins/recent_builds")
+      ]);
+      page = rootPage;
+      if (recentBuildsResponse.ok) {
+        recentBuildsData = await recentBuildsResponse.json();
+      }
     }
-    
-    const data = await jobsResponse.json();
+
     let latestJob = null;
     
     // Process recent builds to find the latest job if possible
-    if (recentBuildsResponse.ok) {
-      const recentBuildsData = await recentBuildsResponse.json();
-      if (recentBuildsData.builds && recentBuildsData.builds.length > 0) {
-        // Sort by timestamp (newest first)
-        const sortedBuilds = recentBuildsData.builds.sort((a, b) => b.timestamp - a.timestamp);
-        if (sortedBuilds[0] && sortedBuilds[0].job) {
-          latestJob = sortedBuilds[0].job;
-        }
+    if (recentBuildsData && recentBuildsData.builds && recentBuildsData.builds.length > 0) {
+      // Sort by timestamp (newest first)
+      const sortedBuilds = recentBuildsData.builds.sort((a, b) => b.timestamp - a.timestamp);
+      if (sortedBuilds[0] && sortedBuilds[0].job_name) {
+        latestJob = { fullName: sortedBuilds[0].job_name, source: sortedBuilds[0].source || null };
       }
     }
 
-    if (data.jobs && data.jobs.length > 0) {
-      populateJobDropdown(data.jobs, latestJob);
-    } else {
-      const noJobsOption = document.createElement('option');
-      noJobsOption.textContent = 'No jobs found';
-      noJobsOption.disabled = true;
-      jobDropdown.appendChild(noJobsOption);
-      jobDropdown.disabled = false;
-    }
+    populateJobDropdown(page, latestJob);
   } catch (error) {
     console.error("Error fetching jobs:", error);
     // Use the showError utility function
@@ -97,8 +122,92 @@ async function fetchJobs() {
   }
 }
 
-// Populate the job dropdown from the fetched data
-function populateJobDropdown(jobs, latestJob = null) {
+// Show another folder level in the dropdown
+async function browseJobFolder(folder, source = null, refresh = false) {
+  if (jobsFetchInProgress) {
+    return;
+  }
+  jobsFetchInProgress = true;
+
+  if (!showJobDropdownLoading()) {
+    jobsFetchInProgress = false;
+    return;
+  }
+
+  try {
+    populateJobDropdown(await fetchJobFolder(folder, source, 0, refresh));
+  } catch (error) {
+    console.error("Error browsing jobs:", error);
+    showError(`Failed to load jobs: ${error.message}`, "job-list");
+  } finally {
+    jobsFetchInProgress = false;
+  }
+}
+
+// Append the next page of the current folder
+async function loadMoreJobs() {
+  const jobDropdown = getElement("job-dropdown");
+  if (!jobDropdown || !currentJobPage || currentJobPage.next_offset == null || jobsFetchInProgress) {
+    return;
+  }
+  jobsFetchInProgress = true;
+
+  try {
+    const page = await fetchJobFolder(currentJobFolder, currentJobSource, currentJobPage.next_offset);
+    const moreOption = jobDropdown.querySelector('option[data-browse="more"]');
+    const container = moreOption ? moreOption.parentNode : jobDropdown;
+    if (moreOption) {
+      moreOption.remove();
+    }
+    page.jobs.forEach((entry) => container.appendChild(createJobOption(entry)));
+    appendLoadMoreOption(container, page);
+    currentJobPage = page;
+    jobDropdown.value = '';
+  } catch (error) {
+    console.error("Error loading more jobs:", error);
+    showError(`Failed to load jobs: ${error.message}`, "job-list");
+  } finally {
+    jobsFetchInProgress = false;
+  }
+}
+
+// Option for one folder or job of a browse page
+function createJobOption(entry) {
+  const option = document.createElement("option");
+  if (entry.source) {
+    option.setAttribute('data-source', entry.source);
+  }
+
+  if (entry.is_folder) {
+    const count = entry.child_count != null ? ` (${entry.child_count})` : '';
+    option.value = `folder:${entry.source || ''}:${entry.fullName}`;
+    option.textContent = `\u{1F4C1} ${entry.name}${count}`;
+    option.setAttribute('data-browse', 'folder');
+    option.setAttribute('data-folder', entry.fullName);
+    return option;
+  }
+
+  option.value = entry.fullName;
+  option.textContent = entry.name;
+  // Store the full path as a data attribute
+  option.setAttribute('data-url', entry.url);
+  option.setAttribute('title', entry.fullName); // Add tooltip with full name
+  return option;
+}
+
+function appendLoadMoreOption(container, page) {
+  if (page.next_offset == null) {
+    return;
+  }
+  const option = document.createElement("option");
+  option.value = 'more:';
+  option.textContent = `Load more... (${page.next_offset} of ${page.total} shown)`;
+  option.setAttribute('data-browse', 'more');
+  container.appendChild(option);
+}
+
+// Populate the job dropdown with one folder level from /api/jobs/browse
+function populateJobDropdown(page, latestJob = null) {
   const jobDropdown = getElement("job-dropdown");
   
   if (!jobDropdown) {
@@ -108,77 +217,53 @@ function populateJobDropdown(jobs, latestJob = null) {
   
   // Re-enable the dropdown in case it was disabled during loading
   jobDropdown.disabled = false;
+  // Drop the loading indicator, keep the placeholder
+  while (jobDropdown.options.length > 1) {
+    jobDropdown.remove(1);
+  }
+  jobDropdown.querySelectorAll('optgroup').forEach(group => group.remove());
 
-  // Group jobs by folder structure
-  const jobGroups = {};
-  
-  jobs.forEach((job) => {
-    const fullName = job.fullName || "";
-    const parts = fullName.split('/');
-    
-    // If the job is in a folder
-    if (parts.length > 1) {
-      const folder = parts.slice(0, -1).join('/');
-      if (!jobGroups[folder]) {
-        jobGroups[folder] = [];
-      }
-      jobGroups[folder].push(job);
-    } else {
-      // Root level jobs
-      if (!jobGroups["Root"]) {
-        jobGroups["Root"] = [];
-      }
-      jobGroups["Root"].push(job);
-    }
-  });
-  
-  // Sort groups alphabetically
-  const sortedGroups = Object.keys(jobGroups).sort((a, b) => {
-    // Move Root to the top
-    if (a === "Root") return -1;
-    if (b === "Root") return 1;
-    return a.localeCompare(b);
-  });
-  
-  // Create optgroups for each folder
-  sortedGroups.forEach((group) => {
-    // Skip creating optgroup for "Root" if it's the only group
-    const isRoot = group === "Root";
-    let optgroup = null;
-    
-    if (!isRoot || sortedGroups.length > 1) {
-      optgroup = document.createElement("optgroup");
-      optgroup.label = isRoot ? "Root Jobs" : group;
-      jobDropdown.appendChild(optgroup);
-    }
-    
-    // Sort jobs within each group
-    jobGroups[group].sort((a, b) => {
-      const nameA = a.fullName || "";
-      const nameB = b.fullName || "";
-      return nameA.localeCompare(nameB);
-    });
-    
-    // Add job options
-    jobGroups[group].forEach((job) => {
-      const option = document.createElement("option");
-      option.value = job.fullName;
-      
-      // For jobs in folders, only show the job name, not the full path
-      const parts = job.fullName.split('/');
-      option.textContent = isRoot ? job.fullName : parts[parts.length - 1];
-      
-      // Store the full path as a data attribute
-      option.setAttribute('data-url', job.url);
-      option.setAttribute('title', job.fullName); // Add tooltip with full name
-      
-      if (optgroup) {
-        optgroup.appendChild(option);
-      } else {
-        jobDropdown.appendChild(option);
-      }
+  currentJobFolder = page.folder || '';
+  currentJobSource = page.source || null;
+  currentJobPage = page;
+
+  // The latest job may live in a folder that isn't expanded; offer it directly
+  if (latestJob && !page.jobs.some(entry => !entry.is_folder && entry.fullName === latestJob.fullName)) {
+    const latestGroup = document.createElement("optgroup");
+    latestGroup.label = "Latest Build";
+    const option = createJobOption({
+      name: latestJob.fullName,
+      fullName: latestJob.fullName,
+      url: '',
+      source: latestJob.source
     });
-  });
+    latestGroup.appendChild(option);
+    jobDropdown.appendChild(latestGroup);
+  }
+
+  // Label the level with its location, prefixed by the controller host in merged trees
+  const hostPrefix = currentJobSource ? `${new URL(currentJobSource).host} / ` : "";
+  const optgroup = document.createElement("optgroup");
+  optgroup.label = currentJobFolder || currentJobSource ? hostPrefix + (currentJobFolder || "Root Jobs") : "Root Jobs";
+  jobDropdown.appendChild(optgroup);
+
+  if (currentJobFolder || currentJobSource) {
+    const upOption = document.createElement("option");
+    upOption.value = 'up:';
+    upOption.textContent = '\u2B11 Up one level';
+    upOption.setAttribute('data-browse', 'up');
+    optgroup.appendChild(upOption);
+  }
+
+  if (page.jobs.length === 0) {
+    const noJobsOption = document.createElement('option');
+    noJobsOption.textContent = 'No jobs found';
+    noJobsOption.disabled = true;
+    optgroup.appendChild(noJobsOption);
+  }
+
+  page.jobs.forEach((entry) => optgroup.appendChild(createJobOption(entry)));
+  appendLoadMoreOption(optgroup, page);
 
   // Make sure only one event listener is added
   if (!jobDropdownInitialized) {
@@ -195,63 +280,48 @@ function populateJobDropdown(jobs, latestJob = null) {
   
   // Auto-select the latest job if provided
   if (latestJob) {
-    // Find the option with the matching value
-    const option = Array.from(jobDropdown.options).find(opt => 
-      opt.value === latestJob
+    const option = Array.from(jobDropdown.options).find(opt =>
+      !opt.hasAttribute('data-browse') && opt.value === latestJob.fullName
     );
-    
     if (option) {
-      console.log(`Auto-selecting latest job: ${latestJob}`);
-      // Set the dropdown value
-      jobDropdown.value = latestJob;
+      console.log(`Auto-selecting latest job: ${latestJob.fullName}`);
+      jobDropdown.value = latestJob.fullName;
       
       // Create and dispatch change event
       const changeEvent = new Event('change', { bubbles: true });
       jobDropdown.dispatchEvent(changeEvent);
-    } else {
-      console.warn(`Latest job ${latestJob} not found in dropdown options, checking for partial match`);
-      
-      // Try a partial match in case of folder structure differences
-      const allOptions = Array.from(jobDropdown.options);
-      const partialMatch = allOptions.find(opt => 
-        latestJob.includes(opt.value) || opt.value.includes(latestJob)
-      );
-      
-      if (partialMatch) {
-        console.log(`Found partial match for latest job: ${partialMatch.value}`);
-        jobDropdown.value = partialMatch.value;
-        const changeEvent = new Event('change', { bubbles: true });
-        jobDropdown.dispatchEvent(changeEvent);
-      } else {
-        console.warn(`No match found for latest job ${latestJob}`);
-      }
     }
   } else {
-    console.log("No latest job provided, selecting the first non-disabled option");
-    // Select the first non-disabled option as fallback
-    const firstValidOption = Array.from(jobDropdown.options).find(opt => !opt.disabled);
-    if (firstValidOption) {
-      jobDropdown.value = firstValidOption.value;
-      const changeEvent = new Event('change', { bubbles: true });
-      jobDropdown.dispatchEvent(changeEvent);
-    }
+    // Navigating between folders keeps the placeholder until a job is picked
+    jobDropdown.value = '';
   }
 }
 
 // Handle job selection - separate function to avoid duplicate listeners
 function handleJobSelection() {
   const selectedJobFullName = this.value;
+  const selectedOption = this.selectedOptions[0];
   console.log("Job selected:", selectedJobFullName);
+
+  // Folder, "up" and "load more" entries navigate the tree instead of selecting a job
+  const browseAction = selectedOption ? selectedOption.getAttribute('data-browse') : null;
+  if (browseAction === 'folder') {
+    browseJobFolder(selectedOption.getAttribute('data-folder'), selectedOption.getAttribute('data-source'));
+    return;
+  }
+  if (browseAction === 'up') {
+    // From a controller's root, go back to the list of controllers
+    const parent = currentJobFolder.includes('/') ? currentJobFolder.slice(0, currentJobFolder.lastIndexOf('/')) : '';
+    browseJobFolder(parent, currentJobFolder ? currentJobSource : null);
+    return;
+  }
+  if (browseAction === 'more') {
+    loadMoreJobs();
+    return;
+  }
   
   // Validate the selection - make sure it's not empty, "Loading jobs...", or other placeholder
-  if (selectedJobFullName && selectedJobFullName !== '' && !this.selectedOptions[0].disabled) {
-    // Double-check the selection is valid
-    const selectedOption = this.selectedOptions[0];
-    if (!selectedOption || selectedOption.disabled) {
-      console.warn("Selected invalid or disabled option, ignoring selection");
-      return;
-    }
-    
+  if (selectedJobFullName && selectedJobFullName !== '' && !selectedOption.disabled) {
     console.log("Valid job selected:", selectedJobFullName);
     
     // Dispatch a custom event that both old and new components can listen to
@@ -271,7 +341,7 @@ function handleJobSelection() {
     }
   } else {
     console.warn("Invalid job selection, value:", selectedJobFullName, 
-                "Disabled:", this.selectedOptions[0]?.disabled);
+                "Disabled:", selectedOption?.disabled);
   }
 }
 
@@ -284,18 +354,15 @@ document.addEventListener("DOMContentLoaded", function() {
   if (refreshBtn) {
     console.log("Dashboard found, initializing...");
     
-    // Set up main refresh button
-    refreshBtn.addEventListener("click", function() {
-      console.log("Refresh button clicked");
-      fetchJobs();
-    });
+    // The main refresh button reloads the whole dashboard (dashboardLoader.js)
     
     // Set up the jobs-specific refresh button
     const refreshJobsBtn = document.querySelector('.refresh-jobs-btn');
     if (refreshJobsBtn) {
       refreshJobsBtn.addEventListener('click', function() {
         console.log("Jobs refresh button clicked");
-        fetchJobs();
+        // Reload the folder being shown straight from Jenkins
+        browseJobFolder(currentJobFolder, currentJobSource, true);
       });
     }
     
@@ -324,10 +391,7 @@ document.addEventListener("DOMContentLoaded", function() {
     // Clean up any remaining spinners or loading indicators
     cleanupSpinners();
     
-    // Initial fetch only if not already done
-    if (!jobsFetchInProgress) {
-      fetchJobs();
-    }
+    // The initial fetch is done by loadDashboard() in dashboardLoader.js from the bootstrap payload
   }
 });
 
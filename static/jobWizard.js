@@ -1,4 +1,8 @@
 // Job Wizard for unified Jenkins job viewing
+
+// Console log bytes fetched with the job bundle; the Logs tab shows this tail
+const WIZARD_LOG_TAIL_BYTES = 64 * 1024;
+
 class JobWizard {
     constructor() {
         // UI state
@@ -53,16 +57,17 @@ class JobWizard {
     loadJobData() {
         this.showLoading();
         
-        // Fetch job details
-        fetch(`/api/job/${encodeURIComponent(this.jobData.jobName)}`)
+        // Job details, tests, timeline and the log tail of the latest build in one request
+        fetch(`/api/job/${encodeURIComponent(this.jobData.jobName)}/bundle?log_tail=${WIZARD_LOG_TAIL_BYTES}`)
             .then(response => {
                 if (!response.ok) {
                     throw new Error(`HTTP error! Status: ${response.status}`);
                 }
                 return response.json();
             })
-            .then(data => {
-                this.jobData = { ...this.jobData, ...data };
+            .then(bundle => {
+                this.jobData = { ...this.jobData, ...bundle.job };
+                this.applyBundleSections(bundle);
                 this.updateBuildInfo();
                 this.hideLoading();
             })
@@ -73,6 +78,34 @@ class JobWizard {
             });
     }
 
+    // Sections that failed in the bundle are left unloaded so their tab fetches them on its own
+    applyBundleSections(bundle) {
+        const loaded = this.jobData.dataLoaded;
+        loaded.tests = loaded.logs = loaded.timeline = false;
+
+        if (bundle.tests && !bundle.tests.error) {
+            this.jobData.testResults = bundle.tests;
+            loaded.tests = true;
+            this.updateTestResults();
+        }
+        if (Array.isArray(bundle.timeline)) {
+            this.jobData.timelineSteps = bundle.timeline;
+            loaded.timeline = true;
+            this.updateTimeline();
+        }
+        if (bundle.log && !bundle.log.error) {
+            const kb = Math.round(WIZARD_LOG_TAIL_BYTES / 1024);
+            this.jobData.logContent = bundle.log.truncated
+                ? `... showing the last ${kb} KB of the console log ...\n${bundle.log.text}`
+                : bundle.log.text;
+            loaded.logs = true;
+            const logContent = document.getElementById('log-content');
+            if (logContent) {
+                logContent.textContent = this.jobData.logContent;
+            }
+        }
+    }
+
     updateBuildInfo() {
         const buildInfo = document.getElementById('build-info');
         if (!buildInfo) return;
@@ -144,8 +144,8 @@ function generateSampleActivityData() {
     return { labels, successful, failed };
 }
 
-// Function to fetch and display Jenkins overview data
-async function fetchAndDisplayOverview() {
+// Function to fetch and display Jenkins overview data (or render an already fetched payload)
+async function fetchAndDisplayOverview(prefetched = null) {
     // Show loading state
     const overviewContainer = document.getElementById('overview-container');
     if (overviewContainer) {
@@ -160,46 +160,49 @@ async function fetchAndDisplayOverview() {
     }
 
     try {
-        const response = await fetch('/api/jenkins/overview', {
-            method: 'GET',
-            headers: {
-                'Accept': 'application/json'
-            },
-            credentials: 'same-origin'
-        });
+        let data = prefetched;
+        if (!data) {
+            const response = await fetch('/api/jenkins/overview', {
+                method: 'GET',
+                headers: {
+                    'Accept': 'application/json'
+                },
+                credentials: 'same-origin'
+            });
 
-        // Get the content type before trying to read the body
-        const contentType = response.headers.get('content-type');
-        const isJson = contentType && contentType.includes('application/json');
+            // Get the content type before trying to read the body
+            const contentType = response.headers.get('content-type');
+            const isJson = contentType && contentType.includes('application/json');
         
-        // Check if response is OK
-        if (!response.ok) {
-            if (isJson) {
-                // If it's JSON, parse it
-                const errorData = await response.json();
-                throw new Error(errorData.error || `Server returned ${response.status}: ${response.statusText}`);
-            } else {
-                // If not JSON, get the text content
-                const textContent = await response.text();
-                console.error('[Overview] Non-JSON error response:', textContent.substring(0, 200));
-                
-                if (response.status === 404) {
-                    displayError('Jenkins overview endpoint not found. Please check if the server is running and the endpoint is properly configured.');
+            // Check if response is OK
+            if (!response.ok) {
+                if (isJson) {
+                    // If it's JSON, parse it
+                    const errorData = await response.json();
+                    throw new Error(errorData.error || `Server returned ${response.status}: ${response.statusText}`);
                 } else {
-                    throw new Error(`Server returned ${response.status}: ${response.statusText}. The server might be down or not properly configured.`);
+                    // If not JSON, get the text content
+                    const textContent = await response.text();
+                    console.error('[Overview] Non-JSON error response:', textContent.substring(0, 200));
+                
+                    if (response.status === 404) {
+                        displayError('Jenkins overview endpoint not found. Please check if the server is running and the endpoint is properly configured.');
+                    } else {
+                        throw new Error(`Server returned ${response.status}: ${response.statusText}. The server might be down or not properly configured.`);
+                    }
+                    return;
                 }
-                return;
             }
-        }
 
-        // If we get here, response is OK
-        if (!isJson) {
-            const textContent = await response.text();
-            console.error('[Overview] Non-JSON response:', textContent.substring(0, 200));
-            throw new Error('Server returned non-JSON response. Please check your Jenkins configuration.');
-        }
+            // If we get here, response is OK
+            if (!isJson) {
+                const textContent = await response.text();
+                console.error('[Overview] Non-JSON response:', textContent.substring(0, 200));
+                throw new Error('Server returned non-JSON response. Please check your Jenkins configuration.');
+            }
 
-        const data = await response.json();
+            data = await response.json();
+        }
         
         // Handle different status cases
         switch (data.status) {
@@ -211,15 +214,17 @@ async function fetchAndDisplayOverview() {
                 displayError(data.error || 'An error occurred while fetching Jenkins overview');
                 break;
             
-            case 'mock':
-                displayWarning('Using mock data because Jenkins is not accessible. Please check your Jenkins configuration.');
-                updateOverviewStats(data);
-                updateRecentBuilds(data.recent_builds);
-                break;
-            
             case 'success':
                 updateOverviewStats(data);
                 updateRecentBuilds(data.recent_builds);
+                if (data.stale) {
+                    // Last good data, served while Jenkins is unreachable
+                    displayWarning(`Jenkins is not responding; showing data from ${Math.round(data.age / 60)} min ago.`);
+                }
+                if (data.partial) {
+                    const missing = data.controllers.filter(c => c.status !== 'ok').map(c => c.source);
+                    displayWarning(`No response from ${missing.join(', ')}; totals cover the other controllers only.`);
+                }
                 break;
             
             default:
@@ -314,17 +319,7 @@ function formatTimestamp(timestamp) {
     return date.toLocaleString();
 }
 
-// Fetch overview data when the page loads
-document.addEventListener('DOMContentLoaded', () => {
-    // Check if we are on the dashboard page by looking for a dashboard-specific element
-    // This prevents trying to load overview data on other pages like Settings
-    if (getElement('job-dropdown')) { 
-        console.log("[Overview] Dashboard page detected, fetching overview data");
-        fetchAndDisplayOverview();
-    } else {
-        console.log("[Overview] Not on dashboard page, skipping overview fetch.");
-    }
-});
+// The initial overview is rendered by loadDashboard() in dashboardLoader.js from the bootstrap payload
 
 // Retry if there's a failure - some components might load asynchronously
 setTimeout(() => {
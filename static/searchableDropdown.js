@@ -1,94 +1,138 @@
+// --- Job Search ---
+// Searches all jobs on the server (/api/jobs/search) instead of filtering the loaded list in the browser
+
+const JOB_SEARCH_DEBOUNCE_MS = 150;
+const JOB_SEARCH_LIMIT = 15;
+
 document.addEventListener("DOMContentLoaded", function() {
-  // Try to create a styled search box for job selection
-  try {
-    const jobDropdown = document.getElementById("job-dropdown");
-    if (jobDropdown) {
-      // Load Select2 library dynamically if not already present
-      if (typeof $ === "undefined" || typeof $.fn.select2 === "undefined") {
-        console.log("Loading Select2 dynamically...");
-        
-        // Add CSS
-        const linkElem = document.createElement("link");
-        linkElem.rel = "stylesheet";
-        linkElem.href = "https://cdn.jsdelivr.net/npm/select2@4.1.0-rc.0/dist/css/select2.min.css";
-        document.head.appendChild(linkElem);
-        
-        // Add jQuery if needed
-        if (typeof $ === "undefined") {
-          const jqueryScript = document.createElement("script");
-          jqueryScript.src = "https://code.jquery.com/jquery-3.6.0.min.js";
-          jqueryScript.onload = function() {
-            // After jQuery loads, load Select2
-            const select2Script = document.createElement("script");
-            select2Script.src = "https://cdn.jsdelivr.net/npm/select2@4.1.0-rc.0/dist/js/select2.min.js";
-            select2Script.onload = initSelect2;
-            document.head.appendChild(select2Script);
-          };
-          document.head.appendChild(jqueryScript);
-        } else {
-          // jQuery exists, just load Select2
-          const select2Script = document.createElement("script");
-          select2Script.src = "https://cdn.jsdelivr.net/npm/select2@4.1.0-rc.0/dist/js/select2.min.js";
-          select2Script.onload = initSelect2;
-          document.head.appendChild(select2Script);
-        }
-      } else {
-        // Select2 already loaded
-        initSelect2();
-      }
-      
-      function initSelect2() {
-        console.log("Initializing Select2...");
+  const searchInput = document.getElementById("job-search");
+  const resultsList = document.getElementById("job-search-results");
+  if (!searchInput || !resultsList) {
+    return;
+  }
+
+  let debounceTimer = null;
+  let activeSearch = null; // AbortController of the request in flight
+  let lastResults = [];
+
+  searchInput.addEventListener("input", function() {
+    clearTimeout(debounceTimer);
+    debounceTimer = setTimeout(() => runJobSearch(searchInput.value), JOB_SEARCH_DEBOUNCE_MS);
+  });
+
+  searchInput.addEventListener("keydown", function(event) {
+    if (event.key === "Escape") {
+      hideResults();
+    } else if (event.key === "Enter" && lastResults.length > 0) {
+      event.preventDefault();
+      selectSearchResult(lastResults[0]);
+    }
+  });
+
+  // Close the results when clicking anywhere else
+  document.addEventListener("click", function(event) {
+    if (!resultsList.contains(event.target) && event.target !== searchInput) {
+      hideResults();
+    }
+  });
+
+  async function runJobSearch(query) {
+    if (activeSearch) {
+      activeSearch.abort();
+    }
+    if (!query.trim()) {
+      hideResults();
+      return;
+    }
+
+    activeSearch = new AbortController();
+    try {
+      const params = new URLSearchParams({ q: query, limit: JOB_SEARCH_LIMIT });
+      const response = await fetch(`/api/jobs/search?${params}`, { signal: activeSearch.signal });
+      if (!response.ok) {
+        let errorMsg = `HTTP Error: ${response.status}`;
         try {
-          // Initialize Select2
-          $(jobDropdown).select2({
-            placeholder: "Choose a Jenkins job...",
-            allowClear: true,
-            width: "100%",
-            theme: "bootstrap-5"
-          });
-          
-          // Make it work with Bootstrap styles
-          const select2Container = $(jobDropdown).next(".select2-container");
-          select2Container.addClass("form-control-lg");
-          
-          // Add some custom styles
-          const style = document.createElement("style");
-          style.textContent = `
-            .select2-container--bootstrap-5 .select2-selection {
-              height: auto \!important;
-              padding: 0.5rem 1rem;
-              font-size: 1.1rem;
-              border-radius: 0.3rem;
-            }
-            .select2-container--bootstrap-5 .select2-selection--single .select2-selection__rendered {
-              padding-left: 0;
-              color: #212529;
-            }
-            .select2-container--bootstrap-5 .select2-results__option--highlighted[aria-selected] {
-              background-color: #0d6efd;
-            }
-            .select2-container--bootstrap-5 .select2-search--dropdown .select2-search__field {
-              border: 1px solid #ced4da;
-              border-radius: 0.25rem;
-              padding: 0.5rem;
-            }
-            .select2-container--bootstrap-5 .select2-results__group {
-              font-weight: bold;
-              padding: 0.75rem 0.25rem;
-              color: #0d6efd;
-              background-color: #f8f9fa;
-            }
-          `;
-          document.head.appendChild(style);
-          
-          console.log("Select2 initialized successfully");
-        } catch (error) {
-          console.error("Failed to initialize Select2:", error);
-        }
+          const errorData = await response.json();
+          errorMsg += `: ${errorData.error || 'Unknown API error'}`;
+        } catch (e) { /* Ignore if response is not JSON */ }
+        throw new Error(errorMsg);
+      }
+      const data = await response.json();
+      renderResults(data.jobs || []);
+    } catch (error) {
+      if (error.name === "AbortError") {
+        return; // Superseded by a newer query
+      }
+      console.error("Error searching jobs:", error);
+      showError(`Job search failed: ${error.message}`, "job-list");
+    }
+  }
+
+  function renderResults(jobs) {
+    lastResults = jobs;
+    resultsList.innerHTML = "";
+
+    if (jobs.length === 0) {
+      const empty = document.createElement("div");
+      empty.className = "list-group-item text-muted";
+      empty.textContent = "No matching jobs";
+      resultsList.appendChild(empty);
+    }
+
+    jobs.forEach((job) => {
+      const item = document.createElement("button");
+      item.type = "button";
+      item.className = "list-group-item list-group-item-action";
+      item.textContent = job.fullName;
+      if (job.source) {
+        // Merged results from several controllers show where each job lives
+        const host = document.createElement("small");
+        host.className = "text-muted ms-2";
+        host.textContent = new URL(job.source).host;
+        item.appendChild(host);
+      }
+      item.addEventListener("click", () => selectSearchResult(job));
+      resultsList.appendChild(item);
+    });
+
+    resultsList.style.display = "block";
+  }
+
+  function hideResults() {
+    resultsList.style.display = "none";
+  }
+
+  // Select a search result in the job dropdown, adding it there if its folder isn't shown
+  function selectSearchResult(job) {
+    const jobDropdown = getElement("job-dropdown");
+    if (!jobDropdown) {
+      return;
+    }
+
+    let option = Array.from(jobDropdown.options).find(opt =>
+      !opt.hasAttribute("data-browse") &&
+      opt.value === job.fullName &&
+      (opt.getAttribute("data-source") || null) === (job.source || null)
+    );
+    if (!option) {
+      let group = jobDropdown.querySelector("optgroup[data-search-results]");
+      if (!group) {
+        group = document.createElement("optgroup");
+        group.label = "Search Results";
+        group.setAttribute("data-search-results", "");
+        // Right after the placeholder option
+        jobDropdown.insertBefore(group, jobDropdown.options[0].nextSibling);
       }
+      option = createJobOption(job);
+      option.textContent = job.fullName;
+      group.appendChild(option);
     }
-  } catch (error) {
-    console.error("Error setting up job search dropdown:", error);
+
+    option.selected = true;
+    jobDropdown.dispatchEvent(new Event("change", { bubbles: true }));
+
+    searchInput.value = "";
+    lastResults = [];
+    hideResults();
   }
 });
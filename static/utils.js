@@ -88,3 +88,55 @@ function escapeHtml(unsafe) {
        .replace(/"/g, "&quot;")
        .replace(/'/g, "&#039;");
 }
+
+// Controller URL of the selected job when the job list merges several controllers, else null
+function getSelectedJobSource() {
+  const jobDropdown = getElement('job-dropdown');
+  const option = jobDropdown ? jobDropdown.options[jobDropdown.selectedIndex] : null;
+  return option ? option.getAttribute('data-source') : null;
+}
+
+// --- Dashboard Bootstrap ---
+// One /api/dashboard/bootstrap request shared by the dashboard scripts on load
+let dashboardBootstrapPromise = null;
+let dashboardBootstrapBuilds = null;
+let dashboardBootstrapRecentBuilds = null;
+
+// Resolves to the bootstrap payload, or null so callers fall back to their own endpoints
+function loadDashboardBootstrap(refresh = false) {
+  if (!dashboardBootstrapPromise || refresh) {
+    dashboardBootstrapPromise = fetch('/api/dashboard/bootstrap', { credentials: 'same-origin' })
+      .then(response => response.ok ? response.json() : null)
+      .then(data => {
+        if (!data || data.status !== 'success') {
+          return null;
+        }
+        dashboardBootstrapBuilds = data.builds;
+        dashboardBootstrapRecentBuilds = data.recent_builds;
+        return data;
+      })
+      .catch(error => {
+        console.warn('Dashboard bootstrap failed, falling back to individual requests:', error);
+        return null;
+      });
+  }
+  return dashboardBootstrapPromise;
+}
+
+// Builds of the job preselected by the bootstrap; handed out once, later selections refetch
+function takeBootstrapBuilds(jobFullName) {
+  const builds = dashboardBootstrapBuilds;
+  if (builds && builds.job_full_name === jobFullName) {
+    dashboardBootstrapBuilds = null;
+    return builds;
+  }
+  return null;
+}
+
+// Recent builds from the latest bootstrap; handed out once so chart reloads fetch fresh data
+async function takeBootstrapRecentBuilds() {
+  await loadDashboardBootstrap();
+  const recentBuilds = dashboardBootstrapRecentBuilds;
+  dashboardBootstrapRecentBuilds = null;
+  return recentBuilds && !recentBuilds.error ? recentBuilds : null;
+}
@@ -0,0 +1,35 @@
+"""
+Shared fixtures; the repository root is put on sys.path so tests import the app modules directly
+"""
+import os
+import sys
+
+import pytest
+from flask import Flask
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from jenkins_client import JenkinsClient  # noqa: E402
+from models import db, Encryption  # noqa: E402
+from tests.fakes import FakeJenkins  # noqa: E402
+
+
+@pytest.fixture
+def fake_jenkins(monkeypatch):
+    jenkins = FakeJenkins()
+    monkeypatch.setattr(JenkinsClient, 'get', classmethod(lambda cls, url, auth=None, **kwargs: jenkins.get(url, auth, **kwargs)))
+    return jenkins
+
+
+@pytest.fixture
+def db_app():
+    """A bare Flask app with the models on an in-memory SQLite database, inside an app context."""
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    app.config['SECRET_KEY'] = 'test-secret'
+    db.init_app(app)
+    Encryption.initialize(app)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
@@ -0,0 +1,66 @@
+"""
+Stand-ins for Jenkins responses, used through the fake_jenkins fixture
+"""
+import json
+
+import requests
+
+
+class FakeResponse:
+    """The parts of requests.Response the code under test uses."""
+
+    def __init__(self, status_code=200, body=b'', headers=None, json_data=None):
+        if json_data is not None:
+            body = json.dumps(json_data).encode('utf-8')
+            headers = dict({'Content-Type': 'application/json'}, **(headers or {}))
+        self.status_code = status_code
+        self.content = body.encode('utf-8') if isinstance(body, str) else body
+        self.headers = headers or {}
+        self.closed = False
+
+    @property
+    def ok(self):
+        return self.status_code < 400
+
+    @property
+    def text(self):
+        return self.content.decode('utf-8', errors='replace')
+
+    def json(self):
+        return json.loads(self.content)
+
+    def iter_content(self, chunk_size=1):
+        for i in range(0, len(self.content), chunk_size):
+            yield self.content[i:i + chunk_size]
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.exceptions.HTTPError(f"{self.status_code} Error", response=self)
+
+    def close(self):
+        self.closed = True
+
+
+class FakeJenkins:
+    """
+    Answers JenkinsClient.get from a handler per URL suffix. A handler gets
+    (url, auth, params) and returns a FakeResponse or raises. Every call is recorded.
+    """
+
+    def __init__(self):
+        self.handlers = []
+        self.calls = []
+
+    def route(self, suffix, handler):
+        self.handlers.insert(0, (suffix, handler))
+
+    def get(self, url, auth=None, **kwargs):
+        self.calls.append((url, auth, kwargs.get('params')))
+        path = url.split('?', 1)[0]
+        for suffix, handler in self.handlers:
+            if path.endswith(suffix):
+                return handler(url, auth, kwargs.get('params') or {})
+        return FakeResponse(404, b'Not Found')
+
+    def called(self, suffix):
+        return [call for call in self.calls if call[0].split('?', 1)[0].endswith(suffix)]
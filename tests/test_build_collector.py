@@ -0,0 +1,79 @@
+import pytest
+
+from build_collector import RecentBuildCollector
+from circuit_breaker import BudgetExceededError
+from tests.fakes import FakeResponse
+
+JENKINS = 'http://jenkins.test/'
+SINCE = 1000
+
+
+def job(name, url, last_timestamp, number=1, color='blue'):
+    return {'name': name.rsplit('/', 1)[-1], 'fullName': name, 'url': url, 'color': color,
+            'lastBuild': {'number': number, 'timestamp': last_timestamp}}
+
+
+def serve_controller(fake_jenkins, builds_by_job):
+    """Root with job 'top', folder 'F' with job 'F/a', and 'old' whose last build predates the window."""
+    fake_jenkins.route('jenkins.test/api/json', lambda url, auth, params: FakeResponse(json_data={'jobs': [
+        job('top', f"{JENKINS}job/top/", 3000, number=2),
+        job('old', f"{JENKINS}job/old/", 10),
+        {'name': 'F', 'fullName': 'F', 'url': f"{JENKINS}job/F/", 'jobs': [{}]}
+    ]}))
+    fake_jenkins.route('/job/F/api/json', lambda url, auth, params: FakeResponse(json_data={'jobs': [
+        job('F/a', f"{JENKINS}job/F/job/a/", 2500)
+    ]}))
+    for path, builds in builds_by_job.items():
+        def handler(url, auth, params, builds=builds):
+            if isinstance(builds, Exception):
+                raise builds
+            return FakeResponse(json_data={'builds': builds})
+        fake_jenkins.route(path, handler)
+
+
+def test_collects_builds_across_folders_newest_first(fake_jenkins):
+    serve_controller(fake_jenkins, {
+        '/job/top/api/json': [{'number': 2, 'timestamp': 3000}, {'number': 1, 'timestamp': 1500}, {'number': 0, 'timestamp': 500}],
+        '/job/F/job/a/api/json': [{'number': 1, 'timestamp': 2500}],
+    })
+    collector = RecentBuildCollector(JENKINS)
+    builds = collector.collect(SINCE)
+
+    assert [(b['job_name'], b['build_number']) for b in builds] == [('top', 2), ('F/a', 1), ('top', 1)]
+    assert fake_jenkins.called('/job/old/api/json') == []
+    assert sorted(job['fullName'] for job in collector.jobs) == ['F/a', 'old', 'top']
+
+
+def test_unchanged_jobs_reuse_the_previous_pass(fake_jenkins):
+    serve_controller(fake_jenkins, {
+        '/job/top/api/json': [{'number': 2, 'timestamp': 3000, 'result': 'SUCCESS'}],
+        '/job/F/job/a/api/json': [{'number': 1, 'timestamp': 2500, 'result': 'SUCCESS'}],
+    })
+    first = RecentBuildCollector(JENKINS)
+    previous = first.collect(SINCE)
+
+    second = RecentBuildCollector(JENKINS)
+    builds = second.collect(SINCE, previous_fingerprints=first.fingerprints, previous_builds=previous)
+
+    assert builds == previous
+    assert second.fetched == 0
+    assert len(fake_jenkins.called('/job/top/api/json')) == 1
+
+
+def test_an_unreadable_job_is_skipped(fake_jenkins):
+    serve_controller(fake_jenkins, {
+        '/job/top/api/json': ValueError('not json'),
+        '/job/F/job/a/api/json': [{'number': 1, 'timestamp': 2500}],
+    })
+    builds = RecentBuildCollector(JENKINS).collect(SINCE)
+
+    assert [b['job_name'] for b in builds] == ['F/a']
+
+
+def test_running_out_of_budget_fails_the_collection(fake_jenkins):
+    serve_controller(fake_jenkins, {
+        '/job/top/api/json': BudgetExceededError('budget exhausted'),
+        '/job/F/job/a/api/json': [{'number': 1, 'timestamp': 2500}],
+    })
+    with pytest.raises(BudgetExceededError):
+        RecentBuildCollector(JENKINS).collect(SINCE)
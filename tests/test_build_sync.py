@@ -0,0 +1,88 @@
+import pytest
+import requests
+
+import build_sync
+from build_sync import job_counts, stored_builds, sync_job_builds
+from models import db, Build
+from tests.fakes import FakeResponse
+
+JENKINS = 'http://jenkins.test'
+ALICE = ('alice', 'good-token')
+MALLORY = ('mallory', 'other-token')
+
+
+def serve_job(fake_jenkins, numbers, allowed=(ALICE,), running=()):
+    """Serve a job 'app' whose builds are `numbers` (newest first) to the `allowed` credentials."""
+    def job_api(url, auth, params):
+        if auth not in allowed:
+            return FakeResponse(403, b'Forbidden')
+        if 'allBuilds' in url:
+            first, last = url.rsplit('{', 1)[1].rstrip('}').split(',')
+            builds = [{'number': n, 'url': f"{JENKINS}/job/app/{n}/", 'result': None if n in running else 'SUCCESS'}
+                      for n in numbers[int(first):int(last)]]
+            return FakeResponse(json_data={'allBuilds': builds})
+        return FakeResponse(json_data={'lastBuild': {'number': numbers[0]} if numbers else None})
+
+    fake_jenkins.route('/job/app/api/json', job_api)
+
+
+def test_sync_fetches_only_builds_above_the_high_water_mark(db_app, fake_jenkins):
+    serve_job(fake_jenkins, [3, 2, 1])
+    assert sync_job_builds(JENKINS, ALICE, 'app') == 3
+
+    serve_job(fake_jenkins, [5, 4, 3, 2, 1])
+    assert sync_job_builds(JENKINS, ALICE, 'app') == 2
+    assert [b.number for b in Build.query.order_by(Build.number).all()] == [1, 2, 3, 4, 5]
+
+
+def test_running_builds_are_refetched_until_finished(db_app, fake_jenkins):
+    serve_job(fake_jenkins, [2, 1], running=(2,))
+    sync_job_builds(JENKINS, ALICE, 'app')
+
+    serve_job(fake_jenkins, [2, 1])
+    sync_job_builds(JENKINS, ALICE, 'app')
+    assert Build.query.filter_by(number=2).one().result == 'SUCCESS'
+
+
+def test_stored_builds_are_not_served_to_credentials_jenkins_refuses(db_app, fake_jenkins):
+    serve_job(fake_jenkins, [2, 1])
+    assert len(stored_builds(JENKINS, ALICE, 'app')) == 2
+
+    with pytest.raises(requests.exceptions.HTTPError):
+        stored_builds(JENKINS, MALLORY, 'app')
+
+
+def test_stored_builds_skip_the_sync_when_nothing_is_missing(db_app, fake_jenkins):
+    serve_job(fake_jenkins, [2, 1])
+    stored_builds(JENKINS, ALICE, 'app')
+    calls = len(fake_jenkins.called('/job/app/api/json'))
+
+    rows = stored_builds(JENKINS, ALICE, 'app')
+    assert [row.number for row in rows] == [2, 1]
+    assert len(fake_jenkins.called('/job/app/api/json')) == calls + 1  # Only the access check
+
+
+def test_upsert_retries_after_a_concurrent_insert(db_app, monkeypatch):
+    real_merge = build_sync._merge_builds
+    attempts = []
+
+    def merge_after_another_sync(jenkins_url, job_name, builds):
+        if not attempts:
+            # Another sync commits the same build between our read and our insert
+            db.session.add(Build(jenkins_url=jenkins_url, job_name=job_name, number=1, result=None))
+            db.session.commit()
+            db.session.add(Build(jenkins_url=jenkins_url, job_name=job_name, number=1))
+        attempts.append(1)
+        if len(attempts) > 1:
+            real_merge(jenkins_url, job_name, builds)
+
+    monkeypatch.setattr(build_sync, '_merge_builds', merge_after_another_sync)
+    build_sync._upsert_builds(JENKINS, 'app', [{'number': 1, 'result': 'FAILURE'}])
+
+    assert len(attempts) == 2
+    assert Build.query.one().result == 'FAILURE'
+
+
+def test_job_counts():
+    jobs = [{'color': 'blue'}, {'color': 'red'}, {'color': 'red_anime'}, {'color': 'blue_anime'}]
+    assert job_counts(jobs) == {'total_jobs': 4, 'running_jobs': 2, 'failed_jobs': 2}
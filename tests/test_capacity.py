@@ -0,0 +1,103 @@
+import time
+
+from capacity import CapacityPoller, CapacityStore, summarize_computers, summarize_queue
+from models import db, JenkinsConfig, User
+from tests.fakes import FakeResponse
+
+JENKINS = 'http://jenkins.test'
+ALICE = ('alice', 'good-token')
+
+
+def sample(t, **extra):
+    return dict({'t': t, 'executors': {'busy': 1, 'idle': 1}, 'queue_items': [{'id': 1}]}, **extra)
+
+
+def test_series_keeps_queue_items_only_in_the_latest_sample(tmp_path):
+    store = CapacityStore(str(tmp_path))
+    now = time.time()
+    store.append(JENKINS, ALICE, sample(now - 60))
+    store.append(JENKINS, ALICE, sample(now))
+
+    assert [s['t'] for s in store.series(JENKINS, ALICE)] == [now - 60, now]
+    assert all('queue_items' not in s for s in store.series(JENKINS, ALICE))
+    assert store.latest(JENKINS, ALICE)['queue_items'] == [{'id': 1}]
+    assert store.series(JENKINS, ALICE, since=now - 1)[0]['t'] == now
+
+
+def test_samples_are_only_read_back_with_the_credentials_they_were_taken_with(tmp_path):
+    store = CapacityStore(str(tmp_path))
+    store.append(JENKINS, ALICE, sample(time.time()))
+
+    for auth in (('alice', 'wrong-token'), ('bob', 'good-token'), None):
+        assert store.latest(JENKINS, auth) is None
+        assert store.series(JENKINS, auth) == []
+    assert store.latest(JENKINS + '/', ALICE)['queue_items'] == [{'id': 1}]
+
+
+def test_appends_do_not_read_the_series_between_compactions(tmp_path, monkeypatch):
+    store = CapacityStore(str(tmp_path), retention=3600)
+    reads = []
+    real_series = store.series
+    monkeypatch.setattr(store, 'series', lambda *args, **kwargs: reads.append(1) or real_series(*args, **kwargs))
+
+    for i in range(50):
+        store.append(JENKINS, ALICE, sample(time.time()))
+
+    assert len(reads) == 1  # Only the first append of the process compacts
+
+
+def test_compaction_drops_expired_samples(tmp_path):
+    store = CapacityStore(str(tmp_path), retention=3600)
+    now = time.time()
+    store.append(JENKINS, ALICE, sample(now - 7200))
+    store.append(JENKINS, ALICE, sample(now - 60))
+
+    store._next_compaction.clear()
+    store.append(JENKINS, ALICE, sample(now))
+    assert [s['t'] for s in store.series(JENKINS, ALICE)] == [now - 60, now]
+
+
+def test_summarize_computers_counts_executors_per_shared_label():
+    executors, labels = summarize_computers([
+        {'displayName': 'a', 'assignedLabels': [{'name': 'a'}, {'name': 'linux'}],
+         'executors': [{'idle': False}, {'idle': True}], 'oneOffExecutors': [{'idle': False}]},
+        {'displayName': 'b', 'offline': True, 'executors': [{'idle': True}]},
+    ])
+    assert executors == {'busy': 2, 'idle': 1, 'offline_nodes': 1}
+    assert labels == {'linux': [2, 1]}
+
+
+def test_summarize_queue_orders_the_longest_waiters_first():
+    summary, longest = summarize_queue([
+        {'id': 1, 'inQueueSince': 9000, 'buildable': True},
+        {'id': 2, 'inQueueSince': 4000, 'stuck': True},
+        {'id': 3, 'inQueueSince': 4000},
+    ], now_ms=10000)
+    assert summary['depth'] == 3 and summary['max_wait'] == 6 and summary['stuck'] == 1
+    assert [item['id'] for item in longest][0] in (2, 3) and longest[-1]['id'] == 1
+
+
+def test_poller_samples_each_controller_with_each_set_of_credentials(db_app, fake_jenkins, tmp_path):
+    user = User(username='a', email='a@example.com', jenkins_url=JENKINS + '/', jenkins_username='alice')
+    user.set_password('x')
+    db.session.add(user)
+    db.session.commit()
+    user.set_jenkins_token('good-token')
+    config = JenkinsConfig(user_id=user.id, jenkins_url='http://other.test', jenkins_username='bob')
+    db.session.add(config)
+    db.session.commit()
+    config.set_jenkins_token('bob-token')
+    db.session.commit()
+
+    def queue(url, auth, params):
+        # Jenkins only lists the queue items the caller may see
+        return FakeResponse(json_data={'items': [{'id': 1, 'task': {'name': f"{auth[0]}-job"}}]})
+
+    fake_jenkins.route('computer/api/json', lambda url, auth, params: FakeResponse(json_data={'computer': []}))
+    fake_jenkins.route('queue/api/json', queue)
+    store = CapacityStore(str(tmp_path))
+    CapacityPoller(db_app, store).run_once()
+
+    assert store.latest(JENKINS, ALICE)['queue_items'][0]['job_name'] == 'alice-job'
+    assert store.latest('http://other.test', ('bob', 'bob-token'))['queue_items'][0]['job_name'] == 'bob-job'
+    assert store.latest('http://other.test', ALICE) is None
@@ -0,0 +1,104 @@
+import time
+
+import pytest
+
+from circuit_breaker import CircuitBreaker, CircuitOpenError, end_budget, remaining_budget, start_budget
+
+
+def trip(breaker):
+    for _ in range(breaker.min_calls):
+        breaker.record(False, 0, breaker.before_call())
+
+
+def test_opens_once_enough_calls_fail():
+    breaker = CircuitBreaker(failure_rate=0.5, min_calls=4)
+    for ok in (True, False, True):
+        breaker.record(ok, 0, breaker.before_call())
+    assert breaker.state == CircuitBreaker.CLOSED
+
+    breaker.record(False, 0, breaker.before_call())
+    assert breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+
+def test_slow_calls_count_as_failures():
+    breaker = CircuitBreaker(min_calls=2, slow_call_seconds=1)
+    for _ in range(2):
+        breaker.record(True, 5, breaker.before_call())
+    assert breaker.state == CircuitBreaker.OPEN
+
+
+def test_half_open_lets_a_single_probe_through():
+    breaker = CircuitBreaker(min_calls=1, open_seconds=0)
+    trip(breaker)
+
+    probe = breaker.before_call()
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+    breaker.record(True, 0, probe)
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.before_call()
+
+
+def test_failed_probe_reopens_the_circuit():
+    breaker = CircuitBreaker(min_calls=1, open_seconds=60)
+    trip(breaker)
+    breaker._opened_at -= 60
+
+    breaker.record(False, 0, breaker.before_call())
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+
+def test_calls_started_before_a_trip_do_not_resolve_the_probe():
+    breaker = CircuitBreaker(min_calls=1, open_seconds=0)
+    straggler = breaker.before_call()
+    trip(breaker)
+    probe = breaker.before_call()
+
+    breaker.record(True, 0, straggler)
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+    breaker.record(False, 0, probe)
+    assert breaker._state == CircuitBreaker.OPEN
+
+
+def test_calls_started_before_a_trip_do_not_count_afterwards():
+    breaker = CircuitBreaker(min_calls=1, open_seconds=0)
+    straggler = breaker.before_call()
+    trip(breaker)
+    breaker.record(True, 0, breaker.before_call())
+
+    breaker.record(False, 0, straggler)
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_budget_counts_down_and_resets():
+    assert remaining_budget() is None
+    token = start_budget(5)
+    try:
+        assert 4 < remaining_budget() <= 5
+    finally:
+        end_budget(token)
+    assert remaining_budget() is None
+
+
+def test_zero_budget_means_no_budget():
+    token = start_budget(0)
+    try:
+        assert remaining_budget() is None
+    finally:
+        end_budget(token)
+
+
+def test_budget_runs_out():
+    token = start_budget(0.01)
+    try:
+        time.sleep(0.02)
+        assert remaining_budget() < 0
+    finally:
+        end_budget(token)
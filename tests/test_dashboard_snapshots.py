@@ -0,0 +1,71 @@
+from build_sync import configured_controllers, configured_credentials
+from dashboard_snapshots import SnapshotStore, summarize_overview
+from models import db, JenkinsConfig, User
+
+JENKINS = 'http://jenkins.test'
+OTHER = 'http://other.test'
+ALICE = ('alice', 'good-token')
+
+
+def add_user(name, jenkins_username, token, jenkins_url=JENKINS + '/'):
+    user = User(username=name, email=f"{name}@example.com", jenkins_url=jenkins_url, jenkins_username=jenkins_username)
+    user.set_password('x')
+    db.session.add(user)
+    db.session.commit()
+    user.set_jenkins_token(token)
+    db.session.commit()
+
+
+def test_snapshot_is_only_found_with_the_credentials_it_was_taken_with(tmp_path):
+    store = SnapshotStore(str(tmp_path))
+    store.save(JENKINS, ALICE, {'taken_at': 0, 'recent_builds': [1]})
+
+    assert store.load(JENKINS + '/', ALICE)['recent_builds'] == [1]
+    assert store.load(JENKINS, ('alice', 'revoked-token')) is None
+    assert store.load(JENKINS, ('mallory', 'good-token')) is None
+    assert store.load(JENKINS, None) is None
+
+
+def test_old_snapshot_is_not_served(tmp_path):
+    store = SnapshotStore(str(tmp_path))
+    store.save(JENKINS, ALICE, {'taken_at': 0})
+
+    assert store.load(JENKINS, ALICE, max_age=60) is None
+
+
+def test_overview_counts_jobs_inside_folders():
+    tree = [
+        {'fullName': 'Folder', 'jobs': [
+            {'fullName': 'Folder/a', 'color': 'red', 'lastBuild': {'number': 2, 'result': 'FAILURE', 'timestamp': 20}},
+            {'fullName': 'Folder/b', 'color': 'blue_anime', 'lastBuild': {'number': 5, 'timestamp': 30}},
+        ]},
+        {'fullName': 'top', 'name': 'top', 'color': 'blue', 'lastBuild': {'number': 1, 'result': 'SUCCESS', 'timestamp': 10}},
+    ]
+    overview = summarize_overview(tree)
+
+    assert (overview['total_jobs'], overview['running_jobs'], overview['failed_jobs']) == (3, 1, 1)
+    assert [b['job_name'] for b in overview['recent_builds']] == ['Folder/b', 'Folder/a', 'top']
+
+
+def test_every_set_of_credentials_gets_its_own_snapshot(db_app):
+    add_user('a', 'alice', 'good-token')
+    add_user('a2', 'alice', 'good-token', jenkins_url=JENKINS)
+    add_user('b', 'bob', 'bob-token')
+
+    assert sorted(auth for url, auth in configured_credentials()) == [('alice', 'good-token'), ('bob', 'bob-token')]
+
+
+def test_additional_controllers_are_polled_too(db_app):
+    add_user('a', 'alice', 'good-token')
+    user = User.query.filter_by(username='a').one()
+    for url, token in ((OTHER + '/', 'other-token'), (JENKINS, 'good-token'), (OTHER, 'other-token')):
+        config = JenkinsConfig(user_id=user.id, jenkins_url=url, jenkins_username='alice')
+        db.session.add(config)
+        db.session.commit()
+        config.set_jenkins_token(token)
+        db.session.commit()
+    db.session.add(JenkinsConfig(user_id=user.id, jenkins_url='http://tokenless.test', jenkins_username='alice'))
+    db.session.commit()
+
+    assert sorted(configured_credentials()) == [(JENKINS, ALICE), (OTHER, ('alice', 'other-token'))]
+    assert sorted(configured_controllers()) == [(JENKINS, ALICE), (OTHER, ('alice', 'other-token'))]
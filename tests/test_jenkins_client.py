@@ -0,0 +1,89 @@
+import pytest
+import requests
+
+from circuit_breaker import CircuitBreaker, CircuitOpenError
+from jenkins_client import JenkinsClient, credential_key
+from tests.fakes import FakeResponse
+
+URL = 'http://breaker.test/api/json'
+
+
+class FakeSession:
+    def __init__(self, *outcomes):
+        self.outcomes = list(outcomes)
+        self.calls = []
+
+    def get(self, url, **kwargs):
+        self.calls.append(kwargs)
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+
+@pytest.fixture
+def half_open(monkeypatch):
+    """A tripped breaker for URL's host whose open period is already over."""
+    breaker = CircuitBreaker(min_calls=1, open_seconds=0)
+    breaker.record(False, 0, breaker.before_call())
+    monkeypatch.setitem(JenkinsClient._breakers, 'http://breaker.test', breaker)
+    return breaker
+
+
+def use_session(monkeypatch, session):
+    monkeypatch.setattr(JenkinsClient, 'session_for', classmethod(lambda cls, url, username=None: session))
+
+
+def test_probe_that_raises_unexpectedly_still_finishes(monkeypatch, half_open):
+    use_session(monkeypatch, FakeSession(RuntimeError('bug in a hook'), FakeResponse(200)))
+
+    with pytest.raises(RuntimeError):
+        JenkinsClient.get(URL)
+    # The failed probe re-opened the circuit instead of leaving it waiting on a probe forever
+    assert half_open.state == CircuitBreaker.HALF_OPEN
+    assert JenkinsClient.get(URL).status_code == 200
+    assert half_open.state == CircuitBreaker.CLOSED
+
+
+def test_client_errors_do_not_count_against_the_host(monkeypatch, half_open):
+    use_session(monkeypatch, FakeSession(FakeResponse(401)))
+
+    assert JenkinsClient.get(URL).status_code == 401
+    assert half_open.state == CircuitBreaker.CLOSED
+
+
+def test_connection_errors_reopen_the_circuit(monkeypatch, half_open):
+    half_open.open_seconds = 60
+    half_open._opened_at -= 60
+    use_session(monkeypatch, FakeSession(requests.exceptions.ConnectionError('down')))
+
+    with pytest.raises(requests.exceptions.ConnectionError):
+        JenkinsClient.get(URL)
+    with pytest.raises(CircuitOpenError):
+        JenkinsClient.get(URL)
+
+
+def test_certificate_checks_are_chosen_per_call(monkeypatch):
+    session = FakeSession(FakeResponse(200), FakeResponse(200), FakeResponse(200))
+    use_session(monkeypatch, session)
+
+    JenkinsClient.get('http://tls.test/api/json')
+    JenkinsClient.get('http://tls.test/consoleText', verify=True)
+    monkeypatch.setattr(JenkinsClient, '_verify_ssl', True)
+    JenkinsClient.get('http://tls.test/api/json')
+
+    assert [call['verify'] for call in session.calls] == [False, True, True]
+
+
+def test_pooled_sessions_keep_certificate_checks_on(monkeypatch):
+    monkeypatch.setattr(JenkinsClient, '_sessions', {})
+    session = JenkinsClient.session_for('https://pool.test/job/app/')
+    assert session.verify is True
+    assert JenkinsClient.session_for('https://pool.test/api/json') is session
+
+
+def test_credential_key_hides_the_token_but_tells_tokens_apart():
+    key = credential_key(('alice', 'secret-token'))
+    assert 'secret-token' not in key and key.startswith('alice:')
+    assert key != credential_key(('alice', 'other-token'))
+    assert credential_key(None) == ''
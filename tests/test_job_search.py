@@ -0,0 +1,94 @@
+from job_search import EXACT, FUZZY, JobSearchIndex, JobSearchIndexes, SUBSTRING, WORD_PREFIX
+
+
+def job(full_name, **fields):
+    return {'fullName': full_name, 'name': full_name.rsplit('/', 1)[-1], **fields}
+
+
+JOBS = [
+    job('deploy'),
+    job('deploy-staging'),
+    job('team/api-deploy'),
+    job('team/backend-build'),
+    job('nightly/integration-tests'),
+]
+
+
+def names(jobs):
+    return [j['fullName'] for j in jobs]
+
+
+def test_matches_rank_by_tier():
+    index = JobSearchIndex()
+    index.update(JOBS)
+
+    assert names(index.search('deploy')) == ['deploy', 'deploy-staging', 'team/api-deploy']
+
+
+def test_exact_match_is_not_cut_off_by_the_limit():
+    index = JobSearchIndex()
+    index.update([job(f"deploy-{i}") for i in range(20)] + [job('deploy')])
+
+    ranked = index.search_ranked('deploy', limit=1)
+    assert ranked[0][0][0] == EXACT and ranked[0][1]['fullName'] == 'deploy'
+
+
+def test_word_prefix_substring_and_fuzzy_tiers():
+    index = JobSearchIndex()
+    index.update(JOBS)
+
+    assert index.search_ranked('tests')[0][0][0] == WORD_PREFIX
+    assert index.search_ranked('kend-bu')[0][0][0] == SUBSTRING
+    fuzzy = index.search_ranked('integraton')
+    assert fuzzy[0][0][0] == FUZZY and fuzzy[0][1]['fullName'] == 'nightly/integration-tests'
+
+
+def test_empty_query_lists_jobs_alphabetically():
+    index = JobSearchIndex()
+    index.update(JOBS)
+
+    assert names(index.search('  ', limit=2)) == ['deploy', 'deploy-staging']
+
+
+def test_update_applies_additions_removals_and_changes():
+    index = JobSearchIndex()
+    index.update(JOBS, version='v1')
+
+    index.update([job('deploy', color='red'), job('release')], version='v2')
+
+    assert len(index) == 2
+    assert index.search('deploy') == [job('deploy', color='red')]
+    assert index.search('staging') == []
+    assert names(index.search('rel')) == ['release']
+
+
+def test_update_with_the_same_version_is_a_no_op():
+    index = JobSearchIndex()
+    index.update(JOBS, version='v1')
+
+    index.update([], version='v1')
+
+    assert len(index) == len(JOBS)
+
+
+def test_indexes_evict_the_least_recently_used_key():
+    indexes = JobSearchIndexes(max_entries=2)
+    first = indexes.get('a', JOBS, 'v1')
+    indexes.get('b', JOBS, 'v1')
+    assert indexes.get('a', JOBS, 'v1') is first
+
+    indexes.get('c', JOBS, 'v1')
+
+    assert indexes.get('a', JOBS, 'v1') is first
+    assert len(indexes.get('b', [], 'v2')) == 0
+
+
+def test_invalidate_where_drops_matching_indexes():
+    indexes = JobSearchIndexes()
+    kept = indexes.get((1, 'http://jenkins.test', 'alice'), JOBS, 'v1')
+    dropped = indexes.get((2, 'http://jenkins.test', 'bob'), JOBS, 'v1')
+
+    indexes.invalidate_where(lambda key: key[0] == 2)
+
+    assert indexes.get((1, 'http://jenkins.test', 'alice'), JOBS, 'v1') is kept
+    assert indexes.get((2, 'http://jenkins.test', 'bob'), JOBS, 'v1') is not dropped
@@ -0,0 +1,86 @@
+import json
+
+import nltk
+import pytest
+
+try:
+    nltk.data.find('corpora/stopwords')
+except LookupError:
+    pytest.skip('NLTK stopwords are not installed', allow_module_level=True)
+
+import log_analyzer_engine  # noqa: E402
+from log_analyzer_engine import LogAnalyzerEngine  # noqa: E402
+from models import db, LogAnalysis  # noqa: E402
+
+LOG = (
+    '[Pipeline] { (Checkout)\n'
+    'git clone https://example.test/repo.git\n'
+    '[Pipeline] { (Build)\n'
+    'npm install\n'
+    'npm ERR! Cannot find module \'left-pad\'\n'
+    'café build naïve output\n' * 50 +
+    'Permission denied: /var/cache\n'
+    'Finished: FAILURE\n'
+)
+
+
+@pytest.fixture
+def engine(db_app):
+    return LogAnalyzerEngine()
+
+
+def byte_chunks(text, size):
+    data = text.encode('utf-8')
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+def test_stream_analysis_matches_whole_log_analysis(engine):
+    expected = engine.analyze_log(LOG, tokenizer='regex')
+
+    for size in (1, 64, len(LOG) * 2):
+        assert engine.analyze_stream(byte_chunks(LOG, size), tokenizer='regex') == expected
+    assert expected['build_result'] == 'FAILURE'
+    assert expected['stages'] == ['Checkout', 'Build']
+    assert {'Module Not Found', 'Permission Issue'} <= {p['description'] for p in expected['error_patterns']}
+
+
+def test_empty_stream_is_analyzed_like_an_empty_log(engine):
+    assert engine.analyze_stream([]) == engine.analyze_log('')
+    assert engine.analyze_stream([b'', '']) == engine.analyze_log('')
+
+
+def test_stream_reuses_a_highly_rated_stored_analysis(engine):
+    log_hash = engine._compute_log_hash(LOG)
+    db.session.add(LogAnalysis(
+        log_hash=log_hash, job_name='app', build_number=1, build_result='FAILURE', log_snippet='',
+        analysis='Reviewed analysis', error_patterns=json.dumps([]), feedback_rating=5, use_for_training=True
+    ))
+    db.session.commit()
+
+    result = engine.analyze_stream(byte_chunks(LOG, 100), tokenizer='regex')
+
+    assert result['analysis'] == 'Reviewed analysis' and result['log_hash'] == log_hash
+
+
+def test_stream_stores_the_log_head_with_job_metadata(engine):
+    engine.analyze_stream(byte_chunks(LOG, 100), job_name='app', build_number=7, tokenizer='regex')
+
+    stored = LogAnalysis.query.filter_by(job_name='app', build_number=7).one()
+    assert stored.log_snippet == LOG[:1000]
+
+
+def test_keyword_sampling_counts_only_the_tail_in_both_modes(engine, monkeypatch):
+    monkeypatch.setattr(log_analyzer_engine, 'KEYWORD_SAMPLE_THRESHOLD', 100)
+    monkeypatch.setattr(log_analyzer_engine, 'KEYWORD_SAMPLE_CHARS', 40)
+    log = 'alphaword ' * 50 + '\n' + 'omegaword tail\n' * 3
+
+    whole = dict(engine._extract_important_keywords(log, 'regex', sample=True))
+    streamed = engine.analyze_stream(byte_chunks(log, 16), tokenizer='regex', sample_keywords=True)
+
+    assert 'alphaword' not in whole and 'omegaword' in whole
+    assert streamed == engine.analyze_log(log, tokenizer='regex', sample_keywords=True)
+
+
+def test_unknown_tokenizer_is_rejected(engine):
+    with pytest.raises(ValueError):
+        engine.analyze_log('some log', tokenizer='spacy')
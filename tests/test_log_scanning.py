@@ -0,0 +1,215 @@
+import random
+import re
+from collections import Counter
+
+from log_scanning import (
+    PatternSet, ResultScanner, StageDetector, count_words, detect_build_result, iter_line_windows, literal_alternation,
+    required_literal, split_alternatives, terminal_result
+)
+
+
+def test_required_literal():
+    assert required_literal(r'BUILD\s+FAILURE') == 'FAILURE'
+    assert required_literal(r'colou?r mismatch') == 'r mismatch'
+    assert required_literal(r'Traceback \(most recent') == 'Traceback (most recent'
+    assert required_literal(r'npm\s+install|yarn') == ''
+    assert required_literal(r'(foo)+') == ''
+
+
+def test_numeric_escapes_end_the_literal_run():
+    assert required_literal(r'\x41BC') == 'BC'
+    assert required_literal(r'\101BC') == 'BC'
+    assert required_literal(r'\0BC') == 'BC'
+    assert required_literal(r'\u0041BC') == 'BC'
+    assert required_literal(r'\U00000041BC') == 'BC'
+    assert required_literal(r'\N{LATIN CAPITAL LETTER A}BC') == 'BC'
+    assert required_literal(r'(a)\1bc') == 'bc'
+    assert required_literal(r'\x1b\[31mERROR') == '[31mERROR'
+
+
+def test_patterns_with_numeric_escapes_are_reported():
+    patterns = PatternSet([(regex, regex) for regex in (
+        r'\x41BC', r'\101BC', r'\x1b\[31mERROR', r'(ab)\1c', r'x\x0ay', r'\N{DIGIT ONE}23|\u00e9t\x65'
+    )], re.IGNORECASE | re.MULTILINE)
+    text = 'zz abc\n\x1b[31merror: failed\nababc\nx\ny 123 été\n'
+    assert patterns.matching(text) == [
+        r'\x41BC', r'\101BC', r'\x1b\[31mERROR', r'(ab)\1c', r'x\x0ay', r'\N{DIGIT ONE}23|\u00e9t\x65'
+    ]
+
+
+def test_split_alternatives_only_splits_the_top_level():
+    assert split_alternatives(r'git\s+clone|checkout') == [r'git\s+clone', 'checkout']
+    assert split_alternatives(r'(a|b)c|[|]d') == ['(a|b)c', '[|]d']
+
+
+def test_literal_alternation_prefers_the_longest_literal():
+    scan = re.compile(literal_alternation(['err', 'error', 'errors', 'warn', 'a.b']))
+    assert scan.match('errors!').group() == 'errors'
+    assert scan.match('erro').group() == 'err'
+    assert scan.search('xa.b').group() == 'a.b'
+    assert scan.search('axb') is None
+
+
+def test_matching_reports_ids_in_pattern_order_ignoring_case():
+    patterns = PatternSet([('npm', r'npm ERR!'), ('mvn', r'BUILD\s+FAILURE'), ('py', r'Traceback')])
+    assert patterns.matching('[INFO] build failure\nNPM err! missing') == ['npm', 'mvn']
+
+
+def test_overlapping_and_nested_literals_are_all_found():
+    patterns = PatternSet([('abc', 'abc'), ('bcd', 'bcd'), ('error', 'error'), ('errors', 'errors found')])
+    assert patterns.matching('xabcd 2 errors found') == ['abc', 'bcd', 'error', 'errors']
+
+
+def test_first_match_is_the_leftmost_match():
+    patterns = PatternSet([('p', r'foo\d|bar')])
+    text = 'foo\nbar here\nfoo1'
+    [(pattern_id, match)] = patterns.first_matches(text)
+    assert match.start() == text.index('bar')
+
+
+def test_patterns_without_a_literal_and_multiline_patterns_still_run():
+    patterns = PatternSet([('digits', r'\d+'), ('pair', r'foo\nbar')])
+    assert patterns.matching('line\nfoo\nbar 7') == ['digits', 'pair']
+
+
+def test_skip_and_invalid_patterns():
+    patterns = PatternSet([('a', 'alpha'), ('bad', '['), ('b', 'beta')])
+    assert patterns.invalid == ['bad'] and len(patterns) == 2
+    assert patterns.matching('alpha beta', skip={'a'}) == ['b']
+
+
+def test_case_sensitive_sets_match_exactly():
+    patterns = PatternSet([('upper', 'ERROR')], flags=0)
+    assert patterns.matching('error') == []
+    assert patterns.matching('an ERROR') == ['upper']
+
+
+def test_matches_agree_with_re_search():
+    regexes = [r'Exception in thread ".*"', r'exit code [1-9]\d*', r'colou?r', r'error: ', r'Error:',
+               r'fail(ed|ure)', r'git\s+clone|checkout', r'^\[ERROR\]', r'timeout after \d+s', r'foo\nbar',
+               r'\x1b\[31mERROR', r'\101BC', r'(to)\1do', r'end\012start']
+    snippets = ['Exception in thread "main"', 'exit code 137', 'COLOR', 'error: x', 'Error: y', 'failure',
+                'checkout', '[ERROR] z', 'Timeout after 30s', 'foo\nbar', 'plain line', 'İstanbul',
+                '\x1b[31mERROR', 'abc', 'totodo', 'end\nstart']
+    patterns = PatternSet([(regex, regex) for regex in regexes], re.IGNORECASE | re.MULTILINE)
+    rng = random.Random(7)
+    for _ in range(300):
+        text = '\n'.join(rng.choice(snippets) for _ in range(rng.randint(0, 8)))
+        expected = [(r, re.search(r, text, re.IGNORECASE | re.MULTILINE)) for r in regexes]
+        found = dict(patterns.first_matches(text))
+        assert [r for r, m in expected if m] == list(found)
+        assert all(found[r].span() == m.span() for r, m in expected if m)
+
+
+def test_terminal_finished_line_beats_earlier_markers():
+    log = 'ERROR: flaky step retried\n[INFO] BUILD FAILURE\nFinished: SUCCESS\n'
+    assert detect_build_result(log) == 'SUCCESS'
+    assert terminal_result('Finished: ABORTED\r\n') == 'ABORTED'
+    assert terminal_result('Finished: NOT_BUILT') == 'NOT_BUILT'
+
+
+def test_finished_line_must_start_a_line_and_name_a_result():
+    assert terminal_result('echo "Finished: SUCCESS"\n') is None
+    assert terminal_result('Finished: MAYBE\n') is None
+    assert terminal_result('Finished: FAILURE\nFinished: bogus\n') == 'FAILURE'
+
+
+def test_finished_line_cut_by_a_chunk_boundary_is_found():
+    log = 'x' * 100 + '\nFinished: UNSTABLE\n' + 'y' * 5
+    for chunk_size in range(1, 40):
+        assert terminal_result(log, chunk_size=chunk_size) == 'UNSTABLE'
+
+
+def test_finished_line_before_the_tail_window_is_not_read():
+    log = 'Finished: SUCCESS\n' + 'z' * 200
+    assert terminal_result(log, chunk_size=16, max_chars=100) is None
+
+
+def test_marker_fallback_without_a_finished_line():
+    assert detect_build_result('ERROR: boom\n[INFO] BUILD SUCCESS\n') == 'SUCCESS'
+    assert detect_build_result('Tests run: 3 FAILED\n') == 'FAILURE'
+    assert detect_build_result('step ERROR\n') == 'FAILURE'
+    assert detect_build_result('marked UNSTABLE\n') == 'UNSTABLE'
+    assert detect_build_result('compiled with 0 errors\n') == 'UNKNOWN'
+
+
+def test_result_scanner_agrees_with_detect_build_result_across_windows():
+    logs = ['ERROR x\n' + 'a' * 70000 + '\nFinished: SUCCESS\n',
+            'Finished: FAILURE\n' + 'b' * 70000 + '\nBUILD SUCCESS\n',
+            'UNSTABLE\nplain\n']
+    for log in logs:
+        for window_chars in (16, 4096, 65536, len(log)):
+            scanner = ResultScanner()
+            for window, _, _ in iter_line_windows([log], window_chars):
+                scanner.feed(window)
+            assert scanner.result() == detect_build_result(log)
+
+
+def test_explicit_stage_markers_with_lines_and_offsets():
+    log = 'setup\n[Pipeline] { (Build)\nnpm install\n=== [Deploy] ===\n[Pipeline] { (Build)\n'
+    stages = StageDetector().detect(log)
+
+    assert [(s.name, s.line, s.offset, s.explicit) for s in stages] == [
+        ('Build', 2, log.index('[Pipeline]'), True),
+        ('Deploy', 4, log.index('==='), True),
+    ]
+
+
+def test_stages_are_inferred_only_without_markers():
+    log = 'Cloning...\ngit clone repo\nPIP INSTALL -r requirements.txt\nrunning pytest\ngit clone again\n'
+    stages = StageDetector().detect(log)
+
+    assert [(s.name, s.line, s.explicit) for s in stages] == [
+        ('Source Code Checkout', 2, False),
+        ('Python Dependencies Installation', 3, False),
+        ('Running Tests', 4, False),
+    ]
+    assert StageDetector().labels(log) == [
+        'Source Code Checkout (pos: 0.17)', 'Python Dependencies Installation (pos: 0.33)', 'Running Tests (pos: 0.50)'
+    ]
+
+
+def test_custom_stage_patterns_keep_line_anchors():
+    detector = StageDetector({r'^step (\w+)$': 'Step'})
+    assert detector.detect('a step x\nstep two\n')[0].line == 2
+
+
+def test_stage_scan_over_line_windows_matches_one_pass():
+    lines = [f"noise {i}" for i in range(400)]
+    lines[50], lines[120], lines[300] = 'docker build .', 'yarn install', 'Uploading artifact'
+    log = '\n'.join(lines) + '\n'
+    detector = StageDetector()
+    expected = detector.detect(log)
+
+    data = log.encode('utf-8')
+    chunks = [data[i:i + 64] for i in range(0, len(data), 64)]
+    for window_chars in (10, 100, 1000):
+        scan = detector.scan()
+        windows = list(iter_line_windows(chunks, window_chars))
+        for window, offset, line in windows:
+            scan.feed(window, offset, line)
+        assert scan.stages() == expected
+        assert len(windows) > 1
+
+
+def test_iter_line_windows_splits_at_line_boundaries():
+    chunks = ['ab\ncd', 'e\nf', 'g\n', 'h']
+    windows = list(iter_line_windows(chunks, window_chars=4))
+
+    assert ''.join(window for window, _, _ in windows) == 'ab\ncde\nfg\nh'
+    assert all(window.endswith('\n') for window, _, _ in windows[:-1])
+    assert windows[1][1:] == (3, 2)
+
+
+def test_iter_line_windows_decodes_characters_split_across_chunks():
+    data = 'café\nnaïve\n'.encode('utf-8')
+    chunks = [data[i:i + 1] for i in range(len(data))]
+
+    assert ''.join(window for window, _, _ in iter_line_windows(chunks, window_chars=3)) == 'café\nnaïve\n'
+
+
+def test_count_words_keeps_dotted_and_numeric_tokens_whole():
+    word_counts = Counter({'failed': 1})
+    count_words('foo.bar failed: 12:30:45 (exit) 1,000 a--b re-run end. [abc] path/to/file 2', word_counts)
+
+    assert word_counts == Counter({'failed': 2, 'exit': 1, 'a': 1, 'b': 1, 'end': 1, 'abc': 1, '2': 1})
@@ -0,0 +1,145 @@
+import os
+
+import pytest
+import requests
+
+from log_store import LogStore
+from tests.fakes import FakeResponse
+
+BUILD_URL = 'http://jenkins.test/job/app/7/'
+ALICE = ('alice', 'good-token')
+
+
+def serve_log(fake_jenkins, text, complete=True, allowed=(ALICE,)):
+    """Serve `text` as the build's progressive log to the `allowed` credentials."""
+    data = text.encode('utf-8')
+
+    def progressive(url, auth, params):
+        if auth not in allowed:
+            return FakeResponse(401, b'Unauthorized')
+        start = int(params.get('start', 0))
+        return FakeResponse(200, data[start:], headers={
+            'X-Text-Size': str(len(data)),
+            'X-More-Data': 'false' if complete else 'true'
+        })
+
+    def build_api(url, auth, params):
+        return FakeResponse(200, json_data={'number': 7}) if auth in allowed else FakeResponse(403, b'Forbidden')
+
+    fake_jenkins.route('logText/progressiveText', progressive)
+    fake_jenkins.route('7/api/json', build_api)
+
+
+def test_completed_log_is_served_from_disk(tmp_path, fake_jenkins):
+    store = LogStore(str(tmp_path))
+    serve_log(fake_jenkins, 'line 1\nline 2\n')
+
+    first = store.sync(BUILD_URL, auth=ALICE)
+    second = store.sync(BUILD_URL, auth=ALICE)
+
+    assert second.complete and second.size == first.size
+    assert store.read_text(second) == 'line 1\nline 2\n'
+    assert len(fake_jenkins.called('logText/progressiveText')) == 1
+
+
+def test_running_log_fetches_only_new_bytes(tmp_path, fake_jenkins):
+    store = LogStore(str(tmp_path))
+    serve_log(fake_jenkins, 'one\n', complete=False)
+    store.sync(BUILD_URL, auth=ALICE)
+
+    serve_log(fake_jenkins, 'one\ntwo\n')
+    record = store.sync(BUILD_URL, auth=ALICE)
+
+    assert store.read_text(record) == 'one\ntwo\n'
+    assert fake_jenkins.called('logText/progressiveText')[-1][2] == {'start': 4}
+
+
+def test_stored_log_is_not_served_to_a_wrong_token(tmp_path, fake_jenkins):
+    store = LogStore(str(tmp_path))
+    serve_log(fake_jenkins, 'secret build output\n')
+    store.sync(BUILD_URL, auth=ALICE)
+
+    with pytest.raises(requests.exceptions.HTTPError):
+        store.sync(BUILD_URL, auth=('alice', 'wrong-token'))
+
+
+def test_revoked_credentials_lose_access_on_revalidation(tmp_path, fake_jenkins):
+    store = LogStore(str(tmp_path), revalidate_seconds=0)
+    serve_log(fake_jenkins, 'secret build output\n')
+    store.sync(BUILD_URL, auth=ALICE)
+
+    serve_log(fake_jenkins, 'secret build output\n', allowed=())
+    with pytest.raises(requests.exceptions.HTTPError) as error:
+        store.sync(BUILD_URL, auth=ALICE)
+    assert error.value.response.status_code == 403
+
+
+def test_stored_log_is_served_while_jenkins_is_unreachable(tmp_path, fake_jenkins):
+    store = LogStore(str(tmp_path), revalidate_seconds=0)
+    serve_log(fake_jenkins, 'output\n')
+    store.sync(BUILD_URL, auth=ALICE)
+
+    def unreachable(url, auth, params):
+        raise requests.exceptions.ConnectionError('down')
+
+    fake_jenkins.route('7/api/json', unreachable)
+    record = store.sync(BUILD_URL, auth=ALICE)
+    assert store.read_text(record) == 'output\n'
+
+
+def test_revalidation_is_skipped_within_the_interval(tmp_path, fake_jenkins):
+    store = LogStore(str(tmp_path), revalidate_seconds=3600)
+    serve_log(fake_jenkins, 'output\n')
+    store.sync(BUILD_URL, auth=ALICE)
+    store.sync(BUILD_URL, auth=ALICE)
+
+    assert fake_jenkins.called('7/api/json') == []
+
+
+def test_read_tail_starts_at_a_line_boundary(tmp_path, fake_jenkins):
+    store = LogStore(str(tmp_path))
+    serve_log(fake_jenkins, 'first line\nsecond line\nthird\n')
+    record = store.sync(BUILD_URL, auth=ALICE)
+
+    assert store.read_tail(record, 10) == 'third\n'
+
+
+def test_fetch_tail_requests_only_the_end_and_stores_nothing(tmp_path, fake_jenkins):
+    store = LogStore(str(tmp_path))
+    text = ''.join(f"line {i}\n" for i in range(1000))
+    serve_log(fake_jenkins, text)
+
+    tail = store.fetch_tail(BUILD_URL, auth=ALICE, max_bytes=20)
+
+    assert tail.text == 'line 998\nline 999\n'
+    assert tail.size == len(text) and tail.complete
+    assert fake_jenkins.called('logText/progressiveText')[-1][2] == {'start': len(text) - 20}
+    assert os.listdir(tmp_path) == []
+
+
+def test_fetch_tail_of_a_short_log_takes_one_request(tmp_path, fake_jenkins):
+    store = LogStore(str(tmp_path))
+    serve_log(fake_jenkins, 'only line\n')
+
+    assert store.fetch_tail(BUILD_URL, auth=ALICE, max_bytes=100).text == 'only line\n'
+    assert len(fake_jenkins.called('logText/progressiveText')) == 1
+
+
+def test_fetch_tail_without_a_size_header_keeps_only_the_tail(tmp_path, fake_jenkins):
+    store = LogStore(str(tmp_path))
+    text = ''.join(f"line {i}\n" for i in range(1000))
+    fake_jenkins.route('logText/progressiveText', lambda url, auth, params: FakeResponse(200, text.encode('utf-8')))
+
+    tail = store.fetch_tail(BUILD_URL, auth=ALICE, max_bytes=20)
+
+    assert tail.text == 'line 998\nline 999\n' and tail.size == len(text)
+    assert len(fake_jenkins.called('logText/progressiveText')) == 1
+
+
+def test_fetch_tail_reads_a_stored_copy_from_disk(tmp_path, fake_jenkins):
+    store = LogStore(str(tmp_path))
+    serve_log(fake_jenkins, 'first line\nsecond line\nthird\n')
+    store.sync(BUILD_URL, auth=ALICE)
+
+    assert store.fetch_tail(BUILD_URL, auth=ALICE, max_bytes=10).text == 'third\n'
+    assert len(fake_jenkins.called('logText/progressiveText')) == 1
@@ -0,0 +1,148 @@
+import threading
+import time
+
+import pytest
+import requests
+
+from response_cache import StaleCache, TTLCache
+from tests.fakes import FakeResponse
+
+
+def http_error(status_code):
+    return requests.exceptions.HTTPError(f"{status_code} error", response=FakeResponse(status_code))
+
+
+def is_outage(e):
+    response = getattr(e, 'response', None)
+    return response is None or not 400 <= response.status_code < 500
+
+
+class Loader:
+    """Loader returning queued results in order; exceptions in the queue are raised."""
+
+    def __init__(self, *results):
+        self.results = list(results)
+        self.calls = 0
+
+    def __call__(self, *args):
+        self.calls += 1
+        result = self.results.pop(0) if len(self.results) > 1 else self.results[0]
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+
+def test_ttl_cache_serves_fresh_entries_without_reloading():
+    cache = TTLCache(ttl=60)
+    loader = Loader(('jobs', 'etag-1'))
+
+    assert cache.get('k', loader).value == 'jobs'
+    assert cache.get('k', loader).value == 'jobs'
+    assert loader.calls == 1
+
+
+def test_ttl_cache_keeps_value_when_upstream_is_not_modified():
+    cache = TTLCache(ttl=60)
+    cache.get('k', Loader(('jobs', 'etag-1')))
+
+    entry = cache.get('k', Loader((None, 'etag-1')), force=True)
+    assert entry.value == 'jobs' and entry.etag == 'etag-1'
+
+
+def test_ttl_cache_revalidates_expired_entries_with_their_etag():
+    cache = TTLCache(ttl=0)
+    cache.get('k', Loader(('jobs', 'etag-1')))
+    seen = []
+
+    def not_modified(etag):
+        seen.append(etag)
+        return None, etag
+
+    assert cache.get('k', not_modified).value == 'jobs'
+    assert seen == ['etag-1']
+
+
+def test_ttl_cache_evicts_the_oldest_entry():
+    cache = TTLCache(ttl=60, max_entries=2)
+    for key in ('a', 'b', 'c'):
+        cache.get(key, Loader((key, None)))
+        time.sleep(0.001)
+
+    assert cache.peek('a') is None
+    assert cache.peek('c').value == 'c'
+
+
+def test_ttl_cache_coalesces_concurrent_loads():
+    cache = TTLCache(ttl=60)
+    release = threading.Event()
+    calls = []
+
+    def slow(etag):
+        calls.append(1)
+        release.wait(1)
+        return 'jobs', None
+
+    threads = [threading.Thread(target=cache.get, args=('k', slow)) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.05)
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert len(calls) == 1
+
+
+def test_stale_cache_serves_last_good_value_during_an_outage():
+    cache = StaleCache(retry_on=requests.exceptions.RequestException, retry_if=is_outage, base_delay=60)
+    cache.get('k', Loader('fresh'))
+
+    entry, error = cache.get('k', Loader(requests.exceptions.ConnectionError('down')))
+    assert entry.value == 'fresh' and isinstance(error, requests.exceptions.ConnectionError)
+
+    entry, error = cache.get('k', Loader(http_error(503)))
+    assert entry.value == 'fresh' and error is not None
+
+
+def test_stale_cache_does_not_cover_for_refused_credentials():
+    cache = StaleCache(retry_on=requests.exceptions.RequestException, retry_if=is_outage, base_delay=60)
+    cache.get('k', Loader('fresh'))
+
+    with pytest.raises(requests.exceptions.HTTPError):
+        cache.get('k', Loader(http_error(401)))
+    # The refused value is gone, so a later outage has nothing to serve either
+    with pytest.raises(requests.exceptions.ConnectionError):
+        cache.get('k', Loader(requests.exceptions.ConnectionError('down')))
+
+
+def test_stale_cache_raises_without_a_usable_value():
+    cache = StaleCache(retry_on=requests.exceptions.RequestException, max_stale=0, base_delay=60)
+    cache.get('k', Loader('fresh'))
+    time.sleep(0.01)
+
+    with pytest.raises(requests.exceptions.ConnectionError):
+        cache.get('k', Loader(requests.exceptions.ConnectionError('down')))
+
+
+def test_stale_cache_revalidates_in_the_background():
+    cache = StaleCache(retry_on=requests.exceptions.RequestException, base_delay=0.01, max_delay=0.01)
+    cache.get('k', Loader('old'))
+    loader = Loader(requests.exceptions.ConnectionError('down'), 'new')
+
+    cache.get('k', loader)
+    deadline = time.time() + 2
+    while cache.get('k', loader)[1] is not None and time.time() < deadline:
+        time.sleep(0.01)
+    assert cache.get('k', loader)[0].value == 'new'
+
+
+def test_stale_cache_revalidation_stops_when_credentials_are_refused():
+    cache = StaleCache(retry_on=requests.exceptions.RequestException, retry_if=is_outage, base_delay=0.01, max_delay=0.01)
+    cache.get('k', Loader('old'))
+    loader = Loader(http_error(503), http_error(403))
+
+    assert cache.get('k', loader)[0].value == 'old'
+    deadline = time.time() + 2
+    while cache._entries.get('k') is not None and time.time() < deadline:
+        time.sleep(0.01)
+    with pytest.raises(requests.exceptions.HTTPError):
+        cache.get('k', loader)
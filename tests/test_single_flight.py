@@ -0,0 +1,78 @@
+import threading
+import time
+
+import pytest
+
+from circuit_breaker import BudgetExceededError, end_budget, start_budget
+from single_flight import SingleFlight
+
+
+def start_leader(flight, key, release, result='value'):
+    """Run a call for `key` on a thread that blocks until `release` is set."""
+    started = threading.Event()
+    outcome = {}
+
+    def leader():
+        def fn():
+            started.set()
+            release.wait(2)
+            if isinstance(result, Exception):
+                raise result
+            return result
+        try:
+            outcome['value'] = flight.do(key, fn)
+        except Exception as e:
+            outcome['error'] = e
+
+    thread = threading.Thread(target=leader)
+    thread.start()
+    started.wait(1)
+    return thread, outcome
+
+
+def test_waiters_share_the_leaders_result():
+    flight = SingleFlight()
+    release = threading.Event()
+    thread, _ = start_leader(flight, 'k', release)
+    calls = []
+
+    threading.Timer(0.05, release.set).start()
+    assert flight.do('k', lambda: calls.append(1)) == 'value'
+    thread.join()
+    assert calls == []
+
+
+def test_waiters_get_the_leaders_exception():
+    flight = SingleFlight()
+    release = threading.Event()
+    thread, outcome = start_leader(flight, 'k', release, result=ValueError('bad'))
+
+    threading.Timer(0.05, release.set).start()
+    with pytest.raises(ValueError):
+        flight.do('k', lambda: 'unused')
+    thread.join()
+    assert isinstance(outcome['error'], ValueError)
+
+
+def test_nothing_is_remembered_after_the_call():
+    flight = SingleFlight()
+    assert flight.do('k', lambda: 1) == 1
+    assert flight.do('k', lambda: 2) == 2
+
+
+def test_waiter_gives_up_when_its_budget_runs_out():
+    flight = SingleFlight()
+    release = threading.Event()
+    thread, outcome = start_leader(flight, 'k', release)
+
+    token = start_budget(0.05)
+    try:
+        started = time.monotonic()
+        with pytest.raises(BudgetExceededError):
+            flight.do('k', lambda: 'unused')
+        assert time.monotonic() - started < 1
+    finally:
+        end_budget(token)
+        release.set()
+        thread.join()
+    assert outcome['value'] == 'value'  # The shared call itself carries on